@@ -6,8 +6,10 @@ from airport.models import (
     Airplane,
     Crew,
     Flight,
+    FlightSchedule,
     Order,
     Ticket,
+    SeatHold,
 )
 
 
@@ -50,6 +52,14 @@ class FlightAdmin(admin.ModelAdmin):
     list_filter = ("route", "airplane")
 
 
+@admin.register(FlightSchedule)
+class FlightScheduleAdmin(admin.ModelAdmin):
+    list_display = ("id", "route", "airplane", "departure_time", "time_zone", "valid_from", "valid_until")
+    list_filter = ("route", "airplane")
+    filter_horizontal = ("crew",)
+    readonly_fields = ("materialized_until",)
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ("id", "created_at", "user")
@@ -62,3 +72,10 @@ class TicketAdmin(admin.ModelAdmin):
     list_display = ("id", "flight", "order", "row", "seat")
     search_fields = ("flight__route__source__name", "flight__route__destination__name", "order__user__username")
     list_filter = ("flight", "order")
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ("id", "flight", "user", "row", "seat", "expires_at")
+    search_fields = ("user__email",)
+    list_filter = ("flight",)
@@ -0,0 +1,178 @@
+"""
+Native async versions of the read-heavy public endpoints, for serving under an ASGI server
+(ex. `uvicorn airport_api_service.asgi:application`). They return the same payloads as the
+DRF viewsets in airport.views, which remain the endpoints for writes.
+
+Django's async ORM still runs each query in a worker thread, so these views do not make a single
+request faster. What they save is the thread held for the whole request: the event loop only hands
+the database work itself to a thread, and serves other requests while a query, the cache or the
+client is slow.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    NotFound,
+    PermissionDenied,
+)
+from rest_framework.request import Request
+
+from airport.fieldsets import relations_for
+from airport.models import Flight, SeatHold, Ticket
+from airport.pagination import FlightCursorPagination
+from airport.renderers import FastJSONRenderer
+from airport.response_cache import acount, agenerations, cache_entry
+from airport.schedules import ensure_materialized
+from airport.seatmap import ENCODINGS, SeatMap
+from airport.serializers import AirportSerializer, FlightSerializer
+from airport.views import AirportViewSet, FlightViewSet
+from user.authentication import CachedJWTAuthentication
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def json_response(data, status_code=status.HTTP_200_OK) -> HttpResponse:
+    response = HttpResponse(FastJSONRenderer().render(data), status=status_code, content_type="application/json")
+    response.data = data
+    return response
+
+
+def async_api(view):
+    """Read-only async view answering like DRF: 405 for unsafe methods and API exceptions as JSON"""
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            response = json_response(
+                {"detail": f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+            response["Allow"] = ", ".join(SAFE_METHODS)
+            return response
+
+        try:
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+            response = json_response(detail, exc.status_code)
+            if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                response.status_code = status.HTTP_401_UNAUTHORIZED
+                response["WWW-Authenticate"] = CachedJWTAuthentication().authenticate_header(request)
+            return response
+
+    return wrapper
+
+
+def cache_async_response(*namespaces):
+    """Async counterpart of airport.response_cache.cache_response, sharing its generations and stats"""
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag, last_modified, key = cache_entry(request, await agenerations(namespaces))
+
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                await acount("hits")
+                not_modified["ETag"] = etag
+                return not_modified
+
+            data = await cache.aget(key)
+            if data is None:
+                await acount("misses")
+                response = await view(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                await cache.aset(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+                response["X-Cache"] = "MISS"
+            else:
+                await acount("hits")
+                response = json_response(data)
+                response["X-Cache"] = "HIT"
+
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+async def authenticate(request):
+    """User of the request's JWT, as CachedJWTAuthentication would find it, or None without a token"""
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    return await authentication.aget_user(authentication.get_validated_token(raw_token))
+
+
+@async_api
+@cache_async_response("airports")
+async def airport_list(request):
+    airports = [airport async for airport in AirportViewSet.queryset.all()]
+    return json_response(AirportSerializer(airports, many=True).data)
+
+
+@async_api
+@cache_async_response("flights")
+async def flight_list(request):
+    """Same filters and cursor pagination as FlightViewSet.list"""
+    drf_request = Request(request)
+    until = FlightViewSet.search_until(drf_request.query_params)
+    if until is not None:
+        await sync_to_async(ensure_materialized)(until)
+    context = {"request": drf_request}
+    queryset = relations_for(FlightViewSet.queryset, FlightSerializer(context=context))
+    queryset = FlightViewSet.search_queryset(queryset, drf_request.query_params)
+    paginator = FlightCursorPagination()
+    flights = await sync_to_async(paginator.paginate_queryset)(queryset, drf_request)
+    serializer = FlightSerializer(flights, many=True, context=context)
+    return json_response(paginator.get_paginated_response(serializer.data).data)
+
+
+@async_api
+async def flight_detail(request, pk):
+    """Staff only, like FlightViewSet.retrieve"""
+    user = await authenticate(request)
+    if user is None:
+        raise NotAuthenticated()
+    if not user.is_staff:
+        raise PermissionDenied()
+
+    context = {"request": Request(request)}
+    flight = await relations_for(FlightViewSet.queryset, FlightSerializer(context=context)).filter(pk=pk).afirst()
+    if flight is None:
+        raise NotFound()
+    return json_response(FlightSerializer(flight, context=context).data)
+
+
+@async_api
+async def flight_seats(request, pk):
+    """Same payload as FlightViewSet.seats"""
+    encoding = request.GET.get("encoding", "base64")
+    if encoding not in ENCODINGS:
+        return json_response({"encoding": f"Must be one of: {', '.join(ENCODINGS)}."}, status.HTTP_400_BAD_REQUEST)
+
+    cabin = await Flight.objects.filter(pk=pk).values_list("airplane__rows", "airplane__seats_in_row").afirst()
+    if cabin is None:
+        raise NotFound()
+
+    taken = [seat async for seat in Ticket.objects.filter(flight_id=pk).values_list("row", "seat")]
+    seat_map = SeatMap(*cabin, taken=taken)
+    async for row, seat in SeatHold.objects.active().filter(flight_id=pk).values_list("row", "seat"):
+        seat_map.mark(row, seat)
+    return json_response(seat_map.payload(pk, encoding))
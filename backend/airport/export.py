@@ -0,0 +1,171 @@
+"""
+Full dumps of flights, tickets and orders for finance and operations, as CSV or NDJSON,
+optionally gzip-compressed on the fly.
+
+Rows are read with QuerySet.iterator(), which uses a server-side cursor on PostgreSQL, then encoded
+and compressed a batch at a time, so memory use stays flat whatever the number of rows. The queries
+run while the response is being sent: export views must be served by a WSGI worker, as Django 4.1
+iterates streaming responses inside the event loop under ASGI.
+"""
+import csv
+import json
+import zlib
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, NamedTuple
+
+from django.conf import settings
+from django.db.models import Count, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from airport.models import Flight, Order, Ticket
+
+
+class Export(NamedTuple):
+    queryset: QuerySet
+    # Filtered by the since / until bounds
+    date_field: str
+    # Header of each column and the field it is read from
+    columns: dict[str, str]
+
+
+EXPORTS = {
+    "flights": Export(
+        Flight.objects.all(),
+        "departure_time",
+        {
+            "id": "id",
+            "route": "route_id",
+            "source": "route__source__name",
+            "destination": "route__destination__name",
+            "airplane": "airplane__name",
+            "departure_time": "departure_time",
+            "arrival_time": "arrival_time",
+            "seats_sold": "seats_sold",
+        },
+    ),
+    "tickets": Export(
+        Ticket.objects.all(),
+        "order__created_at",
+        {
+            "id": "id",
+            "order": "order_id",
+            "ordered_at": "order__created_at",
+            "user": "order__user__email",
+            "flight": "flight_id",
+            "departure_time": "flight__departure_time",
+            "row": "row",
+            "seat": "seat",
+        },
+    ),
+    "orders": Export(
+        Order.objects.annotate(ticket_count=Count("tickets")),
+        "created_at",
+        {
+            "id": "id",
+            "created_at": "created_at",
+            "user": "user__email",
+            "tickets": "ticket_count",
+        },
+    ),
+}
+
+# Content type and file extension of each output format
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+
+def parse_bound(value: str, end: bool = False) -> datetime:
+    """
+    Aware datetime from an ISO date or datetime. A plain date means the start of that day,
+    or the start of the next one for an `end` bound, so the whole day is included.
+    """
+    day = parse_date(value)
+    if day is not None:
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError("Expected a date (YYYY-MM-DD) or an ISO 8601 datetime.")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def rows(name: str, since: datetime = None, until: datetime = None) -> Iterator[tuple]:
+    """Rows of the export `name` in primary key order, with `since` <= date field < `until`"""
+    export = EXPORTS[name]
+    queryset = export.queryset.all()
+    if since is not None:
+        queryset = queryset.filter(**{f"{export.date_field}__gte": since})
+    if until is not None:
+        queryset = queryset.filter(**{f"{export.date_field}__lt": until})
+    return queryset.order_by("pk").values_list(*export.columns.values()).iterator(
+        chunk_size=settings.EXPORT_CHUNK_SIZE
+    )
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+class _Line:
+    """File-like object handing back what csv.writer writes, one line at a time"""
+
+    def write(self, line):
+        return line
+
+
+def csv_lines(header: Iterable[str], rows: Iterable[tuple]) -> Iterator[str]:
+    writer = csv.writer(_Line())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_value(value) for value in row])
+
+
+def ndjson_lines(header: Iterable[str], rows: Iterable[tuple]) -> Iterator[str]:
+    header = tuple(header)
+    for row in rows:
+        yield json.dumps(dict(zip(header, map(_value, row))), separators=(",", ":")) + "\n"
+
+
+def _batches(lines: Iterable[str], size: int) -> Iterator[bytes]:
+    """Lines joined and encoded `size` at a time, so the response is not sent row by row"""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == size:
+            yield "".join(batch).encode()
+            batch = []
+    if batch:
+        yield "".join(batch).encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Chunks compressed into a single gzip stream as they come"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream(
+    name: str,
+    output: str = "csv",
+    compress: bool = False,
+    since: datetime = None,
+    until: datetime = None,
+) -> Iterator[bytes]:
+    """Encoded export `name`, as an iterator of byte chunks for a StreamingHttpResponse or a file"""
+    encode = csv_lines if output == "csv" else ndjson_lines
+    chunks = _batches(encode(EXPORTS[name].columns, rows(name, since, until)), settings.EXPORT_CHUNK_SIZE)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def filename(name: str, output: str = "csv", compress: bool = False) -> str:
+    extension = FORMATS[output][1]
+    return f"{name}.{extension}.gz" if compress else f"{name}.{extension}"
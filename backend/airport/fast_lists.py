@@ -0,0 +1,179 @@
+"""
+Read path of the list endpoints building their items straight from .values() rows, without a
+serializer and its fields per object.
+
+Each FastList returns what the viewset's list serializer renders, keys in the same order, and its
+related-object queries have the same FROM, JOIN and WHERE as the prefetches they replace, so the
+responses are byte for byte the same (see airport.tests.test_fast_lists). Requests with ?fields= or
+?expand= are answered by the serializers.
+"""
+from collections import defaultdict
+from typing import Callable, NamedTuple
+
+from django.conf import settings
+
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from airport import images
+from airport.models import Airplane, Crew, Type
+
+
+class FastList(NamedTuple):
+    # Columns of .values() for each object
+    columns: tuple
+    # (rows, request) -> list of response items
+    build: Callable
+
+
+_datetime = serializers.DateTimeField()
+_image_storage = Airplane._meta.get_field("image").storage
+
+
+def _image_url(name, request):
+    """ImageField representation of a stored file name"""
+    if not name:
+        return None
+    url = _image_storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def _grouped(pairs) -> dict:
+    """{key: [values]} of (key, value) pairs, values in query order"""
+    grouped = defaultdict(list)
+    for key, value in pairs:
+        grouped[key].append(value)
+    return grouped
+
+
+def build_airports(rows, request):
+    return list(rows)
+
+
+def build_routes(rows, request):
+    return [
+        {
+            "id": row["id"],
+            "source": row["source_id"],
+            "destination": row["destination_id"],
+            "distance": row["distance"],
+            "source_name": row["source__name"],
+            "destination_name": row["destination__name"],
+        }
+        for row in rows
+    ]
+
+
+def build_airplanes(rows, request):
+    type_names = {}
+    if rows:
+        type_names = _grouped(
+            Type.objects.filter(airplane__in=[row["id"] for row in rows]).values_list("airplane", "name")
+        )
+    return [
+        {
+            "id": row["id"],
+            "name": row["name"],
+            "rows": row["rows"],
+            "seats_in_row": row["seats_in_row"],
+            "types": type_names.get(row["id"], []),
+            "capacity": row["rows"] * row["seats_in_row"],
+            "image": _image_url(row["image"], request),
+            "thumbnail": images.stored_variant_urls(row["image"], row["image_variants"], "thumbnail", request),
+        }
+        for row in rows
+    ]
+
+
+def build_flights(rows, request):
+    type_ids, crew = {}, defaultdict(list)
+    if rows:
+        type_ids = _grouped(
+            Type.objects.filter(airplane__in=[row["airplane_id"] for row in rows]).values_list("airplane", "id")
+        )
+        members = Crew.objects.filter(flights__in=[row["id"] for row in rows]).values_list(
+            "flights", "id", "first_name", "last_name"
+        )
+        for flight_id, member_id, first_name, last_name in members:
+            crew[flight_id].append(
+                {
+                    "id": member_id,
+                    "first_name": first_name,
+                    "last_name": last_name,
+                    "full_name": f"{first_name} {last_name}",
+                }
+            )
+
+    flights = []
+    for row in rows:
+        capacity = row["airplane__rows"] * row["airplane__seats_in_row"]
+        flights.append(
+            {
+                "id": row["id"],
+                "route": row["route_id"],
+                "airplane": row["airplane_id"],
+                "departure_time": _datetime.to_representation(row["departure_time"]),
+                "arrival_time": _datetime.to_representation(row["arrival_time"]),
+                "seats_sold": row["seats_sold"],
+                "tickets_available": capacity - row["seats_sold"],
+                "route_details": {
+                    "id": row["route_id"],
+                    "source": row["route__source_id"],
+                    "destination": row["route__destination_id"],
+                    "distance": row["route__distance"],
+                    "source_name": row["route__source__name"],
+                    "destination_name": row["route__destination__name"],
+                },
+                "airplane_details": {
+                    "id": row["airplane_id"],
+                    "name": row["airplane__name"],
+                    "rows": row["airplane__rows"],
+                    "seats_in_row": row["airplane__seats_in_row"],
+                    "types": type_ids.get(row["airplane_id"], []),
+                    "capacity": capacity,
+                    "image": _image_url(row["airplane__image"], request),
+                },
+                "crew_members": crew.get(row["id"], []),
+            }
+        )
+    return flights
+
+
+AIRPORTS = FastList(("id", "name", "closest_big_city"), build_airports)
+ROUTES = FastList(
+    ("id", "source_id", "destination_id", "distance", "source__name", "destination__name"), build_routes
+)
+# Every column, as the serializer's DISTINCT query selects them
+AIRPLANES = FastList(("id", "name", "rows", "seats_in_row", "image", "image_variants"), build_airplanes)
+FLIGHTS = FastList(
+    (
+        "id", "route_id", "airplane_id", "departure_time", "arrival_time", "seats_sold",
+        "route__source_id", "route__destination_id", "route__distance",
+        "route__source__name", "route__destination__name",
+        "airplane__name", "airplane__rows", "airplane__seats_in_row", "airplane__image",
+    ),
+    build_flights,
+)
+
+
+class FastListMixin:
+    """
+    List action answered by `fast_list` from .values() rows while settings.FAST_LISTS is on, unless
+    ?fields= or ?expand= ask for another shape than the serializer's default one.
+    """
+
+    fast_list = None
+
+    def uses_fast_list(self):
+        params = self.request.query_params
+        return settings.FAST_LISTS and not params.get("fields") and not params.get("expand")
+
+    def list(self, request, *args, **kwargs):
+        if not self.uses_fast_list():
+            return super().list(request, *args, **kwargs)
+
+        rows = self.get_queryset().select_related(None).prefetch_related(None).values(*self.fast_list.columns)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.fast_list.build(page, request))
+        return Response(self.fast_list.build(list(rows), request))
@@ -0,0 +1,160 @@
+"""
+Sparse fieldsets (?fields=) and on-demand expansion (?expand=) for the airport serializers.
+
+?fields=id,route_details.source_name renders only the named fields, dotted names reaching into
+nested serializers; a name alone includes the whole field. ?expand=route renders a related object
+listed in a serializer's `expandable_fields` in place of its id, and implies the field is wanted.
+Both only apply to reads, so writable serializers validate their input unchanged.
+
+`relations_for` derives the select_related() and prefetch_related() lookups from the fields a
+serializer will render, so the viewset querysets fetch exactly the relations the response needs.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse(value: str) -> dict:
+    """Tree of the dotted names of a comma-separated list: "id,route.source" -> {"id": {}, "route": {"source": {}}}"""
+    tree = {}
+    for name in filter(None, (name.strip() for name in value.split(","))):
+        node = tree
+        for part in name.split("."):
+            node = node.setdefault(part, {})
+    return tree
+
+
+class SparseFieldsMixin:
+    """
+    Serializer rendering the ?fields= and ?expand= of the request in its context. Nested serializers
+    get their part of both from their parent, so only the top-level serializer reads the request.
+    """
+
+    # Field name: serializer rendering the related object(s) when the field is expanded
+    expandable_fields = {}
+    # Field name: to-one lookups read by a computed field, such as a model property
+    field_relations = {}
+
+    _fieldset = None
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def fieldset(self) -> tuple:
+        """Requested fields tree, None for the default fields, and expanded fields tree"""
+        if self._fieldset is not None:
+            return self._fieldset
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS or not self._is_root():
+            return None, {}
+        params = request.query_params
+        return (parse(params["fields"]) if params.get("fields") else None), parse(params.get("expand", ""))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested, expand = self.fieldset()
+
+        for name in expand.keys() & self.expandable_fields.keys() & fields.keys():
+            field = fields[name]
+            many = isinstance(field, (serializers.ManyRelatedField, serializers.ListSerializer))
+            kwargs = {"many": many, "read_only": True}
+            if field.source not in (None, name):
+                kwargs["source"] = field.source
+            fields[name] = self.expandable_fields[name](**kwargs)
+
+        if requested is not None:
+            fields = {name: field for name, field in fields.items() if name in requested or name in expand}
+
+        for name, field in fields.items():
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if isinstance(nested, SparseFieldsMixin):
+                nested._fieldset = ((requested or {}).get(name) or None, expand.get(name, {}))
+        return fields
+
+
+def _relation(model, name):
+    """Model field of the relation `name` of `model`, None for columns, properties and methods"""
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+def _lookups(serializer, model, prefix="") -> tuple[list, list]:
+    """select_related() lookups and Prefetch objects for the fields `serializer` renders"""
+    select, prefetch = [], []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == "*":
+            if isinstance(field, serializers.BaseSerializer):
+                nested_select, nested_prefetch = _lookups(field, model, prefix)
+                select += nested_select
+                prefetch += nested_prefetch
+            continue
+
+        path, related = [], model
+        for index, attr in enumerate(field.source_attrs):
+            model_field = _relation(related, attr)
+            if model_field is None:
+                break
+            last = index == len(field.source_attrs) - 1
+            if model_field.many_to_many or model_field.one_to_many:
+                queryset = model_field.related_model._default_manager.all()
+                if last and isinstance(field, serializers.ListSerializer):
+                    queryset = relations_for(queryset, field.child)
+                prefetch.append(Prefetch(prefix + "__".join(path + [attr]), queryset=queryset))
+                path = []
+                break
+            if last and isinstance(field, serializers.PrimaryKeyRelatedField) and model_field.concrete:
+                # Rendered from the foreign key column
+                break
+            path.append(attr)
+            related = model_field.related_model
+        else:
+            if path and isinstance(field, serializers.BaseSerializer):
+                nested_select, nested_prefetch = _lookups(field, related, prefix + "__".join(path) + "__")
+                select += nested_select
+                prefetch += nested_prefetch
+        if path:
+            select.append(prefix + "__".join(path))
+
+        select += [prefix + lookup for lookup in getattr(serializer, "field_relations", {}).get(field.field_name, ())]
+    return select, prefetch
+
+
+def relations_for(queryset, serializer):
+    """
+    `queryset` fetching the related objects `serializer` renders, and no others: to-one relations
+    with select_related() and to-many relations with a Prefetch whose queryset is itself narrowed
+    to the fields of the nested serializer.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    select, prefetch = _lookups(serializer, queryset.model)
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if select:
+        queryset = queryset.select_related(*dict.fromkeys(select))
+    if prefetch:
+        # A relation rendered twice, as an id list and expanded, is prefetched once
+        unique = {}
+        for lookup in prefetch:
+            unique.setdefault(lookup.prefetch_to, lookup)
+        queryset = queryset.prefetch_related(*unique.values())
+    return queryset
+
+
+class SparseFieldsViewMixin:
+    """Viewset whose reads fetch only the relations of the requested ?fields= and ?expand="""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        return relations_for(queryset, self.get_serializer())
@@ -0,0 +1,166 @@
+"""
+Resized variants of airplane images, created by a pool of worker threads off the request thread.
+
+Each variant is saved as WebP and as a JPEG fallback under a name derived from the hash of its
+content, so a name always refers to the same bytes and media can be cached by browsers for good
+(see airport.views.media). Pillow releases the GIL while decoding, resizing and encoding, so the
+threads of the pool work in parallel.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent import futures
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils.text import slugify
+from PIL import Image, ImageOps
+
+from airport.models import Airplane
+from airport.response_cache import invalidate
+
+logger = logging.getLogger(__name__)
+
+# Bounding box of each variant, images are scaled down to fit and never up
+VARIANTS = {
+    "thumbnail": (320, 240),
+    "medium": (1024, 768),
+}
+# Pillow format, file extension and encoder options of each encoding
+ENCODINGS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+VARIANTS_DIR = "upload/airplanes/variants"
+
+_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+_pending = set()
+
+
+def _encode(image: Image.Image, encoding: str) -> bytes:
+    image_format, _, options = ENCODINGS[encoding]
+    if encoding == "jpeg" and image.mode != "RGB":
+        # JPEG has no alpha channel, transparent areas become white
+        background = Image.new("RGB", image.size, "white")
+        image = image.convert("RGBA")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def _save(data: bytes, prefix: str, extension: str) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    name = f"{VARIANTS_DIR}/{prefix}-{digest}.{extension}"
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def create_variants(file, prefix: str) -> dict:
+    """
+    Save every variant of the image `file` in every encoding, and return their storage names
+    and sizes as {"thumbnail": {"width": 320, "height": 213, "webp": name, "jpeg": name}, ...}
+    """
+    with Image.open(file) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ("RGB", "RGBA"):
+            transparent = original.mode in ("LA", "PA") or "transparency" in original.info
+            original = original.convert("RGBA" if transparent else "RGB")
+
+        variants = {}
+        for variant, size in VARIANTS.items():
+            image = original.copy()
+            image.thumbnail(size, Image.Resampling.LANCZOS)
+            variants[variant] = {"width": image.width, "height": image.height}
+            for encoding, (_, extension, _) in ENCODINGS.items():
+                variants[variant][encoding] = _save(_encode(image, encoding), f"{prefix}-{variant}", extension)
+    return variants
+
+
+def process(airplane_id: int) -> dict:
+    """
+    Create the variants of the airplane's current image and store them in its image_variants,
+    unless the image was replaced meanwhile. Returns the variants, None without an image.
+    """
+    airplane = Airplane.objects.filter(pk=airplane_id).only("id", "name", "image").first()
+    if airplane is None or not airplane.image:
+        return None
+
+    with airplane.image.open("rb") as file:
+        variants = create_variants(file, slugify(airplane.name) or "airplane")
+    image_variants = {"source": airplane.image.name, "variants": variants}
+    if Airplane.objects.filter(pk=airplane_id, image=airplane.image.name).update(image_variants=image_variants):
+        # Updates send no model signals
+        invalidate("airplanes")
+    return variants
+
+
+def _process_logged(airplane_id):
+    try:
+        process(airplane_id)
+    except Exception:
+        logger.exception("Could not create the image variants of airplane %s", airplane_id)
+
+
+def _process_in_worker(airplane_id):
+    try:
+        _process_logged(airplane_id)
+    finally:
+        # Worker threads outlive requests, return their connections like a request would
+        connections.close_all()
+
+
+def _pool() -> futures.ThreadPoolExecutor:
+    global _executor, _executor_pid
+    with _lock:
+        # Threads don't survive a fork, a child process starts its own pool
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = futures.ThreadPoolExecutor(settings.IMAGE_WORKERS, thread_name_prefix="airplane-images")
+            _executor_pid = os.getpid()
+            _pending.clear()
+        return _executor
+
+
+def submit(airplane_id: int):
+    """Process the airplane's image in the worker pool, or right away with settings.IMAGE_WORKERS = 0"""
+    if not settings.IMAGE_WORKERS:
+        _process_logged(airplane_id)
+        return
+    future = _pool().submit(_process_in_worker, airplane_id)
+    _pending.add(future)
+    future.add_done_callback(_pending.discard)
+
+
+def schedule(airplane_id: int):
+    """Process the airplane's image once the current transaction commits, so the workers can read it"""
+    transaction.on_commit(lambda: submit(airplane_id))
+
+
+def wait(timeout: float = None):
+    """Block until the images submitted so far are processed"""
+    futures.wait(list(_pending), timeout=timeout)
+
+
+def variant_urls(airplane: Airplane, variant: str, request=None) -> dict:
+    """URLs and size of a variant of the airplane's image, None until it is created"""
+    return stored_variant_urls(airplane.image.name, airplane.image_variants, variant, request)
+
+
+def stored_variant_urls(image: str, image_variants: dict, variant: str, request=None) -> dict:
+    """variant_urls() from the image and image_variants columns, as .values() returns them"""
+    image_variants = image_variants or {}
+    if not image or image_variants.get("source") != image:
+        return None
+    urls = dict(image_variants["variants"][variant])
+    for encoding in ENCODINGS:
+        url = default_storage.url(urls[encoding])
+        urls[encoding] = request.build_absolute_uri(url) if request is not None else url
+    return urls
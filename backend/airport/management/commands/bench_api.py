@@ -0,0 +1,241 @@
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from airport.models import Flight, Type
+from airport.seeding import SEED_EMAIL_DOMAIN, AirportSeeder
+
+
+class QueryRecorder:
+    """Database execute wrapper counting queries and, where the driver reports it, rows fetched"""
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.rows_known = True
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        self.queries += 1
+        if sql.lstrip().upper().startswith("SELECT"):
+            rowcount = context["cursor"].cursor.rowcount
+            if rowcount is None or rowcount < 0:
+                self.rows_known = False
+            else:
+                self.rows += rowcount
+        return result
+
+
+def percentile(timings, percent):
+    return statistics.quantiles(timings, n=100, method="inclusive")[percent - 1] if len(timings) > 1 else timings[0]
+
+
+class Command(BaseCommand):
+    """
+    Django command to benchmark the main API endpoints in-process through APIClient.
+    Seeds a dataset inside a transaction that is rolled back, then reports latency percentiles,
+    throughput, SQL queries and rows fetched per endpoint, optionally comparing with a previous run.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", type=int, default=30)
+        parser.add_argument("--flights", type=int, default=300)
+        parser.add_argument("--orders", type=int, default=200)
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint")
+        parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per endpoint")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--cold-cache", action="store_true", help="Clear the cache before every request")
+        parser.add_argument("--output", help="Save results as JSON to this path")
+        parser.add_argument("--compare", help="Previous JSON results to compare with")
+        parser.add_argument(
+            "--threshold", type=float, default=20.0, help="Allowed p95 latency growth in percent when comparing"
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        try:
+            setup_test_environment()
+            own_environment = True
+        except RuntimeError:
+            # Already set up, e.g. when called from the test suite
+            own_environment = False
+        # Throttles still count every request, but against limits a benchmark never reaches, in a throwaway store
+        rates = {scope: "1000000/day" for scope in settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]}
+        try:
+            with tempfile.TemporaryDirectory() as directory, override_settings(
+                THROTTLE_DB_PATH=os.path.join(directory, "throttle.sqlite3"),
+                REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates},
+            ):
+                with transaction.atomic():
+                    self.stdout.write("Seeding benchmark data...")
+                    dataset = self.seed(rng, options)
+                    results = self.run(rng, dataset, options)
+                    transaction.set_rollback(True)
+        finally:
+            if own_environment:
+                teardown_test_environment()
+            cache.clear()
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                **{key: options[key] for key in ("airports", "flights", "orders", "requests", "seed", "cold_cache")},
+            },
+            "endpoints": results,
+        }
+        self.print_report(results)
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results saved to {options['output']}"))
+
+        if options["compare"]:
+            with open(options["compare"]) as baseline:
+                regressions = self.compare(json.load(baseline)["endpoints"], results, options["threshold"])
+            if regressions:
+                raise CommandError(f"Performance regressions: {', '.join(regressions)}")
+
+    def seed(self, rng, options):
+        last_flight = Flight.objects.aggregate(last=Max("id"))["last"] or 0
+        AirportSeeder(options["seed"]).seed(
+            airports=options["airports"],
+            airplanes=20,
+            crew=50,
+            flights=options["flights"],
+            users=1,
+            orders=options["orders"],
+        )
+        user = get_user_model().objects.get(email=f"passenger1@{SEED_EMAIL_DOMAIN}")
+        admin = get_user_model().objects.create_user("bench-admin@airport.test", "benchpass", is_staff=True)
+
+        # Seeded flights sell their seats in order, the rest are free
+        flights = list(Flight.objects.filter(id__gt=last_flight).select_related("airplane"))
+        free_seats = {}
+        for flight in flights:
+            seats_in_row = flight.airplane.seats_in_row
+            free_seats[flight.id] = [
+                (index // seats_in_row + 1, index % seats_in_row + 1)
+                for index in range(flight.seats_sold, flight.airplane.capacity)
+            ]
+            rng.shuffle(free_seats[flight.id])
+
+        types = list(Type.objects.all())
+        return {"user": user, "admin": admin, "flights": flights, "types": types, "free_seats": free_seats}
+
+    def endpoints(self, rng, dataset):
+        """Name -> function issuing one request with the given client"""
+        flights = dataset["flights"]
+        type_names = [airplane_type.name for airplane_type in dataset["types"]]
+
+        def order_payload():
+            flight = rng.choice(flights)
+            row, seat = dataset["free_seats"][flight.id].pop()
+            return {"tickets": [{"row": row, "seat": seat, "flight": flight.id}]}
+
+        return {
+            "flight list": ("user", lambda client: client.get(reverse("airport:flight-list"))),
+            "flight detail": (
+                "admin",
+                lambda client: client.get(reverse("airport:flight-detail", args=(rng.choice(flights).id,))),
+            ),
+            "airplane list by types": (
+                "user",
+                lambda client: client.get(
+                    reverse("airport:airplane-list"), {"types": ",".join(rng.sample(type_names, 2))}
+                ),
+            ),
+            "order create": (
+                "user",
+                lambda client: client.post(reverse("airport:order-list"), order_payload(), format="json"),
+            ),
+            "order list": ("user", lambda client: client.get(reverse("airport:order-list"))),
+        }
+
+    def run(self, rng, dataset, options):
+        clients = {}
+        for role in ("user", "admin"):
+            clients[role] = APIClient()
+            clients[role].force_authenticate(dataset[role])
+
+        results = {}
+        for name, (role, request) in self.endpoints(rng, dataset).items():
+            client = clients[role]
+            for _ in range(options["warmup"]):
+                request(client)
+
+            timings, queries, rows, rows_known, errors = [], [], [], True, 0
+            started = time.perf_counter()
+            for _ in range(options["requests"]):
+                if options["cold_cache"]:
+                    cache.clear()
+                recorder = QueryRecorder()
+                with connection.execute_wrapper(recorder):
+                    request_started = time.perf_counter()
+                    response = request(client)
+                    timings.append((time.perf_counter() - request_started) * 1000)
+                errors += response.status_code >= 400
+                queries.append(recorder.queries)
+                rows.append(recorder.rows)
+                rows_known &= recorder.rows_known
+            elapsed = time.perf_counter() - started
+
+            results[name] = {
+                "requests": options["requests"],
+                "errors": errors,
+                "p50_ms": round(percentile(timings, 50), 3),
+                "p95_ms": round(percentile(timings, 95), 3),
+                "p99_ms": round(percentile(timings, 99), 3),
+                "mean_ms": round(statistics.mean(timings), 3),
+                "throughput_rps": round(options["requests"] / elapsed, 1),
+                "queries": round(statistics.mean(queries), 2),
+                "max_queries": max(queries),
+                "rows_fetched": round(statistics.mean(rows), 1) if rows_known else None,
+            }
+        return results
+
+    def print_report(self, results):
+        self.stdout.write(
+            f"\n{'endpoint':<24}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}{'rows':>9}{'errors':>8}"
+        )
+        for name, result in results.items():
+            rows = "-" if result["rows_fetched"] is None else f"{result['rows_fetched']:.0f}"
+            self.stdout.write(
+                f"{name:<24}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+                f"{result['throughput_rps']:>9.1f}{result['queries']:>9.1f}{rows:>9}{result['errors']:>8}"
+            )
+
+    def compare(self, baseline, results, threshold):
+        """Print changes against a previous run and return the endpoints that regressed"""
+        regressions = []
+        self.stdout.write(f"\n{'endpoint':<24}{'p95 change':>12}{'queries':>16}")
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+            regressed = change > threshold or result["max_queries"] > before["max_queries"]
+            line = f"{name:<24}{change:>+11.1f}%{before['max_queries']:>8} -> {result['max_queries']:<4}"
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+            if regressed:
+                regressions.append(name)
+        return regressions
@@ -0,0 +1,171 @@
+import asyncio
+import itertools
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.management.commands.bench_api import percentile
+from airport.models import Flight
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare the sync DRF read endpoints with their async versions under concurrency.
+    Sync requests are served by a pool of threads, like a threaded WSGI server; async requests by one
+    event loop, each in its own thread-sensitive context, like Django's ASGI handler. Runs against the
+    data already in the database (see the seed_airport command) and writes nothing but cache entries.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint and mode")
+        parser.add_argument(
+            "--concurrency", default="1,8,32", help="Comma-separated numbers of requests in flight at once"
+        )
+        parser.add_argument(
+            "--cached",
+            action="store_true",
+            help="Let the response cache answer; by default a unique query parameter makes every request miss",
+        )
+        parser.add_argument("--output", help="Save results as JSON to this path")
+
+    def handle(self, *args, **options):
+        try:
+            concurrencies = [int(value) for value in options["concurrency"].split(",")]
+        except ValueError:
+            raise CommandError("--concurrency must be comma-separated integers")
+        if min(concurrencies) < 1:
+            raise CommandError("--concurrency values must be positive")
+
+        endpoints = self.endpoints()
+        try:
+            setup_test_environment()
+            own_environment = True
+        except RuntimeError:
+            own_environment = False
+        try:
+            results = []
+            for name, (sync_url, async_url, headers) in endpoints.items():
+                for concurrency in concurrencies:
+                    for mode, url in (("sync", sync_url), ("async", async_url)):
+                        result = self.run(mode, url, headers, concurrency, options)
+                        results.append({"endpoint": name, "mode": mode, "concurrency": concurrency, **result})
+        finally:
+            if own_environment:
+                teardown_test_environment()
+
+        self.print_report(results)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump({"database": connection.vendor, "results": results}, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results saved to {options['output']}"))
+
+    def endpoints(self):
+        """Name -> (sync URL, async URL, request headers)"""
+        flight_id = Flight.objects.order_by("id").values_list("id", flat=True).first()
+        if flight_id is None:
+            raise CommandError("No flights to benchmark, run the seed_airport command first")
+
+        endpoints = {
+            "airport list": (reverse("airport:airport-list"), reverse("airport:async-airport-list"), {}),
+            "flight list": (reverse("airport:flight-list"), reverse("airport:async-flight-list"), {}),
+            "flight seats": (
+                reverse("airport:flight-seats", args=(flight_id,)),
+                reverse("airport:async-flight-seats", args=(flight_id,)),
+                {},
+            ),
+        }
+        admin = get_user_model().objects.filter(is_staff=True, is_active=True).first()
+        if admin is None:
+            self.stdout.write(self.style.WARNING("No staff user, skipping flight detail"))
+        else:
+            endpoints["flight detail"] = (
+                reverse("airport:flight-detail", args=(flight_id,)),
+                reverse("airport:async-flight-detail", args=(flight_id,)),
+                {"Authorization": f"Bearer {AccessToken.for_user(admin)}"},
+            )
+        return endpoints
+
+    def run(self, mode, url, headers, concurrency, options):
+        numbers = itertools.count()
+
+        def params():
+            return {} if options["cached"] else {"bench": next(numbers)}
+
+        run = self.run_sync if mode == "sync" else self.run_async
+        # One unmeasured request per worker first, so connections and lazily built state are warm
+        run(url, headers, params, concurrency, concurrency)
+        statuses, timings, elapsed = run(url, headers, params, concurrency, options["requests"])
+        return {
+            "requests": len(timings),
+            "errors": sum(status_code >= 400 for status_code in statuses),
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+            "mean_ms": round(statistics.mean(timings), 3),
+            "throughput_rps": round(len(timings) / elapsed, 1),
+        }
+
+    @staticmethod
+    def run_sync(url, headers, params, concurrency, count):
+        """Status codes, latencies in ms and wall time of `count` requests from `concurrency` threads"""
+        local = threading.local()
+        extra = {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()}
+
+        def request(_):
+            if not hasattr(local, "client"):
+                local.client = Client()
+            started = time.perf_counter()
+            response = local.client.get(url, params(), **extra)
+            return response.status_code, (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(request, range(count)))
+        elapsed = time.perf_counter() - started
+        return [status_code for status_code, _ in results], [timing for _, timing in results], elapsed
+
+    @staticmethod
+    def run_async(url, headers, params, concurrency, count):
+        """Same as run_sync, with `concurrency` requests at once on one event loop"""
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request():
+            async with semaphore:
+                # What the ASGI handler does for each request, so sync code of different requests
+                # runs in different threads instead of all waiting for the main one
+                async with ThreadSensitiveContext():
+                    started = time.perf_counter()
+                    response = await client.get(url, params(), **headers)
+                    return response.status_code, (time.perf_counter() - started) * 1000
+
+        async def requests():
+            return await asyncio.gather(*(request() for _ in range(count)))
+
+        started = time.perf_counter()
+        results = asyncio.run(requests())
+        elapsed = time.perf_counter() - started
+        return [status_code for status_code, _ in results], [timing for _, timing in results], elapsed
+
+    def print_report(self, results):
+        self.stdout.write(
+            f"\n{'endpoint':<16}{'mode':<7}{'conc':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'errors':>8}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['endpoint']:<16}{result['mode']:<7}{result['concurrency']:>5}{result['p50_ms']:>9.2f}"
+                f"{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}{result['throughput_rps']:>9.1f}"
+                f"{result['errors']:>8}"
+            )
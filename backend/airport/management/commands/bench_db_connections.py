@@ -0,0 +1,136 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from airport.management.commands.bench_api import percentile
+from airport.models import Flight
+from airport_api_service.postgresql.pool import close_pools
+
+POOL_OPTIONS = {"max_size": 4, "max_lifetime": 1800, "idle_timeout": 300, "timeout": 10, "health_check": True}
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure how much of the request latency goes to setting up database connections.
+    Serves the same read-only request with new connections per request, with persistent connections
+    (CONN_MAX_AGE) and with the connection pool, each from a single thread and from a new thread per
+    request like under an ASGI server, and reports latency and the number of connections opened.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per strategy")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        alias = options["database"]
+        if connections[alias].vendor != "postgresql":
+            raise CommandError("Connection pooling is only implemented for PostgreSQL")
+        flight_id = Flight.objects.using(alias).order_by("id").values_list("id", flat=True).first()
+        if flight_id is None:
+            raise CommandError("No flights to benchmark, run the seed_airport command first")
+        url = reverse("airport:flight-seats", args=(flight_id,))
+
+        base_settings = connections[alias].settings_dict
+        base_options = {key: value for key, value in base_settings["OPTIONS"].items() if key != "pool"}
+        strategies = {
+            "new connection": {"ENGINE": "django.db.backends.postgresql", "CONN_MAX_AGE": 0},
+            "persistent": {"ENGINE": "django.db.backends.postgresql", "CONN_MAX_AGE": None},
+            "pooled": {
+                "ENGINE": "airport_api_service.postgresql",
+                "CONN_MAX_AGE": 0,
+                "OPTIONS": {**base_options, "pool": POOL_OPTIONS},
+            },
+        }
+
+        try:
+            setup_test_environment()
+            own_environment = True
+        except RuntimeError:
+            own_environment = False
+        results = []
+        try:
+            for name, strategy in strategies.items():
+                settings_dict = {**base_settings, "OPTIONS": base_options, **strategy}
+                for threading_mode in ("one thread", "thread per request"):
+                    result = self.run(alias, settings_dict, url, threading_mode, options["requests"])
+                    results.append({"strategy": name, "threads": threading_mode, **result})
+                    close_pools()
+        finally:
+            if own_environment:
+                teardown_test_environment()
+            connections[alias].close()
+
+        self.stdout.write(
+            f"\n{'strategy':<16}{'threads':<20}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}{'opened':>8}{'errors':>8}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['strategy']:<16}{result['threads']:<20}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                f"{result['mean_ms']:>9.2f}{result['connections_opened']:>8}{result['errors']:>8}"
+            )
+
+    def run(self, alias, settings_dict, url, threading_mode, requests):
+        backend = load_backend(settings_dict["ENGINE"])
+        opened = []
+        timings = []
+        errors = []
+
+        def count_connection(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        def request(client):
+            # Each thread gets its own connection object, as Django's connection handler would
+            if getattr(connections._connections, alias, None) is None:
+                connections[alias] = backend.DatabaseWrapper(dict(settings_dict), alias)
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+        def request_and_exit(client):
+            try:
+                request(client)
+            finally:
+                connections[alias].close()
+
+        def in_thread(client):
+            thread = threading.Thread(target=request_and_exit, args=(client,))
+            thread.start()
+            thread.join()
+
+        client = Client()
+        previous = getattr(connections._connections, alias, None)
+        connections[alias] = backend.DatabaseWrapper(dict(settings_dict), alias)
+        connection_created.connect(count_connection)
+        try:
+            run = request if threading_mode == "one thread" else in_thread
+            run(client)  # Warm up
+            opened.clear()
+            timings.clear()
+            errors.clear()
+            for _ in range(requests):
+                run(client)
+        finally:
+            connection_created.disconnect(count_connection)
+            connections[alias].close()
+            if previous is None:
+                del connections[alias]
+            else:
+                connections[alias] = previous
+
+        return {
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "mean_ms": round(statistics.mean(timings), 3),
+            "connections_opened": len(opened),
+            "errors": len(errors),
+        }
@@ -0,0 +1,141 @@
+import json
+import os
+import statistics
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from airport import renderers
+from airport.seeding import AirportSeeder
+
+# Name: (URL name, query parameters)
+ENDPOINTS = {
+    "flight list": ("airport:flight-list", {"page_size": 500}),
+    "airport list": ("airport:airport-list", {}),
+    "airplane list": ("airport:airplane-list", {}),
+    "route list": ("airport:route-list", {}),
+}
+# Mode: (settings.FAST_LISTS, orjson renderer)
+MODES = {
+    "serializers": (False, False),
+    "values": (True, False),
+    "values + orjson": (True, True),
+}
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare the list endpoints rendered by the serializers with the fast read path
+    (.values() rows, then orjson). Seeds a dataset inside a transaction that is rolled back, checks that
+    every mode returns the same bytes, then reports latency and throughput per endpoint and mode.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", type=int, default=100)
+        parser.add_argument("--airplanes", type=int, default=50)
+        parser.add_argument("--flights", type=int, default=1000)
+        parser.add_argument("--requests", type=int, default=50, help="Measured requests per endpoint and mode")
+        parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per endpoint and mode")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Save results as JSON to this path")
+
+    def handle(self, *args, **options):
+        try:
+            setup_test_environment()
+            own_environment = True
+        except RuntimeError:
+            # Already set up, e.g. when called from the test suite
+            own_environment = False
+        rates = {scope: "1000000/day" for scope in settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]}
+        try:
+            with tempfile.TemporaryDirectory() as directory, override_settings(
+                THROTTLE_DB_PATH=os.path.join(directory, "throttle.sqlite3"),
+                REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates},
+            ):
+                with transaction.atomic():
+                    self.stdout.write("Seeding benchmark data...")
+                    AirportSeeder(options["seed"]).seed(
+                        airports=options["airports"],
+                        airplanes=options["airplanes"],
+                        flights=options["flights"],
+                        crew=100,
+                        users=1,
+                        orders=0,
+                    )
+                    client = APIClient()
+                    client.force_authenticate(
+                        get_user_model().objects.create_user("bench-admin@airport.test", "benchpass", is_staff=True)
+                    )
+                    results = self.run(client, options)
+                    transaction.set_rollback(True)
+        finally:
+            if own_environment:
+                teardown_test_environment()
+            cache.clear()
+
+        self.print_report(results)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump({"orjson": renderers.orjson is not None, "endpoints": results}, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results saved to {options['output']}"))
+
+    @staticmethod
+    def request(client, url, params, mode):
+        fast_lists, use_orjson = MODES[mode]
+        with override_settings(FAST_LISTS=fast_lists), mock.patch.object(
+            renderers, "orjson", renderers.orjson if use_orjson else None
+        ):
+            # Every request misses the response cache
+            cache.clear()
+            started = time.perf_counter()
+            response = client.get(url, params)
+            elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise CommandError(f"{url} answered {response.status_code} in {mode} mode")
+        return response.content, elapsed
+
+    def run(self, client, options):
+        results = {}
+        for name, (url_name, params) in ENDPOINTS.items():
+            url = reverse(url_name)
+            contents = {mode: self.request(client, url, params, mode)[0] for mode in MODES}
+            different = [mode for mode, content in contents.items() if content != contents["serializers"]]
+            if different:
+                raise CommandError(f"{name}: {', '.join(different)} responses differ from the serializers")
+
+            results[name] = {"bytes": len(contents["serializers"])}
+            for mode in MODES:
+                for _ in range(options["warmup"]):
+                    self.request(client, url, params, mode)
+                timings = [self.request(client, url, params, mode)[1] for _ in range(options["requests"])]
+                results[name][mode] = {
+                    "p50_ms": round(statistics.median(timings), 3),
+                    "mean_ms": round(statistics.mean(timings), 3),
+                    "throughput_rps": round(1000 / statistics.mean(timings), 1),
+                }
+        return results
+
+    def print_report(self, results):
+        self.stdout.write(f"\n{'endpoint':<16}{'mode':<18}{'p50 ms':>9}{'req/s':>9}{'speedup':>9}")
+        for name, result in results.items():
+            baseline = result["serializers"]["mean_ms"]
+            for mode in MODES:
+                measured = result[mode]
+                self.stdout.write(
+                    f"{name:<16}{mode:<18}{measured['p50_ms']:>9.2f}{measured['throughput_rps']:>9.1f}"
+                    f"{baseline / measured['mean_ms']:>8.1f}x"
+                )
+            self.stdout.write(f"{'':<16}{result['bytes']} bytes per response")
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed, every mode renders with the json module"))
@@ -0,0 +1,107 @@
+import random
+import re
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from airport.models import Flight, Route
+from airport.seeding import AirportSeeder
+
+SEQUENTIAL_SCAN = {
+    "postgresql": re.compile(r"Seq Scan on airport_flight\b"),
+    "sqlite": re.compile(r"SCAN airport_flight\b(?! USING)"),
+}
+
+
+def uses_sequential_scan(plan: str) -> bool:
+    """Whether a query plan reads the whole flight table instead of an index"""
+    pattern = SEQUENTIAL_SCAN.get(connection.vendor)
+    return bool(pattern and pattern.search(plan))
+
+
+class Command(BaseCommand):
+    """Django command to benchmark flight search over synthetic flights and check its query plans"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flights", type=int, default=1_000_000)
+        parser.add_argument("--airports", type=int, default=300)
+        parser.add_argument("--routes", type=int, default=3000)
+        parser.add_argument("--searches", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--keep", action="store_true", help="Keep the synthetic data instead of rolling back")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        start = timezone.make_aware(datetime(timezone.now().year + 1, 1, 1))
+
+        with transaction.atomic():
+            routes = self.seed(rng, start, options)
+            with connection.cursor() as cursor:
+                for table in ("airport_route", "airport_flight"):
+                    cursor.execute(f"ANALYZE {table}")
+
+            scenarios = {
+                "route, one day": lambda: self.window(rng, start, hours=24, route=rng.choice(routes)),
+                "source, one week": lambda: self.window(rng, start, hours=24 * 7, route=rng.choice(routes)[:1]),
+                "all, two hours": lambda: self.window(rng, start, hours=2),
+            }
+            failed = False
+            for label, params in scenarios.items():
+                failed |= self.run(label, params, options["searches"])
+
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+        if failed:
+            self.stdout.write(self.style.ERROR("Some searches scan the whole flight table"))
+        else:
+            self.stdout.write(self.style.SUCCESS("All searches use indexes"))
+
+    def seed(self, rng, start, options):
+        self.stdout.write(f"Creating {options['flights']} flights...")
+        AirportSeeder(rng.randrange(2 ** 32)).seed(
+            airports=options["airports"],
+            routes=options["routes"],
+            airplanes=20,
+            crew=0,
+            flights=options["flights"],
+            users=0,
+            orders=0,
+            start=start,
+            days=365,
+        )
+        return list(Route.objects.values_list("source_id", "destination_id"))
+
+    @staticmethod
+    def window(rng, start, hours, route=()):
+        departure_from = start + timedelta(hours=rng.randrange(365 * 24 - hours))
+        params = {"departure_from": departure_from, "departure_to": departure_from + timedelta(hours=hours)}
+        params.update(zip(("source", "destination"), route))
+        return params
+
+    def run(self, label, params, searches):
+        """Print the plan of one search and the latency of many, return True if it scans the whole table"""
+        plan = self.queryset(params()).explain()
+        sequential = uses_sequential_scan(plan)
+
+        timings = []
+        for _ in range(searches):
+            queryset = self.queryset(params())
+            started = time.perf_counter()
+            list(queryset)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        self.stdout.write(f"\n{label}:\n{plan}")
+        self.stdout.write(
+            f"{'SEQUENTIAL SCAN' if sequential else 'index scan'}, "
+            f"p50 {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms over {searches} searches"
+        )
+        return sequential
+
+    @staticmethod
+    def queryset(params):
+        return Flight.objects.search(**params).order_by("departure_time", "id").values_list("id", flat=True)[:50]
@@ -0,0 +1,88 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from airport.models import Airport
+from airport.suggest import suggestions
+
+SYLLABLES = ("ka", "lo", "mar", "vi", "sen", "tor", "bel", "ra", "ny", "os", "lin", "gra", "do", "pe", "sun")
+
+
+class Command(BaseCommand):
+    """Django command to compare airport suggestions from the prefix index with ORM icontains lookups"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", type=int, default=0, help="Synthetic airports to add (rolled back)")
+        parser.add_argument("--queries", type=int, default=1000)
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        with transaction.atomic():
+            if options["airports"]:
+                Airport.objects.bulk_create(
+                    [
+                        Airport(
+                            name=f"{self.word(rng)} {self.word(rng)} International",
+                            closest_big_city=self.word(rng).title(),
+                        )
+                        for _ in range(options["airports"])
+                    ],
+                    batch_size=5000,
+                )
+
+            names = list(Airport.objects.values_list("name", flat=True))
+            if not names:
+                self.stdout.write(self.style.ERROR("No airports to search, use --airports"))
+                return
+            queries = [self.prefix(rng, rng.choice(names)) for _ in range(options["queries"])]
+
+            started = time.perf_counter()
+            suggestions.build()
+            self.stdout.write(f"Index of {len(names)} airports built in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+            index = self.measure(queries, lambda query: suggestions.lookup(query, options["limit"]))
+            orm = self.measure(
+                queries,
+                lambda query: list(
+                    Airport.objects.filter(Q(name__icontains=query) | Q(closest_big_city__icontains=query))[
+                        : options["limit"]
+                    ]
+                ),
+            )
+            transaction.set_rollback(True)
+        suggestions.invalidate()
+
+        self.report("prefix index", index)
+        self.report("ORM icontains", orm)
+        self.stdout.write(
+            self.style.SUCCESS(f"Prefix index is {statistics.median(orm) / statistics.median(index):.1f}x faster (p50)")
+        )
+
+    @staticmethod
+    def word(rng):
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+
+    @staticmethod
+    def prefix(rng, name):
+        word = rng.choice(name.split())
+        return word[: rng.randint(1, len(word))]
+
+    @staticmethod
+    def measure(queries, lookup):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            lookup(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def report(self, label, timings):
+        p50, p95 = statistics.quantiles(timings, n=100)[49], statistics.quantiles(timings, n=100)[94]
+        self.stdout.write(f"{label:>14}: p50 {p50:.3f} ms, p95 {p95:.3f} ms, mean {statistics.mean(timings):.3f} ms")
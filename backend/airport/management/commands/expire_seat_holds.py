@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from airport.models import SeatHold
+
+
+class Command(BaseCommand):
+    """Django command to delete expired seat holds in bulk, meant to be run periodically"""
+
+    def handle(self, *args, **kwargs):
+        deleted, _ = SeatHold.objects.expired().delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired seat holds!"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from airport import export
+
+
+class Command(BaseCommand):
+    """Django command to dump flights, tickets or orders to a CSV or NDJSON file, streamed in chunks"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=tuple(export.EXPORTS), help="What to export")
+        parser.add_argument("--format", choices=tuple(export.FORMATS), default="csv", help="Output format")
+        parser.add_argument("--gzip", action="store_true", help="Gzip-compress the file")
+        parser.add_argument(
+            "--since",
+            help="Rows dated at or after a date or datetime: departure of flights, order time of tickets and orders",
+        )
+        parser.add_argument("--until", help="Rows dated before a datetime, or on or before a date")
+        parser.add_argument("--output", help="Path of the file, by default <name>.<format>[.gz] in this directory")
+
+    def handle(self, *args, **options):
+        try:
+            since = export.parse_bound(options["since"]) if options["since"] else None
+            until = export.parse_bound(options["until"], end=True) if options["until"] else None
+        except ValueError as error:
+            raise CommandError(error)
+
+        name, output, compress = options["name"], options["format"], options["gzip"]
+        path = options["output"] or export.filename(name, output, compress)
+        size = 0
+        with open(path, "wb") as file:
+            for chunk in export.stream(name, output, compress, since=since, until=until):
+                file.write(chunk)
+                size += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Exported {name} to {path} ({size} bytes)!"))
@@ -0,0 +1,44 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.schedule_import import ScheduleImporter
+
+
+class Command(BaseCommand):
+    """Django command to create flights, and the routes they need, in bulk from a CSV or JSON schedule"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file with a header row, or JSON file with a list of flights")
+        parser.add_argument(
+            "--format", choices=("csv", "json"), help="Format of the file, by default from its extension"
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only validate the rows")
+        parser.add_argument("--batch-size", type=int, help="Rows validated and written at once")
+        parser.add_argument("--max-errors", type=int, default=20, help="Invalid rows to print")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or ("json" if path.endswith(".json") else "csv")
+
+        importer = ScheduleImporter(options["batch_size"])
+        try:
+            with open(path, newline="", encoding="utf-8") as file:
+                rows = json.load(file) if file_format == "json" else csv.DictReader(file)
+                if not isinstance(rows, (list, csv.DictReader)):
+                    raise CommandError(f"{path} should contain a list of flights")
+                report = importer.run(rows, options["dry_run"])
+        except (OSError, ValueError, csv.Error) as error:
+            raise CommandError(f"Could not read {path}: {error}")
+
+        if report["errors"]:
+            for error in report["errors"][: options["max_errors"]]:
+                self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+            raise CommandError(f"{len(report['errors'])} of {report['rows']} rows are invalid, nothing was imported")
+
+        created = f"{report['flights']} flights, {report['routes']} routes and {report['crew']} crew assignments"
+        if report["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"All {report['rows']} rows are valid, would create {created}!"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Created {created}!"))
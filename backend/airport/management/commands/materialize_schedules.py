@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airport.schedules import materialize
+
+
+class Command(BaseCommand):
+    """Django command to create the flights of recurring schedules for the coming days, meant to be run daily"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.SCHEDULE_HORIZON_DAYS,
+            help="Create the flights departing up to this many days from today",
+        )
+
+    def handle(self, *args, **options):
+        until = timezone.localdate() + timedelta(days=options["days"])
+        created = materialize(until)
+        self.stdout.write(self.style.SUCCESS(f"Created {created} scheduled flights up to {until}!"))
@@ -0,0 +1,32 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from airport import images
+from airport.models import Airplane
+
+
+class Command(BaseCommand):
+    """Django command to create the resized variants of airplane images, for images uploaded before them"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Also recreate the variants of processed images")
+
+    def handle(self, *args, **options):
+        airplanes = Airplane.objects.exclude(image="").exclude(image__isnull=True)
+        original_bytes = thumbnail_bytes = processed = 0
+        for airplane in airplanes.only("id", "image", "image_variants").iterator():
+            if options["force"] or airplane.image_variants.get("source") != airplane.image.name:
+                variants = images.process(airplane.pk)
+                processed += 1
+            else:
+                variants = airplane.image_variants["variants"]
+            if variants:
+                original_bytes += airplane.image.size
+                thumbnail_bytes += default_storage.size(variants["thumbnail"]["webp"])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} airplane images!"))
+        if thumbnail_bytes:
+            self.stdout.write(
+                f"A list page showing them all loads {thumbnail_bytes} bytes of WebP thumbnails "
+                f"instead of {original_bytes} bytes of originals ({original_bytes / thumbnail_bytes:.1f}x less)"
+            )
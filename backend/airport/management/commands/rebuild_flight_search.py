@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from airport import search_rows
+
+
+class Command(BaseCommand):
+    """Django command to rebuild the denormalized FlightSearchRow read model from the flights"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=search_rows.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding flight search rows...")
+        created = search_rows.rebuild(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} rows!"))
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.seeding import SEED_PASSWORD, AirportSeeder
+
+
+class Command(BaseCommand):
+    """
+    Django command to fill the database with realistic synthetic data for load testing.
+    The same --seed generates the same data. On PostgreSQL rows are loaded with COPY.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", type=int, default=100)
+        parser.add_argument("--routes", type=int, help="Default: ten per airport")
+        parser.add_argument("--airplanes", type=int, default=50)
+        parser.add_argument("--crew", type=int, default=500)
+        parser.add_argument("--flights", type=int, default=10000)
+        parser.add_argument("--crew-per-flight", type=int, default=3)
+        parser.add_argument("--days", type=int, default=365, help="Spread departures over this many days")
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--orders", type=int, default=10000)
+        parser.add_argument("--tickets-per-order", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument("--no-copy", action="store_true", help="Use bulk_create on PostgreSQL as well")
+
+    def handle(self, *args, **options):
+        seeder = AirportSeeder(
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            use_copy=False if options["no_copy"] else None,
+            log=self.stdout.write,
+        )
+        started = time.perf_counter()
+        try:
+            created = seeder.seed(
+                airports=options["airports"],
+                routes=options["routes"],
+                airplanes=options["airplanes"],
+                crew=options["crew"],
+                flights=options["flights"],
+                crew_per_flight=options["crew_per_flight"],
+                days=options["days"],
+                users=options["users"],
+                orders=options["orders"],
+                tickets_per_order=options["tickets_per_order"],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+        summary = ", ".join(f"{count} {name}" for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f"Created {summary} in {time.perf_counter() - started:.1f}s!"))
+        self.stdout.write(f"Seeded users log in with the password {SEED_PASSWORD!r}")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from airport.models import Flight
+
+
+class Command(BaseCommand):
+    """Django command to rebuild the denormalized Flight.seats_sold counters from tickets"""
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write("Rebuilding seats sold counters...")
+        updated = Flight.objects.sync_seats_sold()
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} flights!"))
@@ -1,22 +1,42 @@
 import time
 
-from django.core.management.base import BaseCommand
-from django.db import connections
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.utils import OperationalError
 
 
 class Command(BaseCommand):
-    """Django command to wait for the database to be available"""
+    """
+    Django command to wait for the database to be available.
+    Retries with exponentially growing delays, and fails once the timeout is exceeded.
+    """
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait before giving up")
+        parser.add_argument("--initial-delay", type=float, default=0.1, help="Seconds before the first retry")
+        parser.add_argument("--max-delay", type=float, default=5, help="Longest wait between two attempts")
+
+    def handle(self, *args, **options):
         self.stdout.write("Waiting for database...")
-        db_conn = None
-        while not db_conn:
+        connection = connections[options["database"]]
+        deadline = time.monotonic() + options["timeout"]
+        delay = options["initial_delay"]
+        attempt = 1
+        while True:
             try:
-                db_conn = connections["default"]
-                db_conn.cursor()
-            except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
+                connection.ensure_connection()
+                break
+            except OperationalError as error:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(f"Database unavailable after {attempt} attempts: {error}")
+                delay = min(delay, options["max_delay"], remaining)
+                self.stdout.write(f"Database unavailable, waiting {delay:.1f} seconds...")
+                time.sleep(delay)
+                delay *= 2
+                attempt += 1
+            finally:
+                connection.close()
 
         self.stdout.write(self.style.SUCCESS("Database available!"))
@@ -0,0 +1,337 @@
+import bisect
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from airport.response_cache import stats as response_cache_stats
+
+# Name -> (help, bucket upper bounds)
+HISTOGRAMS = {
+    "airport_http_request_duration_seconds": (
+        "Request latency",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    "airport_http_request_db_queries": (
+        "SQL queries per request",
+        (0, 1, 2, 3, 5, 10, 20, 50, 100),
+    ),
+    "airport_http_request_db_duration_seconds": (
+        "Time spent in SQL queries per request",
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+    ),
+    "airport_http_response_size_bytes": (
+        "Response body size, streaming responses excluded",
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    ),
+}
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+SNAPSHOT_PREFIX = "metrics-"
+# Sum of the snapshots of exited workers
+RETIRED_SNAPSHOT = f"{SNAPSHOT_PREFIX}retired.json"
+# Taken exclusively to fold snapshots into the retired one, shared to read them
+LOCK_FILE = f"{SNAPSHOT_PREFIX}lock"
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsRegistry:
+    """
+    Histograms of this worker process, keyed by metric name and labels.
+
+    Each series is a list of per-bucket counts (the last one for +Inf) followed by the sum of
+    observed values. With settings.METRICS_DIR set, every process periodically writes its series
+    to its own snapshot file there, and the exported metrics are the sum over all snapshot files,
+    so any worker answering /metrics reports the whole server. Snapshots of exited workers are
+    added to a single retired snapshot and removed, so counters never go backwards and files don't
+    pile up across worker restarts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._series: dict[tuple[str, tuple], list[float]] = {}
+        self._flushed_at = 0.0
+
+    def reset(self):
+        with self._lock:
+            self._pid = os.getpid()
+            self._series = {}
+            self._flushed_at = 0.0
+
+    def observe(self, name: str, labels: tuple[tuple[str, str], ...], value: float):
+        bounds = HISTOGRAMS[name][1]
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked after recording, the parent's series are not ours
+                self._pid = os.getpid()
+                self._series = {}
+            series = self._series.get((name, labels))
+            if series is None:
+                series = self._series[(name, labels)] = [0] * (len(bounds) + 2)
+            series[bisect.bisect_left(bounds, value)] += 1
+            series[-1] += value
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [
+                [name, [list(label) for label in labels], list(series)]
+                for (name, labels), series in self._series.items()
+            ]
+
+    @staticmethod
+    def _directory():
+        return Path(settings.METRICS_DIR) if settings.METRICS_DIR else None
+
+    @staticmethod
+    def _write(directory, name, snapshot):
+        with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False) as file:
+            json.dump(snapshot, file)
+        os.replace(file.name, directory / name)
+
+    @staticmethod
+    def _read(path) -> list:
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return []
+
+    @staticmethod
+    def _file_lock(directory, operation):
+        lock = open(directory / LOCK_FILE, "a")
+        fcntl.flock(lock, operation)
+        return lock
+
+    def flush(self):
+        """Write this process's snapshot file for other workers to merge, and retire those of exited workers"""
+        directory = self._directory()
+        if directory is None:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        self._write(directory, f"{SNAPSHOT_PREFIX}{os.getpid()}.json", self.snapshot())
+        self._flushed_at = time.monotonic()
+        self.prune()
+
+    @staticmethod
+    def _exited(path) -> bool:
+        pid = path.stem[len(SNAPSHOT_PREFIX):]
+        if not pid.isdigit():
+            return False
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    def prune(self):
+        """Add the snapshots of exited worker processes to the retired snapshot and remove them"""
+        directory = self._directory()
+        if directory is None or not any(map(self._exited, directory.glob(f"{SNAPSHOT_PREFIX}*.json"))):
+            return
+        with self._file_lock(directory, fcntl.LOCK_EX):
+            # Listed again, another worker may have retired them meanwhile
+            exited = [path for path in directory.glob(f"{SNAPSHOT_PREFIX}*.json") if self._exited(path)]
+            snapshots = [self._read(directory / RETIRED_SNAPSHOT), *map(self._read, exited)]
+            retired = [
+                [name, [list(label) for label in labels], series]
+                for (name, labels), series in merge(snapshots).items()
+            ]
+            self._write(directory, RETIRED_SNAPSHOT, retired)
+            for path in exited:
+                path.unlink(missing_ok=True)
+
+    def flush_if_due(self):
+        if time.monotonic() - self._flushed_at >= settings.METRICS_FLUSH_SECONDS:
+            self.flush()
+
+    def collect(self) -> dict[tuple[str, tuple], list[float]]:
+        """Series of all worker processes summed, with the live ones of this process"""
+        snapshots = [self.snapshot()]
+        directory = self._directory()
+        if directory is not None and directory.is_dir():
+            own = f"{SNAPSHOT_PREFIX}{os.getpid()}.json"
+            # Not while a snapshot is being retired, it would be counted twice
+            with self._file_lock(directory, fcntl.LOCK_SH):
+                for path in directory.glob(f"{SNAPSHOT_PREFIX}*.json"):
+                    if path.name != own:
+                        snapshots.append(self._read(path))
+        return merge(snapshots)
+
+
+def merge(snapshots) -> dict[tuple[str, tuple], list[float]]:
+    """Series of snapshots summed by metric name and labels"""
+    merged = {}
+    for snapshot in snapshots:
+        for name, labels, series in snapshot:
+            if name not in HISTOGRAMS or len(series) != len(HISTOGRAMS[name][1]) + 2:
+                continue
+            key = (name, tuple(tuple(label) for label in labels))
+            total = merged.setdefault(key, [0] * len(series))
+            for index, value in enumerate(series):
+                total[index] += value
+    return merged
+
+
+registry = MetricsRegistry()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    merged = registry.collect()
+    lines = []
+    for name, (description, bounds) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        for (series_name, labels), series in sorted(merged.items()):
+            if series_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip((*map(str, bounds), "+Inf"), series[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels((*labels, ('le', bound)))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {series[-1]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+    name = "airport_response_cache_requests_total"
+    lines += [f"# HELP {name} Public catalog response cache lookups", f"# TYPE {name} counter"]
+    cache_stats = response_cache_stats()
+    lines.append(f'{name}{{result="hit"}} {cache_stats["hits"]}')
+    lines.append(f'{name}{{result="miss"}} {cache_stats["misses"]}')
+    return "\n".join(lines) + "\n"
+
+
+def resolve_view(view_func, method: str) -> tuple[type, str]:
+    """View class and action (the handler method name outside of viewsets), or None and the function name"""
+    view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    if view_class is None:
+        return None, f"{view_func.__module__}.{view_func.__name__}"
+    method = method.lower()
+    return view_class, (getattr(view_func, "actions", None) or {}).get(method, method)
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and the time spent in them"""
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.queries += 1
+
+
+# Timer of the request being handled. A context variable rather than a wrapper installed per request,
+# because async views run their queries on connections of the threads sync_to_async() hands them to,
+# and those threads see the request's context.
+current_timer = ContextVar("current_timer", default=None)
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def instrument(connection, **kwargs):
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_timed_execute)
+
+
+connection_created.connect(instrument, dispatch_uid="airport-metrics")
+
+
+class MetricsMiddleware:
+    """
+    Records latency, SQL queries and time, and response size of every request, labeled by view.
+    With settings.QUERY_BUDGET_LOG, also logs requests running more queries than their viewset's
+    `query_budget` allows for the action. Works in both sync and async middleware chains.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        for connection in connections.all():
+            instrument(connection)
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        self.record(request, response, time.perf_counter() - started, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        self.record(request, response, time.perf_counter() - started, timer)
+        return response
+
+    @staticmethod
+    def record(request, response, duration, timer):
+        view, budget = "unmatched", None
+        if request.resolver_match is not None:
+            view_class, action = resolve_view(request.resolver_match.func, request.method)
+            view = action if view_class is None else f"{view_class.__name__}.{action}"
+            budget = getattr(view_class, "query_budget", {}).get(action)
+
+        labels = (
+            ("view", view),
+            ("method", request.method),
+            ("status", str(response.status_code)),
+        )
+        registry.observe("airport_http_request_duration_seconds", labels, duration)
+        registry.observe("airport_http_request_db_queries", labels, timer.queries)
+        registry.observe("airport_http_request_db_duration_seconds", labels, timer.duration)
+        if not response.streaming:
+            registry.observe("airport_http_response_size_bytes", labels, len(response.content))
+        registry.flush_if_due()
+
+        if settings.QUERY_BUDGET_LOG and budget is not None and timer.queries > budget:
+            logger.warning(
+                "%s %s ran %d queries, over its budget of %d",
+                view,
+                request.path,
+                timer.queries,
+                budget,
+            )
@@ -0,0 +1,52 @@
+# Generated by Django 4.1 on 2026-10-18 04:00
+
+import airport.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0005_flight_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlightSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekdays', models.PositiveSmallIntegerField(default=127)),
+                ('departure_time', models.TimeField()),
+                ('time_zone', models.CharField(default='UTC', max_length=64, validators=[airport.models.validate_time_zone])),
+                ('duration', models.DurationField()),
+                ('valid_from', models.DateField()),
+                ('valid_until', models.DateField(blank=True, null=True)),
+                ('materialized_until', models.DateField(blank=True, editable=False, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='flightschedule',
+            name='airplane',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='airport.airplane'),
+        ),
+        migrations.AddField(
+            model_name='flightschedule',
+            name='crew',
+            field=models.ManyToManyField(blank=True, related_name='schedules', to='airport.crew'),
+        ),
+        migrations.AddField(
+            model_name='flightschedule',
+            name='route',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='airport.route'),
+        ),
+        migrations.AddField(
+            model_name='flight',
+            name='schedule',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='flights', to='airport.flightschedule'),
+        ),
+        migrations.AddConstraint(
+            model_name='flight',
+            constraint=models.UniqueConstraint(fields=('schedule', 'departure_time'), name='flight_schedule_departure_unique'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1 on 2026-10-18 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0006_flight_schedules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='airplane',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.1 on 2026-10-18 04:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_search_rows(apps, schema_editor):
+    Flight = apps.get_model("airport", "Flight")
+    FlightSearchRow = apps.get_model("airport", "FlightSearchRow")
+    Type = apps.get_model("airport", "Type")
+    type_names = {}
+    for airplane_id, name in Type.objects.order_by("name").values_list("airplane", "name"):
+        if airplane_id is not None:
+            type_names.setdefault(airplane_id, []).append(name)
+
+    flights = Flight.objects.values_list(
+        "id", "route_id", "route__source_id", "route__source__name", "route__source__closest_big_city",
+        "route__destination_id", "route__destination__name", "route__destination__closest_big_city",
+        "departure_time", "arrival_time", "airplane_id", "airplane__name", "airplane__rows",
+        "airplane__seats_in_row",
+    )
+    FlightSearchRow.objects.bulk_create(
+        (
+            FlightSearchRow(
+                flight_id=flight_id,
+                route_id=route_id,
+                source_id=source_id,
+                source_name=source_name,
+                source_city=source_city,
+                destination_id=destination_id,
+                destination_name=destination_name,
+                destination_city=destination_city,
+                departure_time=departure_time,
+                arrival_time=arrival_time,
+                airplane_id=airplane_id,
+                airplane_name=airplane_name,
+                capacity=rows * seats_in_row,
+                type_names=type_names.get(airplane_id, []),
+            )
+            for (
+                flight_id, route_id, source_id, source_name, source_city, destination_id, destination_name,
+                destination_city, departure_time, arrival_time, airplane_id, airplane_name, rows, seats_in_row,
+            ) in flights.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0007_airplane_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlightSearchRow',
+            fields=[
+                ('flight', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_row', serialize=False, to='airport.flight')),
+                ('source_name', models.CharField(max_length=255)),
+                ('source_city', models.CharField(max_length=255)),
+                ('destination_name', models.CharField(max_length=255)),
+                ('destination_city', models.CharField(max_length=255)),
+                ('departure_time', models.DateTimeField()),
+                ('arrival_time', models.DateTimeField()),
+                ('airplane_name', models.CharField(max_length=255)),
+                ('capacity', models.PositiveIntegerField()),
+                ('type_names', models.JSONField(default=list)),
+                ('airplane', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='airport.airplane')),
+                ('destination', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='airport.airport')),
+                ('route', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='airport.route')),
+                ('source', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='airport.airport')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='flightsearchrow',
+            index=models.Index(fields=['source', 'destination', 'departure_time', 'flight'], name='flight_search_source_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='flightsearchrow',
+            index=models.Index(fields=['destination', 'departure_time', 'flight'], name='flight_search_destination_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='flightsearchrow',
+            index=models.Index(fields=['departure_time', 'flight'], name='flight_search_departure_idx'),
+        ),
+        migrations.RunPython(create_search_rows, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,14 @@
 import pathlib
 import uuid
+import zoneinfo
+from datetime import date, datetime, timedelta
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -16,13 +21,19 @@ class Airport(models.Model):
 
 
 class Route(models.Model):
-    source = models.ForeignKey(Airport, on_delete=models.CASCADE, related_name="departures")
+    # Indexed as the prefix of route_source_destination_idx
+    source = models.ForeignKey(Airport, on_delete=models.CASCADE, related_name="departures", db_index=False)
     destination = models.ForeignKey(Airport, on_delete=models.CASCADE, related_name="arrivals")
     distance = models.IntegerField()
 
     def __str__(self):
         return f"{self.source.name} -> {self.destination.name}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["source", "destination"], name="route_source_destination_idx"),
+        ]
+
 
 class Type(models.Model):
     name = models.CharField(max_length=255, unique=True)
@@ -42,6 +53,8 @@ class Airplane(models.Model):
     seats_in_row = models.IntegerField()
     types = models.ManyToManyField(Type, blank=True)
     image = models.ImageField(null=True, upload_to=airplane_image_path)
+    # Resized copies of `image` made by airport.images: {"source": image name, "variants": {...}}
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     @property
     def capacity(self):
@@ -59,16 +72,216 @@ class Crew(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
+def validate_time_zone(value):
+    if value not in zoneinfo.available_timezones():
+        raise ValidationError(f"Unknown time zone: {value}.")
+
+
+class FlightScheduleQuerySet(models.QuerySet):
+    def behind(self, until: date):
+        """Schedules starting by `until` whose flights are not created up to it, or up to their last day"""
+        valid_after = Q(valid_until__isnull=True) | Q(valid_until__gt=F("materialized_until"))
+        return self.filter(valid_from__lte=until).filter(
+            Q(materialized_until__isnull=True) | Q(materialized_until__lt=until) & valid_after
+        )
+
+
+class FlightSchedule(models.Model):
+    """
+    Flights of a route repeated on some weekdays at the same local time. The Flight rows are created
+    ahead of time by airport.schedules, `materialized_until` being the last day they were created for.
+    """
+
+    WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+    EVERY_DAY = 0b1111111
+
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="schedules")
+    airplane = models.ForeignKey(Airplane, on_delete=models.CASCADE, related_name="schedules")
+    crew = models.ManyToManyField(Crew, blank=True, related_name="schedules")
+    # Bit 0 for Monday to bit 6 for Sunday
+    weekdays = models.PositiveSmallIntegerField(default=EVERY_DAY)
+    departure_time = models.TimeField()
+    time_zone = models.CharField(max_length=64, default=settings.TIME_ZONE, validators=[validate_time_zone])
+    duration = models.DurationField()
+    valid_from = models.DateField()
+    valid_until = models.DateField(null=True, blank=True)
+    materialized_until = models.DateField(null=True, blank=True, editable=False)
+
+    objects = FlightScheduleQuerySet.as_manager()
+
+    def clean(self):
+        if not 0 < self.weekdays <= self.EVERY_DAY:
+            raise ValidationError("Fly on at least one weekday.")
+        if self.valid_until is not None and self.valid_until < self.valid_from:
+            raise ValidationError("The validity range ends before it starts.")
+
+    def departure_on(self, day: date) -> datetime:
+        return datetime.combine(day, self.departure_time, tzinfo=zoneinfo.ZoneInfo(self.time_zone))
+
+    def days(self, start: date, end: date):
+        """Days from `start` to `end` included on which the schedule flies"""
+        day = max(start, self.valid_from)
+        if self.valid_until is not None:
+            end = min(end, self.valid_until)
+        while day <= end:
+            if self.weekdays >> day.weekday() & 1:
+                yield day
+            day += timedelta(days=1)
+
+    def __str__(self):
+        days = ", ".join(name[:3].title() for bit, name in enumerate(self.WEEKDAYS) if self.weekdays >> bit & 1)
+        return f"{self.route} at {self.departure_time:%H:%M} ({self.time_zone}) on {days}"
+
+
+class FlightQuerySet(models.QuerySet):
+    def search(
+        self,
+        source=None,
+        destination=None,
+        departure_from=None,
+        departure_to=None,
+        airplane_type=None,
+    ):
+        """
+        Flights between airports departing in the half-open window [departure_from, departure_to).
+        Every condition is a plain comparison on an indexed column, so the search is served by the
+        Route(source, destination) and Flight(route, departure_time) indexes.
+        """
+        queryset = self
+        if source is not None:
+            queryset = queryset.filter(route__source_id=source)
+        if destination is not None:
+            queryset = queryset.filter(route__destination_id=destination)
+        if departure_from is not None:
+            queryset = queryset.filter(departure_time__gte=departure_from)
+        if departure_to is not None:
+            queryset = queryset.filter(departure_time__lt=departure_to)
+        if airplane_type is not None:
+            queryset = queryset.filter(airplane__types__id=airplane_type)
+        return queryset
+
+    def with_min_available(self, seats: int):
+        """Flights with at least `seats` unsold seats, computed from the seats_sold counter"""
+        return self.alias(
+            available=F("airplane__rows") * F("airplane__seats_in_row") - F("seats_sold")
+        ).filter(available__gte=seats)
+
+    def sync_seats_sold(self) -> int:
+        """Rebuild seats_sold counters from tickets with a single grouped UPDATE"""
+        sold = (
+            Ticket.objects.filter(flight=OuterRef("pk"))
+            .order_by()
+            .values("flight")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return self.update(seats_sold=Coalesce(Subquery(sold), 0))
+
+    def lock(self, flight_ids) -> list[int]:
+        """
+        Take row locks on the given flights for the rest of the transaction.
+        Locks are always acquired in primary key order, so concurrent orders spanning several flights can't deadlock.
+        """
+        return list(
+            self.select_for_update().filter(pk__in=flight_ids).order_by("pk").values_list("pk", flat=True)
+        )
+
+
 class Flight(models.Model):
-    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="flights")
+    # Indexed as the prefix of flight_route_departure_idx
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="flights", db_index=False)
     airplane = models.ForeignKey(Airplane, on_delete=models.CASCADE, related_name="flights")
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crew = models.ManyToManyField(Crew, related_name="flights")
+    seats_sold = models.PositiveIntegerField(default=0, editable=False)
+    schedule = models.ForeignKey(
+        FlightSchedule, null=True, blank=True, on_delete=models.SET_NULL, related_name="flights", db_index=False
+    )
+
+    objects = FlightQuerySet.as_manager()
+
+    @property
+    def tickets_available(self):
+        return self.airplane.capacity - self.seats_sold
 
     def __str__(self):
         return f"Flight on {self.route} at {self.departure_time}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["departure_time", "id"], name="flight_departure_id_idx"),
+            models.Index(fields=["route", "departure_time"], name="flight_route_departure_idx"),
+        ]
+        constraints = [
+            # One flight per scheduled departure, so creating them again is a no-op (indexes schedule too)
+            models.UniqueConstraint(fields=["schedule", "departure_time"], name="flight_schedule_departure_unique"),
+        ]
+
+
+class FlightSearchRowQuerySet(models.QuerySet):
+    def search(self, source=None, destination=None, departure_from=None, departure_to=None):
+        """
+        Rows of the flights between airports departing in the half-open window [departure_from, departure_to).
+        Any combination of conditions is a range scan of one index in (departure_time, flight) order.
+        """
+        queryset = self
+        if source is not None:
+            queryset = queryset.filter(source_id=source)
+        if destination is not None:
+            queryset = queryset.filter(destination_id=destination)
+        if departure_from is not None:
+            queryset = queryset.filter(departure_time__gte=departure_from)
+        if departure_to is not None:
+            queryset = queryset.filter(departure_time__lt=departure_to)
+        return queryset
+
+
+class FlightSearchRow(models.Model):
+    """
+    Flattened copy of a flight with its route's airports and its airplane, so flight searches read one
+    table without joins. Kept in sync by airport.search_rows, and deleted along with its flight.
+    """
+
+    flight = models.OneToOneField(Flight, primary_key=True, on_delete=models.CASCADE, related_name="search_row")
+    # Plain copies of the ids, rows follow their flight's deletion
+    route = models.ForeignKey(
+        Route, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name="+"
+    )
+    # Indexed as the prefix of flight_search_source_idx
+    source = models.ForeignKey(
+        Airport, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name="+"
+    )
+    source_name = models.CharField(max_length=255)
+    source_city = models.CharField(max_length=255)
+    # Indexed as the prefix of flight_search_destination_idx
+    destination = models.ForeignKey(
+        Airport, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name="+"
+    )
+    destination_name = models.CharField(max_length=255)
+    destination_city = models.CharField(max_length=255)
+    departure_time = models.DateTimeField()
+    arrival_time = models.DateTimeField()
+    airplane = models.ForeignKey(Airplane, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    airplane_name = models.CharField(max_length=255)
+    capacity = models.PositiveIntegerField()
+    # Names of the airplane's types, sorted
+    type_names = models.JSONField(default=list)
+
+    objects = FlightSearchRowQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.source_name} -> {self.destination_name} at {self.departure_time}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["source", "destination", "departure_time", "flight"], name="flight_search_source_idx"
+            ),
+            models.Index(fields=["destination", "departure_time", "flight"], name="flight_search_destination_idx"),
+            models.Index(fields=["departure_time", "flight"], name="flight_search_departure_idx"),
+        ]
+
 
 class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -77,6 +290,11 @@ class Order(models.Model):
     def __str__(self):
         return f"Order {self.id} by {self.user}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at", "id"], name="order_user_created_id_idx"),
+        ]
+
 
 class Ticket(models.Model):
     flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name="tickets")
@@ -93,3 +311,30 @@ class Ticket(models.Model):
 
     class Meta:
         unique_together = ("flight", "row", "seat")
+
+
+class SeatHoldQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+class SeatHold(models.Model):
+    """Temporary reservation of a seat, converted into a ticket when the holder places an order"""
+
+    flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name="holds")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="seat_holds")
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = SeatHoldQuerySet.as_manager()
+
+    def __str__(self):
+        return f"Hold for {self.flight} - Row: {self.row}, Seat: {self.seat} until {self.expires_at}"
+
+    class Meta:
+        unique_together = ("flight", "row", "seat")
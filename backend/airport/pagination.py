@@ -0,0 +1,54 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class OrderPagination(PageNumberPagination):
+    page_size = 10
+    max_page_size = 100
+
+
+class OrderCursorPagination(CursorPagination):
+    """Keyset pagination over (created_at, id), newest orders first"""
+
+    ordering = ("-created_at", "-id")
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class FlightCursorPagination(CursorPagination):
+    """Keyset pagination over (departure_time, id), earliest flights first"""
+
+    ordering = ("departure_time", "id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class FlightSearchCursorPagination(FlightCursorPagination):
+    """Keyset pagination of FlightSearchRow over (departure_time, flight), earliest flights first"""
+
+    ordering = ("departure_time", "flight_id")
+
+
+class LegacyPaginationMixin:
+    """
+    Use `legacy_pagination_class` instead of `pagination_class` when the client
+    asks for page numbers (ex. ?page=2 or ?pagination=page).
+    """
+
+    legacy_pagination_class = None
+
+    def uses_legacy_pagination(self):
+        params = self.request.query_params
+        return "page" in params or params.get("pagination") == "page"
+
+    @property
+    def paginator(self):
+        if (
+            not hasattr(self, "_paginator")
+            and self.legacy_pagination_class is not None
+            and self.request is not None
+            and self.uses_legacy_pagination()
+        ):
+            self._paginator = self.legacy_pagination_class()
+        return super().paginator
@@ -0,0 +1,127 @@
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.response import Response
+
+KEY_PREFIX = "airport:response"
+STATS_KEYS = {"hits": f"{KEY_PREFIX}:hits", "misses": f"{KEY_PREFIX}:misses"}
+
+
+def _generation_key(namespace):
+    return f"{KEY_PREFIX}:generation:{namespace}"
+
+
+def generations(namespaces) -> dict[str, int]:
+    """
+    Current generation of each namespace, in nanoseconds since the epoch.
+    A namespace missing from the cache (never used or evicted) starts a new generation.
+    """
+    keys = {_generation_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return {keys[key]: value for key, value in found.items()}
+
+
+async def agenerations(namespaces) -> dict[str, int]:
+    keys = {_generation_key(namespace): namespace for namespace in namespaces}
+    found = await cache.aget_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        await cache.aset_many(missing, None)
+        found.update(missing)
+    return {keys[key]: value for key, value in found.items()}
+
+
+def invalidate(*namespaces):
+    """
+    Start a new generation for the namespaces, now and once the current transaction commits,
+    so responses cached from uncommitted or pre-commit data are dropped either way.
+    """
+    def bump():
+        cache.set_many({_generation_key(namespace): time.time_ns() for namespace in namespaces}, None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def count(outcome):
+    key = STATS_KEYS[outcome]
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+async def acount(outcome):
+    key = STATS_KEYS[outcome]
+    await cache.aadd(key, 0, None)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, None)
+
+
+def stats() -> dict[str, int]:
+    values = cache.get_many(STATS_KEYS.values())
+    return {outcome: values.get(key, 0) for outcome, key in STATS_KEYS.items()}
+
+
+def cache_entry(request, current: dict[str, int]) -> tuple[str, int, str]:
+    """ETag, Last-Modified timestamp and cache key of a request for the current namespace generations"""
+    query = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    fingerprint = repr((request.get_host(), request.path, query, sorted(current.items())))
+    digest = hashlib.sha1(fingerprint.encode()).hexdigest()
+    return f'"{digest}"', max(current.values()) // 10 ** 9, f"{KEY_PREFIX}:{digest}"
+
+
+def cache_response(*namespaces):
+    """
+    Cache successful responses of a read-only viewset action by host, path and normalized query parameters.
+
+    Entries are tagged with the generations of `namespaces` and become unreachable when any of them is
+    invalidated (see airport.signals). Responses carry an ETag and Last-Modified derived from the
+    generations, so conditional requests are answered with 304 without touching the cached entry.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            etag, last_modified, key = cache_entry(request, generations(namespaces))
+
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                count("hits")
+                not_modified["ETag"] = etag
+                return not_modified
+
+            data = cache.get(key)
+            if data is None:
+                count("misses")
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+                response["X-Cache"] = "MISS"
+            else:
+                count("hits")
+                response = Response(data)
+                response["X-Cache"] = "HIT"
+
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            return response
+
+        return wrapper
+
+    return decorator
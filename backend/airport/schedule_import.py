@@ -0,0 +1,256 @@
+"""
+Bulk import of flight schedules, for seasonal timetables of tens of thousands of flights.
+
+Each row is a flight on an existing `route`, or between `source` and `destination` airports whose
+route is created with the row's `distance` if there is none yet, flown by an `airplane` from
+`departure_time` to `arrival_time` with an optional list of `crew` member ids.
+
+Rows are validated a batch at a time with one query per referenced model, and each valid batch is
+written right away by a RowWriter: flights and their crew through rows in bulk, instead of an
+INSERT per flight and per crew member. The import is all or nothing: once a row is invalid nothing
+more is written, the whole transaction is rolled back and the errors of every row are reported.
+"""
+import re
+from datetime import datetime
+from typing import Iterable, NamedTuple, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from airport import search_rows
+from airport.models import Airplane, Airport, Crew, Flight, Route
+from airport.seeding import RowWriter, invalidate_derived_data
+
+COLUMNS = ("route", "source", "destination", "distance", "airplane", "departure_time", "arrival_time", "crew")
+# Crew member ids in a CSV cell, ex. "3;7;12"
+CREW_SEPARATOR = re.compile(r"[\s;,]+")
+
+
+class ScheduleRow(NamedTuple):
+    number: int
+    route_id: Optional[int]
+    source_id: Optional[int]
+    destination_id: Optional[int]
+    distance: Optional[int]
+    airplane_id: int
+    departure_time: datetime
+    arrival_time: datetime
+    crew_ids: tuple[int, ...]
+
+
+def _id(value, field, errors, required=True):
+    if value is None or value == "":
+        if required:
+            errors[field] = ["This field is required."]
+        return None
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return value
+    if isinstance(value, str) and value.strip().isdigit() and int(value) > 0:
+        return int(value)
+    errors[field] = ["A positive integer is required."]
+    return None
+
+
+def _datetime(value, field, errors):
+    if not value:
+        errors[field] = ["This field is required."]
+        return None
+    try:
+        moment = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:
+        # Well formed but impossible, ex. 2027-02-30T10:00
+        moment = None
+    if moment is None:
+        errors[field] = ["Expected an ISO 8601 datetime."]
+        return None
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def _crew(value, errors):
+    if value is None or value == "":
+        return ()
+    values = CREW_SEPARATOR.split(value.strip()) if isinstance(value, str) else value
+    if not isinstance(values, (list, tuple)):
+        errors["crew"] = ["Expected a list of crew member ids."]
+        return ()
+    ids = []
+    for item in values:
+        crew_id = _id(item, "crew", errors)
+        if crew_id is None:
+            return ()
+        ids.append(crew_id)
+    return tuple(dict.fromkeys(ids))
+
+
+def parse_row(number: int, data) -> tuple[Optional[ScheduleRow], dict]:
+    """Row with its fields converted, and the errors of the fields that could not be, without queries"""
+    if not isinstance(data, dict):
+        return None, {"non_field_errors": ["Expected an object."]}
+
+    errors = {}
+    route_id = _id(data.get("route"), "route", errors, required=False)
+    source_id = destination_id = distance = None
+    if route_id is None and "route" not in errors:
+        source_id = _id(data.get("source"), "source", errors)
+        destination_id = _id(data.get("destination"), "destination", errors)
+        distance = _id(data.get("distance"), "distance", errors, required=False)
+        if source_id is not None and source_id == destination_id:
+            errors["destination"] = ["Must differ from the source airport."]
+    airplane_id = _id(data.get("airplane"), "airplane", errors)
+    departure_time = _datetime(data.get("departure_time"), "departure_time", errors)
+    arrival_time = _datetime(data.get("arrival_time"), "arrival_time", errors)
+    if departure_time and arrival_time and departure_time >= arrival_time:
+        errors["arrival_time"] = ["Must be after the departure time."]
+    crew_ids = _crew(data.get("crew"), errors)
+
+    if errors:
+        return None, errors
+    return (
+        ScheduleRow(
+            number, route_id, source_id, destination_id, distance, airplane_id, departure_time, arrival_time, crew_ids
+        ),
+        errors,
+    )
+
+
+class ScheduleImporter:
+    """Validates and writes schedule rows in batches of `batch_size` (settings.SCHEDULE_IMPORT_BATCH_SIZE)"""
+
+    def __init__(self, batch_size: int = None, use_copy: bool = None):
+        self.batch_size = batch_size or settings.SCHEDULE_IMPORT_BATCH_SIZE
+        self.writer = RowWriter(self.batch_size, use_copy)
+        # Route id of each (source, destination) pair met so far, including the routes of this import
+        self.route_ids: dict[tuple[int, int], int] = {}
+
+    def run(self, rows: Iterable, dry_run: bool = False) -> dict:
+        """
+        Import `rows`, dicts with the COLUMNS as keys, numbered from 1 in the error report.
+        With `dry_run`, only validate them.
+        """
+        report = {"dry_run": dry_run, "rows": 0, "flights": 0, "routes": 0, "crew": 0, "errors": []}
+        with transaction.atomic():
+            batch = []
+            for number, data in enumerate(rows, 1):
+                batch.append((number, data))
+                if len(batch) == self.batch_size:
+                    self._process(batch, report)
+                    batch = []
+            if batch:
+                self._process(batch, report)
+
+            if report["errors"] or dry_run:
+                transaction.set_rollback(True)
+            else:
+                invalidate_derived_data()
+
+        if report["errors"]:
+            report["errors"].sort(key=lambda error: error["row"])
+            report["flights"] = report["routes"] = report["crew"] = 0
+        return report
+
+    def _process(self, batch, report):
+        report["rows"] += len(batch)
+        parsed = []
+        for number, data in batch:
+            row, errors = parse_row(number, data)
+            if errors:
+                report["errors"].append({"row": number, "errors": errors})
+            else:
+                parsed.append(row)
+
+        valid, new_routes = self._validate(parsed, report["errors"])
+        report["flights"] += len(valid)
+        report["routes"] += len(new_routes)
+        report["crew"] += sum(len(row.crew_ids) for row in valid)
+        if report["errors"] or report["dry_run"]:
+            # Nothing is written, but the rows of later batches must not plan these routes again
+            self.route_ids.update(dict.fromkeys(new_routes))
+        else:
+            self._write(valid, new_routes)
+
+    def _validate(self, rows: list[ScheduleRow], errors: list) -> tuple[list[ScheduleRow], dict]:
+        """
+        Rows whose airplane, route or airports and crew exist, and the routes to create for them
+        as {(source, destination): distance}, with one query per model for the whole batch.
+        """
+        airplane_ids = set(
+            Airplane.objects.filter(pk__in={row.airplane_id for row in rows}).values_list("pk", flat=True)
+        )
+        route_ids = set(
+            Route.objects.filter(pk__in={row.route_id for row in rows if row.route_id}).values_list("pk", flat=True)
+        )
+        crew_ids = set(
+            Crew.objects.filter(pk__in={crew_id for row in rows for crew_id in row.crew_ids}).values_list(
+                "pk", flat=True
+            )
+        )
+        pairs = {(row.source_id, row.destination_id) for row in rows if row.route_id is None}
+        pairs -= self.route_ids.keys()
+        airport_ids = set()
+        if pairs:
+            airport_ids = set(
+                Airport.objects.filter(pk__in={airport_id for pair in pairs for airport_id in pair}).values_list(
+                    "pk", flat=True
+                )
+            )
+            existing = Route.objects.filter(
+                source_id__in={source for source, _ in pairs},
+                destination_id__in={destination for _, destination in pairs},
+            ).values_list("source_id", "destination_id", "pk")
+            for source, destination, route_id in existing:
+                self.route_ids.setdefault((source, destination), route_id)
+
+        valid, new_routes = [], {}
+        for row in rows:
+            row_errors = {}
+            if row.airplane_id not in airplane_ids:
+                row_errors["airplane"] = [f"Airplane {row.airplane_id} does not exist."]
+            if row.route_id is not None and row.route_id not in route_ids:
+                row_errors["route"] = [f"Route {row.route_id} does not exist."]
+            missing_crew = [crew_id for crew_id in row.crew_ids if crew_id not in crew_ids]
+            if missing_crew:
+                row_errors["crew"] = [f"Crew member {crew_id} does not exist." for crew_id in missing_crew]
+
+            pair = (row.source_id, row.destination_id)
+            if row.route_id is None and pair not in self.route_ids and pair not in new_routes:
+                for field, airport_id in zip(("source", "destination"), pair):
+                    if airport_id not in airport_ids:
+                        row_errors[field] = [f"Airport {airport_id} does not exist."]
+                if row.distance is None:
+                    row_errors["distance"] = ["Required to create the route between these airports."]
+                elif not row_errors:
+                    new_routes[pair] = row.distance
+
+            if row_errors:
+                errors.append({"row": row.number, "errors": row_errors})
+            else:
+                valid.append(row)
+        return valid, new_routes
+
+    def _write(self, rows: list[ScheduleRow], new_routes: dict):
+        route_ids = self.writer.create(
+            Route,
+            ("source_id", "destination_id", "distance"),
+            [(*pair, distance) for pair, distance in new_routes.items()],
+        )
+        self.route_ids.update(zip(new_routes, route_ids))
+
+        flight_ids = self.writer.create(
+            Flight,
+            ("route_id", "airplane_id", "departure_time", "arrival_time", "seats_sold"),
+            [
+                (
+                    row.route_id or self.route_ids[(row.source_id, row.destination_id)],
+                    row.airplane_id,
+                    row.departure_time,
+                    row.arrival_time,
+                    0,
+                )
+                for row in rows
+            ],
+        )
+        crew = [(flight_id, crew_id) for flight_id, row in zip(flight_ids, rows) for crew_id in row.crew_ids]
+        self.writer.write(Flight.crew.through, ("flight_id", "crew_id"), crew)
+        search_rows.sync_flights(flight_ids)
@@ -0,0 +1,103 @@
+"""
+Creation of the Flight rows of recurring FlightSchedules.
+
+Flights are created for a rolling horizon of settings.SCHEDULE_HORIZON_DAYS by the
+materialize_schedules command, meant to run daily, and on demand by flight searches for later
+dates. Each schedule keeps the last day its flights were created for in `materialized_until`, so a
+run only creates the missing days, and a flight's (schedule, departure_time) is unique, so runs
+racing over the same days can't create a flight twice.
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from airport import search_rows
+from airport.models import Flight, FlightSchedule
+from airport.response_cache import invalidate
+from airport.timetable import timetable
+
+# Day up to which the flights of every schedule are known to exist, for SCHEDULE_HORIZON_CACHE_TIMEOUT
+# seconds, so new schedules are noticed in time by processes whose cache reset_horizon() can't reach
+HORIZON_CACHE_KEY = "airport:schedules:horizon"
+
+
+def reset_horizon():
+    """Forget the materialized horizon, now and once the current transaction commits, when schedules change"""
+    cache.delete(HORIZON_CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(HORIZON_CACHE_KEY))
+
+
+def materialize(until: date = None, today: date = None) -> int:
+    """
+    Create the missing flights of every schedule from `today` up to `until` included, by default
+    SCHEDULE_HORIZON_DAYS ahead, and return their number. Days before `today` are never created.
+    """
+    today = today or timezone.localdate()
+    until = until or today + timedelta(days=settings.SCHEDULE_HORIZON_DAYS)
+
+    flight_ids = []
+    for schedule_id in FlightSchedule.objects.behind(until).values_list("pk", flat=True):
+        flight_ids += materialize_schedule(schedule_id, today, until)
+
+    if flight_ids:
+        # Bulk inserts send no model signals
+        invalidate("flights")
+        transaction.on_commit(lambda: timetable.flights_changed(flight_ids))
+    if until > (cache.get(HORIZON_CACHE_KEY) or date.min):
+        cache.set(HORIZON_CACHE_KEY, until, settings.SCHEDULE_HORIZON_CACHE_TIMEOUT)
+    return len(flight_ids)
+
+
+def materialize_schedule(schedule_id: int, today: date, until: date) -> list[int]:
+    """Create the missing flights of one schedule up to `until` and return their ids"""
+    with transaction.atomic():
+        schedule = FlightSchedule.objects.select_for_update().get(pk=schedule_id)
+        start = today
+        if schedule.materialized_until is not None:
+            start = max(start, schedule.materialized_until + timedelta(days=1))
+
+        departures = [schedule.departure_on(day) for day in schedule.days(start, until)]
+        existing = set(
+            schedule.flights.filter(departure_time__in=departures).values_list("departure_time", flat=True)
+        )
+        flights = Flight.objects.bulk_create(
+            [
+                Flight(
+                    route_id=schedule.route_id,
+                    airplane_id=schedule.airplane_id,
+                    schedule=schedule,
+                    departure_time=departure,
+                    arrival_time=departure + schedule.duration,
+                )
+                for departure in departures
+                if departure not in existing
+            ],
+            batch_size=1000,
+        )
+        crew_ids = list(schedule.crew.values_list("pk", flat=True))
+        Flight.crew.through.objects.bulk_create(
+            [Flight.crew.through(flight_id=flight.pk, crew_id=crew_id) for flight in flights for crew_id in crew_ids],
+            batch_size=1000,
+        )
+        search_rows.sync_flights([flight.pk for flight in flights])
+
+        materialized_until = until if schedule.valid_until is None else min(until, schedule.valid_until)
+        if schedule.materialized_until is None or materialized_until > schedule.materialized_until:
+            FlightSchedule.objects.filter(pk=schedule_id).update(materialized_until=materialized_until)
+    return [flight.pk for flight in flights]
+
+
+def ensure_materialized(until: date) -> int:
+    """
+    Create the scheduled flights up to `until` for a search, if some may be missing, at most
+    SCHEDULE_MAX_DAYS ahead. Costs a cache read once every schedule is materialized up to it, and
+    one query for the schedules behind it when the cached horizon has expired.
+    """
+    until = min(until, timezone.localdate() + timedelta(days=settings.SCHEDULE_MAX_DAYS))
+    horizon = cache.get(HORIZON_CACHE_KEY)
+    if horizon is not None and until <= horizon:
+        return 0
+    return materialize(until)
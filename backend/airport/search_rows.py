@@ -0,0 +1,124 @@
+"""
+Maintenance of FlightSearchRow, the flattened read model of flight searches.
+
+Rows are written in the transaction of the change they follow: model signals (see airport.signals)
+sync the rows of the flights, airports and airplanes that are saved, and the bulk writers, which send
+no signals, sync the flights they create. Deleting a flight deletes its row. The
+rebuild_flight_search command recreates every row.
+"""
+from itertools import islice
+
+from django.db import transaction
+
+from airport.models import Airplane, Flight, FlightSearchRow, Type
+
+BATCH_SIZE = 1000
+
+# Flight columns of a row, in FlightSearchRow field order
+COLUMNS = (
+    "id",
+    "route_id",
+    "route__source_id",
+    "route__source__name",
+    "route__source__closest_big_city",
+    "route__destination_id",
+    "route__destination__name",
+    "route__destination__closest_big_city",
+    "departure_time",
+    "arrival_time",
+    "airplane_id",
+    "airplane__name",
+    "airplane__rows",
+    "airplane__seats_in_row",
+)
+
+
+def _batches(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _type_names(airplane_ids) -> dict[int, list[str]]:
+    """Sorted type names of each airplane"""
+    names = {airplane_id: [] for airplane_id in airplane_ids}
+    types = Type.objects.filter(airplane__in=names).order_by("name").values_list("airplane", "name")
+    for airplane_id, name in types:
+        names[airplane_id].append(name)
+    return names
+
+
+def _rows(flights) -> list[FlightSearchRow]:
+    """Rows of the flights of a queryset, built with two queries"""
+    values = list(flights.values_list(*COLUMNS))
+    type_names = _type_names({value[10] for value in values}) if values else {}
+    return [
+        FlightSearchRow(
+            flight_id=flight_id,
+            route_id=route_id,
+            source_id=source_id,
+            source_name=source_name,
+            source_city=source_city,
+            destination_id=destination_id,
+            destination_name=destination_name,
+            destination_city=destination_city,
+            departure_time=departure_time,
+            arrival_time=arrival_time,
+            airplane_id=airplane_id,
+            airplane_name=airplane_name,
+            capacity=rows * seats_in_row,
+            type_names=type_names[airplane_id],
+        )
+        for (
+            flight_id, route_id, source_id, source_name, source_city, destination_id, destination_name,
+            destination_city, departure_time, arrival_time, airplane_id, airplane_name, rows, seats_in_row,
+        ) in values
+    ]
+
+
+def sync(flights) -> int:
+    """Recreate the rows of the flights of a queryset and return their number"""
+    with transaction.atomic():
+        FlightSearchRow.objects.filter(flight__in=flights.values("pk")).delete()
+        return len(FlightSearchRow.objects.bulk_create(_rows(flights)))
+
+
+def sync_flights(flight_ids) -> int:
+    """Recreate the rows of the given flights, BATCH_SIZE at a time"""
+    return sum(sync(Flight.objects.filter(pk__in=batch)) for batch in _batches(flight_ids, BATCH_SIZE))
+
+
+def sync_airport(airport) -> int:
+    """Copy an airport's name and city to the rows of the flights from and to it"""
+    updated = FlightSearchRow.objects.filter(source=airport.pk).update(
+        source_name=airport.name, source_city=airport.closest_big_city
+    )
+    return updated + FlightSearchRow.objects.filter(destination=airport.pk).update(
+        destination_name=airport.name, destination_city=airport.closest_big_city
+    )
+
+
+def sync_airplanes(airplane_ids) -> int:
+    """Copy the name, capacity and type names of airplanes to the rows of their flights"""
+    airplane_ids = set(airplane_ids)
+    if not airplane_ids:
+        return 0
+    type_names = _type_names(airplane_ids)
+    updated = 0
+    airplanes = Airplane.objects.filter(pk__in=airplane_ids).values_list("pk", "name", "rows", "seats_in_row")
+    for airplane_id, name, rows, seats_in_row in airplanes:
+        updated += FlightSearchRow.objects.filter(airplane=airplane_id).update(
+            airplane_name=name, capacity=rows * seats_in_row, type_names=type_names[airplane_id]
+        )
+    return updated
+
+
+def rebuild(batch_size: int = BATCH_SIZE) -> int:
+    """Recreate every row from the flights, `batch_size` flights at a time, and return their number"""
+    created = 0
+    with transaction.atomic():
+        FlightSearchRow.objects.all().delete()
+        flight_ids = list(Flight.objects.order_by("pk").values_list("pk", flat=True))
+        for batch in _batches(flight_ids, batch_size):
+            created += len(FlightSearchRow.objects.bulk_create(_rows(Flight.objects.filter(pk__in=batch))))
+    return created
@@ -0,0 +1,77 @@
+import base64
+from typing import Iterable
+
+ENCODINGS = ("base64", "rle", "json")
+
+
+class SeatMap:
+    """
+    Occupancy bitmap of an airplane cabin.
+
+    Seats are numbered row-major starting from 1, bit ``(row - 1) * seats_in_row + (seat - 1)``
+    is set when the seat is taken. The most significant bit of the first byte is seat 1 of row 1.
+    """
+
+    def __init__(self, rows: int, seats_in_row: int, taken: Iterable[tuple[int, int]] = ()):
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        self.bits = bytearray((rows * seats_in_row + 7) // 8)
+        self.taken = 0
+        for row, seat in taken:
+            self.mark(row, seat)
+
+    def _index(self, row: int, seat: int) -> int:
+        return (row - 1) * self.seats_in_row + (seat - 1)
+
+    def mark(self, row: int, seat: int) -> None:
+        if not (1 <= row <= self.rows and 1 <= seat <= self.seats_in_row):
+            return
+        index = self._index(row, seat)
+        mask = 0x80 >> (index % 8)
+        if not self.bits[index // 8] & mask:
+            self.bits[index // 8] |= mask
+            self.taken += 1
+
+    def is_taken(self, row: int, seat: int) -> bool:
+        index = self._index(row, seat)
+        return bool(self.bits[index // 8] & (0x80 >> (index % 8)))
+
+    def to_base64(self) -> str:
+        return base64.b64encode(bytes(self.bits)).decode("ascii")
+
+    def to_rle(self) -> list[int]:
+        """Alternating run lengths of free and taken seats, always starting with a free run"""
+        runs = []
+        current, length = False, 0
+        for index in range(self.rows * self.seats_in_row):
+            taken = bool(self.bits[index // 8] & (0x80 >> (index % 8)))
+            if taken != current:
+                runs.append(length)
+                current, length = taken, 0
+            length += 1
+        runs.append(length)
+        return runs
+
+    def to_json(self) -> list[list[bool]]:
+        return [
+            [self.is_taken(row, seat) for seat in range(1, self.seats_in_row + 1)]
+            for row in range(1, self.rows + 1)
+        ]
+
+    def encode(self, encoding: str = "base64"):
+        if encoding == "rle":
+            return self.to_rle()
+        if encoding == "json":
+            return self.to_json()
+        return self.to_base64()
+
+    def payload(self, flight_id: int, encoding: str = "base64") -> dict:
+        """Body of the flight seats endpoints"""
+        return {
+            "flight": flight_id,
+            "rows": self.rows,
+            "seats_in_row": self.seats_in_row,
+            "taken": self.taken,
+            "encoding": encoding,
+            "seats": self.encode(encoding),
+        }
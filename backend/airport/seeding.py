@@ -0,0 +1,347 @@
+import csv
+import io
+import math
+import random
+from array import array
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Max, Model
+from django.utils import timezone
+
+from airport import search_rows
+from airport.models import Airplane, Airport, Crew, Flight, FlightSearchRow, Order, Route, Ticket, Type
+from airport.response_cache import invalidate
+from airport.suggest import suggestions
+from airport.timetable import timetable
+
+SEED_EMAIL_DOMAIN = "seed.airport.test"
+SEED_PASSWORD = "seedpassword"
+CRUISE_SPEED_KM_H = 800
+EARTH_RADIUS_KM = 6371
+
+# Name, rows, seats in row, types
+AIRPLANE_MODELS = (
+    ("Airbus A320", 30, 6, ("Narrow-body",)),
+    ("Boeing 737-800", 32, 6, ("Narrow-body",)),
+    ("Boeing 777-300ER", 42, 10, ("Wide-body", "Long-haul")),
+    ("Airbus A350-900", 36, 9, ("Wide-body", "Long-haul")),
+    ("Embraer E190", 25, 4, ("Regional",)),
+    ("ATR 72", 18, 4, ("Regional", "Turboprop")),
+)
+CITY_SYLLABLES = ("ba", "lo", "ri", "ka", "to", "mar", "sen", "vi", "dor", "an", "el", "gra", "nov", "pol", "sa")
+AIRPORT_KINDS = ("International", "Regional", "Municipal", "Central", "Airfield")
+FIRST_NAMES = ("Olena", "Taras", "Anna", "James", "Maria", "Lukas", "Sofia", "Noah", "Emma", "Ivan", "Chen", "Amara")
+LAST_NAMES = ("Shevchenko", "Smith", "Kowalski", "Garcia", "Müller", "Rossi", "Tanaka", "Okafor", "Novak", "Dubois")
+
+
+class RowWriter:
+    """
+    Inserts rows given as tuples of column values in batches: with bulk_create, or on PostgreSQL
+    with COPY FROM STDIN, which skips building model instances and the per-statement overhead.
+    """
+
+    def __init__(self, batch_size: int = 10000, use_copy: bool = None):
+        self.batch_size = batch_size
+        self.use_copy = connection.vendor == "postgresql" if use_copy is None else use_copy
+
+    @staticmethod
+    def reserve_ids(model: type[Model], count: int) -> list[int]:
+        """
+        Primary keys for `count` rows inserted next, so related rows can reference them before
+        they are written. On PostgreSQL they are drawn from the sequence, so concurrent inserts can't
+        take them, elsewhere they follow the current maximum, which assumes nothing else inserts into
+        the table meanwhile: only for offline loads like seeding, see create() otherwise.
+        """
+        if not count:
+            return []
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                    [model._meta.db_table, count],
+                )
+                return [row[0] for row in cursor.fetchall()]
+        start = (model.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+        return list(range(start, start + count))
+
+    def create(self, model: type[Model], columns: tuple[str, ...], rows: list) -> list[int]:
+        """
+        Insert `rows` without their primary keys and return them in the same order, safely alongside
+        concurrent inserts: reserved from the sequence on PostgreSQL, else returned by bulk_create.
+        """
+        if connection.vendor == "postgresql":
+            ids = self.reserve_ids(model, len(rows))
+            self.write(model, ("id", *columns), [(pk, *row) for pk, row in zip(ids, rows)])
+            return ids
+        objects = model.objects.bulk_create(
+            [model(**dict(zip(columns, row))) for row in rows], batch_size=self.batch_size
+        )
+        return [obj.pk for obj in objects]
+
+    def write(self, model: type[Model], columns: tuple[str, ...], rows) -> int:
+        """Insert `rows`, tuples ordered like `columns` (field attribute names), and return their number"""
+        written = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                self._insert(model, columns, batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            self._insert(model, columns, batch)
+            written += len(batch)
+        return written
+
+    def _insert(self, model, columns, batch):
+        if not self.use_copy:
+            model.objects.bulk_create([model(**dict(zip(columns, row))) for row in batch], batch_size=self.batch_size)
+            return
+
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        fields = ", ".join(quote(model._meta.get_field(column).column) for column in columns)
+        sql = f"COPY {quote(model._meta.db_table)} ({fields}) FROM STDIN WITH (FORMAT csv)"
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(sql, buffer)
+
+
+def invalidate_derived_data():
+    """Bulk inserts send no model signals, so drop cached responses and in-memory indexes explicitly"""
+    invalidate("airports", "airplanes", "flights")
+    for index in (suggestions, timetable):
+        index.invalidate()
+        transaction.on_commit(index.invalidate)
+
+
+class AirportSeeder:
+    """
+    Generates realistic synthetic data reproducible from a seed: airports with coordinates, routes
+    with great-circle distances, airplanes of common models with their types, flights with crews
+    and durations following their distance, a pool of passengers, and orders whose tickets fill
+    each flight's seats in order, so they stay within the airplane and unique per flight.
+    Everything is written in batches by a RowWriter within one transaction.
+    """
+
+    def __init__(self, seed: int = 42, batch_size: int = 10000, use_copy: bool = None, log=None):
+        self.rng = random.Random(seed)
+        self.writer = RowWriter(batch_size, use_copy)
+        self.log = log or (lambda message: None)
+
+    def seed(
+        self,
+        airports: int = 100,
+        flights: int = 10000,
+        orders: int = 10000,
+        routes: int = None,
+        airplanes: int = 50,
+        crew: int = 500,
+        users: int = 1000,
+        tickets_per_order: int = 3,
+        crew_per_flight: int = 3,
+        start: datetime = None,
+        days: int = 365,
+    ) -> dict[str, int]:
+        """Create the data and return the number of rows created per model"""
+        if start is None:
+            start = (timezone.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        if routes is None:
+            routes = airports * 10
+        routes = min(routes, airports * (airports - 1))
+        if flights and not (routes and airplanes):
+            raise ValueError("Flights need at least two airports, a route and an airplane")
+        if orders and not users:
+            raise ValueError("Orders need at least one user")
+
+        with transaction.atomic():
+            type_ids = self.create_types()
+            airport_coordinates = self.create_airports(airports)
+            route_distances = self.create_routes(airport_coordinates, routes)
+            airplane_seats = self.create_airplanes(airplanes, type_ids)
+            crew_ids = self.create_crew(crew)
+            flight_seats = self.create_flights(
+                flights, route_distances, airplane_seats, crew_ids, crew_per_flight, start, days
+            )
+            user_ids = self.create_users(users)
+            created_orders, created_tickets = self.create_orders(orders, tickets_per_order, flight_seats, user_ids)
+
+            self.log("Updating seats sold...")
+            Flight.objects.sync_seats_sold()
+            self.log("Creating flight search rows...")
+            search_rows.sync_flights(flight_seats[0])
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    for model in (
+                        Airport, Route, Airplane, Crew, Flight, Flight.crew.through, FlightSearchRow, Order, Ticket
+                    ):
+                        cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+            invalidate_derived_data()
+
+        return {
+            "airports": len(airport_coordinates),
+            "routes": len(route_distances),
+            "airplanes": len(airplane_seats),
+            "crew": len(crew_ids),
+            "flights": len(flight_seats[0]),
+            "users": len(user_ids),
+            "orders": created_orders,
+            "tickets": created_tickets,
+        }
+
+    def create_types(self) -> dict[str, int]:
+        names = {name for *_, types in AIRPLANE_MODELS for name in types}
+        Type.objects.bulk_create([Type(name=name) for name in sorted(names)], ignore_conflicts=True)
+        return dict(Type.objects.filter(name__in=names).values_list("name", "id"))
+
+    def city_name(self) -> str:
+        return "".join(self.rng.choice(CITY_SYLLABLES) for _ in range(self.rng.randint(2, 3))).capitalize()
+
+    def create_airports(self, count: int) -> dict[int, tuple[float, float]]:
+        """Airport id -> (latitude, longitude) in radians"""
+        self.log(f"Creating {count} airports...")
+        coordinates = {}
+        rows = []
+        for airport_id in self.writer.reserve_ids(Airport, count):
+            city = self.city_name()
+            rows.append((airport_id, f"{city} {self.rng.choice(AIRPORT_KINDS)}", city))
+            coordinates[airport_id] = (
+                math.radians(self.rng.uniform(-55, 70)),
+                math.radians(self.rng.uniform(-180, 180)),
+            )
+        self.writer.write(Airport, ("id", "name", "closest_big_city"), rows)
+        return coordinates
+
+    def create_routes(self, airport_coordinates, count: int) -> dict[int, int]:
+        """Route id -> distance in km, for `count` distinct airport pairs"""
+        self.log(f"Creating {count} routes...")
+        airport_ids = list(airport_coordinates)
+        if count * 2 > len(airport_ids) ** 2:
+            pairs = self.rng.sample(
+                [(source, destination) for source in airport_ids for destination in airport_ids
+                 if source != destination],
+                count,
+            )
+        else:
+            pairs = {}
+            while len(pairs) < count:
+                pairs[tuple(self.rng.sample(airport_ids, 2))] = None
+
+        distances = {}
+        rows = []
+        for route_id, (source, destination) in zip(self.writer.reserve_ids(Route, count), pairs):
+            (lat1, lon1), (lat2, lon2) = airport_coordinates[source], airport_coordinates[destination]
+            haversine = (
+                math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+            )
+            distances[route_id] = max(50, round(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(haversine))))
+            rows.append((route_id, source, destination, distances[route_id]))
+        self.writer.write(Route, ("id", "source_id", "destination_id", "distance"), rows)
+        return distances
+
+    def create_airplanes(self, count: int, type_ids: dict[str, int]) -> dict[int, tuple[int, int]]:
+        """Airplane id -> (rows, seats in row)"""
+        self.log(f"Creating {count} airplanes...")
+        seats = {}
+        rows, types = [], []
+        for number, airplane_id in enumerate(self.writer.reserve_ids(Airplane, count), start=1):
+            name, airplane_rows, seats_in_row, type_names = self.rng.choice(AIRPLANE_MODELS)
+            # Written out as {} by COPY, image_variants has no database default
+            rows.append((airplane_id, f"{name} #{number}", airplane_rows, seats_in_row, {}))
+            types += [(airplane_id, type_ids[type_name]) for type_name in type_names]
+            seats[airplane_id] = (airplane_rows, seats_in_row)
+        self.writer.write(Airplane, ("id", "name", "rows", "seats_in_row", "image_variants"), rows)
+        self.writer.write(Airplane.types.through, ("airplane_id", "type_id"), types)
+        return seats
+
+    def create_crew(self, count: int) -> list[int]:
+        self.log(f"Creating {count} crew members...")
+        crew_ids = list(self.writer.reserve_ids(Crew, count))
+        self.writer.write(
+            Crew,
+            ("id", "first_name", "last_name"),
+            ((crew_id, self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)) for crew_id in crew_ids),
+        )
+        return crew_ids
+
+    def create_flights(self, count, route_distances, airplane_seats, crew_ids, crew_per_flight, start, days):
+        """Arrays of flight ids, seat capacities and seats in row, in the same order"""
+        self.log(f"Creating {count} flights...")
+        flight_ids, capacities, seats_in_rows = array("q"), array("l"), array("l")
+        route_ids, airplane_ids = list(route_distances), list(airplane_seats)
+        crew_per_flight = min(crew_per_flight, len(crew_ids))
+        created = 0
+        while created < count:
+            rows, crew = [], []
+            for flight_id in self.writer.reserve_ids(Flight, min(self.writer.batch_size, count - created)):
+                route_id, airplane_id = self.rng.choice(route_ids), self.rng.choice(airplane_ids)
+                departure = start + timedelta(minutes=5 * self.rng.randrange(days * 24 * 12))
+                duration = route_distances[route_id] / CRUISE_SPEED_KM_H * 60 + 30
+                arrival = departure + timedelta(minutes=round(duration))
+                rows.append((flight_id, route_id, airplane_id, departure, arrival, 0))
+                crew += [(flight_id, crew_id) for crew_id in self.rng.sample(crew_ids, crew_per_flight)]
+
+                airplane_rows, seats_in_row = airplane_seats[airplane_id]
+                flight_ids.append(flight_id)
+                capacities.append(airplane_rows * seats_in_row)
+                seats_in_rows.append(seats_in_row)
+
+            self.writer.write(
+                Flight, ("id", "route_id", "airplane_id", "departure_time", "arrival_time", "seats_sold"), rows
+            )
+            self.writer.write(Flight.crew.through, ("flight_id", "crew_id"), crew)
+            created += len(rows)
+        return flight_ids, capacities, seats_in_rows
+
+    def create_users(self, count: int) -> list[int]:
+        """Passengers reused across runs, all with SEED_PASSWORD"""
+        self.log(f"Creating {count} users...")
+        user_model = get_user_model()
+        password = make_password(SEED_PASSWORD)
+        emails = [f"passenger{number}@{SEED_EMAIL_DOMAIN}" for number in range(1, count + 1)]
+        user_model.objects.bulk_create(
+            [user_model(email=email, password=password) for email in emails],
+            batch_size=self.writer.batch_size,
+            ignore_conflicts=True,
+        )
+        return list(user_model.objects.filter(email__in=emails).order_by("id").values_list("id", flat=True))
+
+    def create_orders(self, count, tickets_per_order, flight_seats, user_ids) -> tuple[int, int]:
+        """
+        Orders with 1 to `tickets_per_order` tickets on random flights with free seats. Seats of a
+        flight are sold in order, so a counter per flight is enough to keep tickets unique.
+        """
+        self.log(f"Creating {count} orders...")
+        flight_ids, capacities, seats_in_rows = flight_seats
+        sold = array("l", [0]) * len(flight_ids)
+        open_flights = [index for index, capacity in enumerate(capacities) if capacity]
+        created_at = timezone.now()
+        created_orders = created_tickets = 0
+
+        while created_orders < count and open_flights:
+            orders, tickets = [], []
+            for order_id in self.writer.reserve_ids(Order, min(self.writer.batch_size, count - created_orders)):
+                orders.append((order_id, created_at, self.rng.choice(user_ids)))
+                for _ in range(self.rng.randint(1, tickets_per_order)):
+                    if not open_flights:
+                        break
+                    position = self.rng.randrange(len(open_flights))
+                    flight = open_flights[position]
+                    seat_index = sold[flight]
+                    sold[flight] += 1
+                    if sold[flight] == capacities[flight]:
+                        open_flights[position] = open_flights[-1]
+                        open_flights.pop()
+                    row, seat = divmod(seat_index, seats_in_rows[flight])
+                    tickets.append((flight_ids[flight], order_id, row + 1, seat + 1))
+
+            created_orders += self.writer.write(Order, ("id", "created_at", "user_id"), orders)
+            created_tickets += self.writer.write(Ticket, ("flight_id", "order_id", "row", "seat"), tickets)
+
+        if created_orders < count:
+            self.log(f"All seats are sold, created {created_orders} orders")
+        return created_orders, created_tickets
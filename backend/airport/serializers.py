@@ -1,8 +1,19 @@
-from django.db import transaction
+import operator
+from collections import Counter
+from datetime import timedelta
+from functools import reduce
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, Value, When
+from django.utils import timezone
 
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from airport import images
+from airport.export import FORMATS, parse_bound
+from airport.fieldsets import SparseFieldsMixin
 from airport.models import (
     Airport,
     Route,
@@ -10,33 +21,81 @@ from airport.models import (
     Airplane,
     Crew,
     Flight,
+    FlightSearchRow,
     Ticket,
     Order,
+    SeatHold,
 )
+from airport.response_cache import invalidate
+
+
+def seats_filter(seats) -> Q:
+    """Matches exactly the given (flight_id, row, seat) keys"""
+    return reduce(operator.or_, (Q(flight_id=flight_id, row=row, seat=seat) for flight_id, row, seat in seats))
+
+
+def seat_errors(seats, user):
+    """
+    Per-seat errors for (flight_id, row, seat) keys that are sold, held by someone other than `user`
+    or repeated in the list, None if all of them are free. Runs two queries regardless of the number of seats.
+    """
+    lookup = {
+        "flight_id__in": {flight_id for flight_id, _, _ in seats},
+        "row__in": {row for _, row, _ in seats},
+        "seat__in": {seat for _, _, seat in seats},
+    }
+    unavailable = dict.fromkeys(
+        SeatHold.objects.active().filter(**lookup).exclude(user=user).values_list("flight_id", "row", "seat"),
+        "This seat is held by another customer.",
+    )
+    unavailable.update(
+        dict.fromkeys(
+            Ticket.objects.filter(**lookup).values_list("flight_id", "row", "seat"),
+            "This seat is already taken.",
+        )
+    )
 
+    errors = []
+    for key in seats:
+        errors.append({"non_field_errors": [unavailable[key]]} if key in unavailable else {})
+        unavailable.setdefault(key, "This seat is repeated in the request.")
 
-class AirportSerializer(serializers.ModelSerializer):
+    return errors if any(errors) else None
+
+
+class AirportSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Airport
         fields = ("id", "name", "closest_big_city")
 
 
-class RouteSerializer(serializers.ModelSerializer):
+class AirportSuggestionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    closest_big_city = serializers.CharField()
+    routes = serializers.IntegerField()
+
+
+class RouteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     source_name = serializers.CharField(source="source.name", read_only=True)
     destination_name = serializers.CharField(source="destination.name", read_only=True)
 
+    expandable_fields = {"source": AirportSerializer, "destination": AirportSerializer}
+
     class Meta:
         model = Route
         fields = ("id", "source", "destination", "distance", "source_name", "destination_name")
 
 
-class TypeSerializer(serializers.ModelSerializer):
+class TypeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Type
         fields = ("id", "name")
 
 
-class AirplaneSerializer(serializers.ModelSerializer):
+class AirplaneSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"types": TypeSerializer}
+
     class Meta:
         model = Airplane
         fields = (
@@ -54,6 +113,7 @@ class AirplaneListSerializer(AirplaneSerializer):
     types = serializers.SlugRelatedField(
         many=True, read_only=True, slug_field="name"
     )
+    thumbnail = serializers.SerializerMethodField()
 
     class Meta:
         model = Airplane
@@ -65,11 +125,17 @@ class AirplaneListSerializer(AirplaneSerializer):
             "types",
             "capacity",
             "image",
+            "thumbnail",
         )
 
+    def get_thumbnail(self, obj) -> dict:
+        """WebP and JPEG thumbnail URLs with their size, null until created after an upload"""
+        return images.variant_urls(obj, "thumbnail", self.context.get("request"))
+
 
 class AirplaneDetailSerializer(AirplaneSerializer):
     types = TypeSerializer(many=True, read_only=True)
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Airplane
@@ -80,8 +146,18 @@ class AirplaneDetailSerializer(AirplaneSerializer):
             "seats_in_row",
             "types",
             "image",
+            "image_variants",
         )
 
+    def get_image_variants(self, obj) -> dict:
+        """URLs of every resized variant of the image, empty until they are created"""
+        request = self.context.get("request")
+        return {
+            variant: urls
+            for variant in images.VARIANTS
+            if (urls := images.variant_urls(obj, variant, request)) is not None
+        }
+
 
 class AirplaneImageSerializer(serializers.ModelSerializer):
     class Meta:
@@ -89,7 +165,7 @@ class AirplaneImageSerializer(serializers.ModelSerializer):
         fields = ("id", "image")
 
 
-class CrewSerializer(serializers.ModelSerializer):
+class CrewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
 
     class Meta:
@@ -100,20 +176,83 @@ class CrewSerializer(serializers.ModelSerializer):
         return f"{obj.first_name} {obj.last_name}"
 
 
-class FlightSerializer(serializers.ModelSerializer):
+class FlightSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     route_details = RouteSerializer(source="route", read_only=True)
     airplane_details = AirplaneSerializer(source="airplane", read_only=True)
     crew_members = CrewSerializer(source="crew", many=True, read_only=True)
+    tickets_available = serializers.IntegerField(read_only=True)
+
+    expandable_fields = {"route": RouteSerializer, "airplane": AirplaneSerializer}
+    field_relations = {"tickets_available": ("airplane",)}
 
     class Meta:
         model = Flight
         fields = (
             "id", "route", "airplane", "departure_time", "arrival_time",
+            "seats_sold", "tickets_available",
             "route_details", "airplane_details", "crew_members",
         )
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class FlightSearchRowSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FlightSearchRow
+        fields = (
+            "flight",
+            "route",
+            "source",
+            "source_name",
+            "source_city",
+            "destination",
+            "destination_name",
+            "destination_city",
+            "departure_time",
+            "arrival_time",
+            "airplane",
+            "airplane_name",
+            "capacity",
+            "type_names",
+        )
+        read_only_fields = fields
+
+
+class FlightPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves flights from the ones prefetched by TicketBulkListSerializer, if any"""
+
+    def to_internal_value(self, data):
+        flights = self.context.get("prefetched_flights")
+        if flights is None:
+            return super().to_internal_value(data)
+
+        try:
+            return flights[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class TicketBulkListSerializer(serializers.ListSerializer):
+    """Fetches every referenced flight with its airplane in a single query before validation"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            flight_ids = {
+                int(item["flight"])
+                for item in data
+                if isinstance(item, dict) and str(item.get("flight", "")).isdigit()
+            }
+            self.context["prefetched_flights"] = (
+                Flight.objects.select_related("airplane").in_bulk(flight_ids)
+            )
+        return super().to_internal_value(data)
+
+
+class TicketSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    flight = FlightPrimaryKeyRelatedField(queryset=Flight.objects.select_related("airplane"))
+
+    expandable_fields = {"flight": FlightSerializer}
+
     def validate(self, attrs):
         required_keys = ["row", "seat", "flight"]
         missing_keys = [key for key in required_keys if key not in attrs]
@@ -131,13 +270,16 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight")
+        list_serializer_class = TicketBulkListSerializer
+        # Seat uniqueness is checked for all tickets at once by OrderSerializer
+        validators = []
 
 
 class TicketListSerializer(TicketSerializer):
     flight = FlightSerializer(many=False, read_only=True)
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
 
     class Meta:
@@ -147,11 +289,172 @@ class OrderSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         with transaction.atomic():
             tickets_data = validated_data.pop("tickets")
+            user = validated_data["user"]
+            seats = [(ticket["flight"].id, ticket["row"], ticket["seat"]) for ticket in tickets_data]
+
+            Flight.objects.lock({flight_id for flight_id, _, _ in seats})
+            errors = seat_errors(seats, user)
+            if errors:
+                raise ValidationError({"tickets": errors})
+
             order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+            try:
+                with transaction.atomic():
+                    Ticket.objects.bulk_create(
+                        [Ticket(order=order, **ticket_data) for ticket_data in tickets_data]
+                    )
+            except IntegrityError:
+                # Another order took some of the seats on a backend without row locks
+                raise ValidationError({"tickets": seat_errors(seats, user)})
+            SeatHold.objects.filter(seats_filter(seats), user=user).delete()
+
+            sold = Counter(ticket_data["flight"].id for ticket_data in tickets_data)
+            Flight.objects.filter(pk__in=sold).update(
+                seats_sold=F("seats_sold") + Case(
+                    *(When(pk=flight_id, then=Value(count)) for flight_id, count in sold.items()),
+                    output_field=PositiveIntegerField(),
+                )
+            )
+            # bulk_create() and update() don't send the signals the response cache listens to
+            invalidate("flights")
             return order
 
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+
+
+class TicketCompactSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    source_name = serializers.CharField(source="flight.route.source.name", read_only=True)
+    destination_name = serializers.CharField(source="flight.route.destination.name", read_only=True)
+    departure_time = serializers.DateTimeField(source="flight.departure_time", read_only=True)
+
+    expandable_fields = {"flight": FlightSerializer}
+
+    class Meta:
+        model = Ticket
+        fields = ("id", "flight", "source_name", "destination_name", "departure_time", "row", "seat")
+
+
+class OrderCompactSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    tickets = TicketCompactSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ("id", "tickets", "created_at")
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField(min_value=1)
+    seat = serializers.IntegerField(min_value=1)
+
+
+class SeatHoldSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"flight": FlightSerializer}
+
+    class Meta:
+        model = SeatHold
+        fields = ("id", "flight", "row", "seat", "expires_at")
+
+
+class SeatHoldCreateSerializer(serializers.Serializer):
+    seats = SeatSerializer(many=True, allow_empty=False)
+    minutes = serializers.IntegerField(
+        min_value=1, max_value=settings.SEAT_HOLD_MAX_MINUTES, default=settings.SEAT_HOLD_MINUTES
+    )
+
+    def validate_seats(self, seats):
+        airplane = self.context["flight"].airplane
+        for seat in seats:
+            if seat["row"] > airplane.rows or seat["seat"] > airplane.seats_in_row:
+                raise ValidationError("Invalid row or seat number for this airplane.")
+        return seats
+
+    def create(self, validated_data):
+        """Hold the seats while holding the flight row lock, so racing requests are serialized per flight"""
+        flight = self.context["flight"]
+        user = validated_data["user"]
+        seats = [(flight.id, seat["row"], seat["seat"]) for seat in validated_data["seats"]]
+
+        with transaction.atomic():
+            Flight.objects.lock([flight.id])
+            SeatHold.objects.expired().filter(flight=flight).delete()
+            errors = seat_errors(seats, user)
+            if errors:
+                raise ValidationError({"seats": errors})
+
+            SeatHold.objects.filter(seats_filter(seats), user=user).delete()
+            expires_at = timezone.now() + timedelta(minutes=validated_data["minutes"])
+            return SeatHold.objects.bulk_create(
+                [
+                    SeatHold(flight=flight, user=user, row=row, seat=seat, expires_at=expires_at)
+                    for _, row, seat in seats
+                ]
+            )
+
+
+class ItinerarySearchSerializer(serializers.Serializer):
+    source = serializers.IntegerField(min_value=1)
+    destination = serializers.IntegerField(min_value=1)
+    date = serializers.DateField()
+    min_connection = serializers.IntegerField(
+        min_value=0, max_value=24 * 60, default=settings.ITINERARY_MIN_CONNECTION_MINUTES
+    )
+    max_legs = serializers.IntegerField(min_value=1, max_value=3, default=3)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+    def get_fields(self):
+        # Query parameters are named ?from= and ?to=, which can't be declared as attributes
+        fields = super().get_fields()
+        fields["from"] = fields.pop("source")
+        fields["to"] = fields.pop("destination")
+        return fields
+
+
+class ItineraryLegSerializer(serializers.Serializer):
+    flight = serializers.IntegerField(source="flight_id")
+    route = serializers.IntegerField(source="route_id")
+    source = serializers.IntegerField(source="source_id")
+    destination = serializers.IntegerField(source="destination_id")
+    source_name = serializers.SerializerMethodField()
+    destination_name = serializers.SerializerMethodField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    distance = serializers.IntegerField()
+
+    def get_source_name(self, obj):
+        return self.context["airport_names"].get(obj.source_id)
+
+    def get_destination_name(self, obj):
+        return self.context["airport_names"].get(obj.destination_id)
+
+
+class ItinerarySerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    duration_minutes = serializers.SerializerMethodField()
+    distance = serializers.IntegerField()
+    legs = ItineraryLegSerializer(many=True)
+
+    def get_duration_minutes(self, obj):
+        return round(obj.duration / 60)
+
+
+class ExportSerializer(serializers.Serializer):
+    output = serializers.ChoiceField(choices=tuple(FORMATS), default="csv")
+    gzip = serializers.BooleanField(default=False)
+    since = serializers.CharField(required=False)
+    until = serializers.CharField(required=False)
+
+    @staticmethod
+    def _bound(value, end=False):
+        try:
+            return parse_bound(value, end=end)
+        except ValueError as error:
+            raise serializers.ValidationError(str(error))
+
+    def validate_since(self, value):
+        return self._bound(value)
+
+    def validate_until(self, value):
+        return self._bound(value, end=True)
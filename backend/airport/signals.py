@@ -0,0 +1,160 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from airport import images, search_rows
+from airport.models import Airplane, Airport, Crew, Flight, FlightSchedule, Route, Ticket, Type
+from airport.response_cache import invalidate
+from airport.schedules import reset_horizon
+from airport.suggest import suggestions
+from airport.timetable import timetable
+
+# Response cache namespaces whose payloads render each model
+CACHED_BY_MODEL = {
+    Airport: ("airports", "flights"),
+    Airplane: ("airplanes", "flights"),
+    Type: ("airplanes", "flights"),
+    Route: ("flights",),
+    Flight: ("flights",),
+    Crew: ("flights",),
+    Ticket: ("flights",),
+    Airplane.types.through: ("airplanes", "flights"),
+    Flight.crew.through: ("flights",),
+}
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    invalidate(*CACHED_BY_MODEL[sender])
+
+
+for model in CACHED_BY_MODEL:
+    if model._meta.auto_created:
+        m2m_changed.connect(invalidate_cached_responses, sender=model, dispatch_uid=f"cache-{model.__name__}")
+    else:
+        post_save.connect(invalidate_cached_responses, sender=model, dispatch_uid=f"cache-save-{model.__name__}")
+        post_delete.connect(invalidate_cached_responses, sender=model, dispatch_uid=f"cache-delete-{model.__name__}")
+
+
+def change_seats_sold(flight_id, change):
+    flights = Flight.objects.filter(pk=flight_id)
+    if change < 0:
+        flights = flights.filter(seats_sold__gt=0)
+    flights.update(seats_sold=F("seats_sold") + change)
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_flight(sender, instance, raw, **kwargs):
+    # A ticket moved to another flight gives its seat back to the flight it was saved with
+    if not raw and not instance._state.adding:
+        instance.sold_flight_id = Ticket.objects.filter(pk=instance.pk).values_list("flight_id", flat=True).first()
+
+
+@receiver(post_save, sender=Ticket)
+def count_sold_seat(sender, instance, created, raw, **kwargs):
+    # Orders bulk create their tickets and increment the counter themselves, other ticket saves land here
+    if raw:
+        return
+    if created:
+        change_seats_sold(instance.flight_id, 1)
+    elif getattr(instance, "sold_flight_id", instance.flight_id) != instance.flight_id:
+        change_seats_sold(instance.sold_flight_id, -1)
+        change_seats_sold(instance.flight_id, 1)
+    instance.sold_flight_id = instance.flight_id
+
+
+@receiver(post_delete, sender=Ticket)
+def release_sold_seat(sender, instance, **kwargs):
+    # Deleted tickets (or their cascading orders) give the seat back
+    change_seats_sold(instance.flight_id, -1)
+
+
+@receiver([post_save, post_delete], sender=Flight)
+def update_timetable_flight(sender, instance, **kwargs):
+    flight_id = instance.pk
+    transaction.on_commit(lambda: timetable.flights_changed([flight_id]))
+
+
+@receiver(post_save, sender=Route)
+def update_timetable_route(sender, instance, **kwargs):
+    route_id = instance.pk
+    transaction.on_commit(lambda: timetable.route_changed(route_id))
+
+
+@receiver([post_save, post_delete], sender=Airport)
+def update_timetable_airport(sender, instance, **kwargs):
+    airport_id = instance.pk
+    name = instance.name if kwargs["signal"] is post_save else None
+    transaction.on_commit(lambda: timetable.airport_changed(airport_id, name))
+
+
+@receiver([post_save, post_delete], sender=Airport)
+@receiver([post_save, post_delete], sender=Route)
+def invalidate_airport_suggestions(sender, **kwargs):
+    suggestions.invalidate()
+    transaction.on_commit(suggestions.invalidate)
+
+
+@receiver([post_save, post_delete], sender=FlightSchedule)
+def reset_schedules_horizon(sender, **kwargs):
+    reset_horizon()
+
+
+@receiver(post_save, sender=Airplane)
+def process_airplane_image(sender, instance, **kwargs):
+    if instance.image and (instance.image_variants or {}).get("source") != instance.image.name:
+        images.schedule(instance.pk)
+
+
+@receiver(post_save, sender=Flight)
+def sync_flight_search_row(sender, instance, **kwargs):
+    search_rows.sync_flights([instance.pk])
+
+
+@receiver(post_save, sender=Route)
+def sync_route_search_rows(sender, instance, created, **kwargs):
+    if not created:
+        search_rows.sync(Flight.objects.filter(route=instance.pk))
+
+
+@receiver(post_save, sender=Airport)
+def sync_airport_search_rows(sender, instance, created, **kwargs):
+    if not created:
+        search_rows.sync_airport(instance)
+
+
+@receiver(post_save, sender=Airplane)
+def sync_airplane_search_rows(sender, instance, created, **kwargs):
+    if not created:
+        search_rows.sync_airplanes([instance.pk])
+
+
+@receiver(post_save, sender=Type)
+def sync_type_search_rows(sender, instance, created, **kwargs):
+    if not created:
+        search_rows.sync_airplanes(instance.airplane_set.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Type)
+def remember_type_airplanes(sender, instance, **kwargs):
+    # The type's airplane links are gone by post_delete
+    instance.search_row_airplanes = list(instance.airplane_set.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Type)
+def sync_deleted_type_search_rows(sender, instance, **kwargs):
+    search_rows.sync_airplanes(getattr(instance, "search_row_airplanes", ()))
+
+
+@receiver(m2m_changed, sender=Airplane.types.through)
+def sync_airplane_types_search_rows(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            search_rows.sync_airplanes([instance.pk])
+    elif action == "pre_clear":
+        # post_clear has no pk_set, the cleared type's airplanes are only known before
+        instance.search_row_airplanes = list(instance.airplane_set.values_list("pk", flat=True))
+    elif action == "post_clear":
+        search_rows.sync_airplanes(instance.search_row_airplanes)
+    elif action in ("post_add", "post_remove"):
+        search_rows.sync_airplanes(pk_set)
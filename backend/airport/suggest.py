@@ -0,0 +1,138 @@
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+from time import monotonic
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from airport.models import Airport, Route
+
+VERSION_CACHE_KEY = "airport:suggest:version"
+TOKEN_SEPARATOR = re.compile(r"[^\w]+")
+
+
+def normalize(text: str) -> str:
+    """Case- and accent-insensitive form used for both indexed terms and queries"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold().strip()
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN_SEPARATOR.split(normalize(text)) if token]
+
+
+class Suggestion(NamedTuple):
+    id: int
+    name: str
+    closest_big_city: str
+    routes: int
+
+
+class AirportPrefixIndex:
+    """
+    Sorted array of (term, airport rank) pairs over airport names and closest big cities.
+
+    Every word of the name and city is a term, and so are the whole normalized name and city,
+    so "new y" matches "New York" as a phrase and "york" matches it as a word. Airports are ranked
+    once by number of routes, so the airports whose terms start with a prefix are a contiguous
+    slice found by bisection and the best of them are its smallest ranks. Results of recent
+    queries are memoized. The index is built lazily from three queries and rebuilt when airports
+    or routes change (see airport.signals), or once it is IN_MEMORY_INDEX_MAX_AGE seconds old, as other
+    processes only see those changes through a shared cache.
+    """
+
+    memo_size = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._built_at = 0.0
+        self._terms: list[str] = []
+        self._ranks: list[int] = []
+        self._by_rank: list[Suggestion] = []
+        self._memo: dict[tuple[str, int], list[Suggestion]] = {}
+
+    def build(self):
+        routes = Count("id")
+        departures = dict(Route.objects.order_by().values_list("source").annotate(routes))
+        arrivals = dict(Route.objects.order_by().values_list("destination").annotate(routes))
+        version = cache.get(VERSION_CACHE_KEY, 0)
+
+        airports = [
+            Suggestion(airport_id, name, city, departures.get(airport_id, 0) + arrivals.get(airport_id, 0))
+            for airport_id, name, city in Airport.objects.values_list("id", "name", "closest_big_city")
+        ]
+        airports.sort(key=lambda airport: (-airport.routes, airport.name, airport.id))
+
+        pairs = set()
+        for rank, airport in enumerate(airports):
+            for term in (
+                normalize(airport.name),
+                normalize(airport.closest_big_city),
+                *tokenize(airport.name),
+                *tokenize(airport.closest_big_city),
+            ):
+                pairs.add((term, rank))
+
+        pairs = sorted(pairs)
+        with self._lock:
+            self._terms = [term for term, _ in pairs]
+            self._ranks = [rank for _, rank in pairs]
+            self._by_rank = airports
+            self._memo = {}
+            self._version = version
+            self._built_at = monotonic()
+
+    def invalidate(self):
+        try:
+            cache.incr(VERSION_CACHE_KEY)
+        except ValueError:
+            cache.set(VERSION_CACHE_KEY, 1, None)
+
+    def _matching(self, prefix: str) -> set[int]:
+        start = bisect.bisect_left(self._terms, prefix)
+        end = bisect.bisect_left(self._terms, prefix + "\U0010ffff", lo=start)
+        return set(self._ranks[start:end])
+
+    def lookup(self, query: str, limit: int = 10) -> list[Suggestion]:
+        """
+        Airports matching the whole query as a phrase prefix, or every query word as a word prefix,
+        phrase matches first and then by number of routes.
+        """
+        if (
+            self._version is None
+            or cache.get(VERSION_CACHE_KEY, 0) != self._version
+            or monotonic() - self._built_at > settings.IN_MEMORY_INDEX_MAX_AGE
+        ):
+            self.build()
+
+        phrase = normalize(query)
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            found = self._memo.get((phrase, limit))
+            if found is None:
+                phrase_matches = self._matching(phrase)
+                best = heapq.nsmallest(limit, phrase_matches)
+                if len(best) < limit:
+                    word_matches = self._matching(tokens[0])
+                    for token in tokens[1:]:
+                        word_matches &= self._matching(token)
+                    best += heapq.nsmallest(limit - len(best), word_matches - phrase_matches)
+
+                found = [self._by_rank[rank] for rank in best]
+                if len(self._memo) >= self.memo_size:
+                    self._memo.clear()
+                self._memo[(phrase, limit)] = found
+
+        return found
+
+
+suggestions = AirportPrefixIndex()
@@ -0,0 +1,157 @@
+import io
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import images
+from airport.models import Airplane
+from airport.tests.test_airport_api import sample_airplane
+
+AIRPLANE_URL = reverse("airport:airplane-list")
+
+
+def image_file(size=(1600, 1200), mode="RGB", image_format="JPEG", name="plane.jpg"):
+    """Noisy image, so it compresses about as badly as a photo"""
+    bands = [Image.effect_noise(size, 40) for _ in mode]
+    image = Image.merge(mode, bands)
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, quality=90)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f"image/{image_format.lower()}")
+
+
+def upload_url(airplane_id):
+    return reverse("airport:airplane-upload-image", args=(airplane_id,))
+
+
+class TemporaryMediaMixin:
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(MEDIA_ROOT=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("admin@test.com", "testpass", is_staff=True)
+        )
+        self.airplane = sample_airplane()
+
+
+@override_settings(IMAGE_WORKERS=0)
+class AirplaneImageVariantTests(TemporaryMediaMixin, TestCase):
+    def upload(self, file):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(upload_url(self.airplane.id), {"image": file}, format="multipart")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.airplane.refresh_from_db()
+
+    def test_variants_created_on_upload(self):
+        self.upload(image_file())
+
+        self.assertEqual(self.airplane.image_variants["source"], self.airplane.image.name)
+        thumbnail = self.airplane.image_variants["variants"]["thumbnail"]
+        self.assertEqual((thumbnail["width"], thumbnail["height"]), (320, 240))
+        self.assertRegex(thumbnail["webp"], r"^upload/airplanes/variants/boeing-747-thumbnail-[0-9a-f]{20}\.webp$")
+        with default_storage.open(thumbnail["webp"]) as file, Image.open(file) as image:
+            self.assertEqual((image.format, image.size), ("WEBP", (320, 240)))
+        medium = self.airplane.image_variants["variants"]["medium"]
+        self.assertEqual((medium["width"], medium["height"]), (1024, 768))
+
+    def test_list_exposes_thumbnails(self):
+        self.upload(image_file())
+
+        airplane = self.client.get(AIRPLANE_URL).data[0]
+
+        self.assertTrue(airplane["thumbnail"]["webp"].startswith("http://testserver/media/upload/airplanes/variants/"))
+        self.assertTrue(airplane["thumbnail"]["jpeg"].endswith(".jpg"))
+        original = self.airplane.image.size
+        thumbnail = default_storage.size(self.airplane.image_variants["variants"]["thumbnail"]["webp"])
+        self.assertGreater(original / thumbnail, 10)
+
+    def test_list_before_processing(self):
+        self.airplane.image = image_file()
+        with self.captureOnCommitCallbacks(execute=False):
+            self.airplane.save()
+
+        airplane = self.client.get(AIRPLANE_URL).data[0]
+
+        self.assertIsNone(airplane["thumbnail"])
+
+    def test_transparent_and_small_images(self):
+        self.upload(image_file(size=(200, 100), mode="RGBA", image_format="PNG", name="plane.png"))
+
+        thumbnail = self.airplane.image_variants["variants"]["thumbnail"]
+        # Never scaled up
+        self.assertEqual((thumbnail["width"], thumbnail["height"]), (200, 100))
+        with default_storage.open(thumbnail["jpeg"]) as file, Image.open(file) as image:
+            self.assertEqual(image.mode, "RGB")
+
+    def test_replaced_image_not_overwritten(self):
+        self.airplane.image = image_file()
+        with self.captureOnCommitCallbacks(execute=False):
+            self.airplane.save()
+
+        def replace_while_processing(file, prefix):
+            Airplane.objects.filter(pk=self.airplane.pk).update(image="upload/airplanes/replaced.jpg")
+            return {}
+
+        with mock.patch.object(images, "create_variants", side_effect=replace_while_processing):
+            images.process(self.airplane.pk)
+
+        self.airplane.refresh_from_db()
+        self.assertEqual(self.airplane.image_variants, {})
+
+    def test_same_content_same_name(self):
+        self.upload(image_file())
+        first = self.airplane.image_variants["variants"]
+
+        images.process(self.airplane.pk)
+
+        self.airplane.refresh_from_db()
+        self.assertEqual(self.airplane.image_variants["variants"], first)
+
+    def test_media_served_immutable(self):
+        self.upload(image_file())
+        name = self.airplane.image_variants["variants"]["thumbnail"]["webp"]
+
+        res = self.client.get(f"/media/{name}")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(self.client.get("/media/upload/missing.jpg").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_command_processes_earlier_uploads(self):
+        self.airplane.image = image_file()
+        with self.captureOnCommitCallbacks(execute=False):
+            self.airplane.save()
+        out = io.StringIO()
+
+        call_command("process_airplane_images", stdout=out)
+
+        self.assertIn("Processed 1 airplane images", out.getvalue())
+        self.assertIn("x less", out.getvalue())
+        self.airplane.refresh_from_db()
+        self.assertEqual(self.airplane.image_variants["source"], self.airplane.image.name)
+
+
+@override_settings(IMAGE_WORKERS=2)
+class AirplaneImagePoolTests(TemporaryMediaMixin, TransactionTestCase):
+    def test_processed_off_request_thread(self):
+        res = self.client.post(upload_url(self.airplane.id), {"image": image_file()}, format="multipart")
+
+        images.wait(timeout=30)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.airplane.refresh_from_db()
+        self.assertEqual(self.airplane.image_variants["source"], self.airplane.image.name)
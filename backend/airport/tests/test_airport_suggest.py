@@ -0,0 +1,85 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import Airport, Route
+
+SUGGEST_URL = reverse("airport:airport-suggest")
+
+
+class AirportSuggestApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.jfk = Airport.objects.create(name="John F. Kennedy", closest_big_city="New York")
+        self.newark = Airport.objects.create(name="Newark Liberty", closest_big_city="New York")
+        self.zurich = Airport.objects.create(name="Zürich Kloten", closest_big_city="Zürich")
+        self.newcastle = Airport.objects.create(name="Newcastle", closest_big_city="Newcastle upon Tyne")
+        Route.objects.create(source=self.jfk, destination=self.zurich, distance=6300)
+        Route.objects.create(source=self.zurich, destination=self.jfk, distance=6300)
+
+    def suggest(self, query, **params):
+        res = self.client.get(SUGGEST_URL, {"q": query, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [airport["id"] for airport in res.data]
+
+    def test_prefix_ranked_by_route_count(self):
+        self.assertEqual(self.suggest("new"), [self.jfk.id, self.newark.id, self.newcastle.id])
+
+    def test_phrase_matches_first(self):
+        self.assertEqual(self.suggest("newcastle upon"), [self.newcastle.id])
+        self.assertEqual(self.suggest("new y"), [self.jfk.id, self.newark.id])
+
+    def test_word_prefix(self):
+        self.assertEqual(self.suggest("kenn"), [self.jfk.id])
+        self.assertEqual(self.suggest("york lib"), [self.newark.id])
+
+    def test_case_and_accent_insensitive(self):
+        self.assertEqual(self.suggest("ZURI"), [self.zurich.id])
+
+    def test_limit_and_empty_query(self):
+        self.assertEqual(len(self.suggest("new", limit=1)), 1)
+        self.assertEqual(self.suggest(""), [])
+
+    def test_response_fields(self):
+        res = self.client.get(SUGGEST_URL, {"q": "zur"})
+
+        self.assertEqual(
+            res.data, [{"id": self.zurich.id, "name": "Zürich Kloten", "closest_big_city": "Zürich", "routes": 2}]
+        )
+
+    def test_refreshed_on_airport_changes(self):
+        self.assertEqual(self.suggest("gat"), [])
+
+        gatwick = Airport.objects.create(name="Gatwick", closest_big_city="London")
+        self.assertEqual(self.suggest("gat"), [gatwick.id])
+
+        gatwick.delete()
+        self.assertEqual(self.suggest("gat"), [])
+
+    def test_rebuilt_once_too_old(self):
+        self.assertEqual(self.suggest("gat"), [])
+        # Renamed by another worker process, whose version bump a process-local cache doesn't share
+        Airport.objects.filter(pk=self.newcastle.pk).update(name="Gateshead")
+        self.assertEqual(self.suggest("gat"), [])
+
+        with self.settings(IN_MEMORY_INDEX_MAX_AGE=0):
+            self.assertEqual(self.suggest("gat"), [self.newcastle.id])
+
+    def test_lookup_without_queries(self):
+        self.suggest("new")
+
+        with self.assertNumQueries(0):
+            self.suggest("kenn")
+
+    def test_benchmark_command(self):
+        out = StringIO()
+
+        call_command("bench_suggest", airports=100, queries=20, stdout=out)
+
+        self.assertIn("faster", out.getvalue())
+        self.assertEqual(Airport.objects.count(), 4)
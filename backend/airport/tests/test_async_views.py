@@ -0,0 +1,118 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.models import Order, Ticket
+from airport.tests.test_airport_api import sample_airport, sample_flight
+
+
+def flight_detail_url(flight_id, prefix=""):
+    return reverse(f"airport:{prefix}flight-detail", args=(flight_id,))
+
+
+def flight_seats_url(flight_id, prefix=""):
+    return reverse(f"airport:{prefix}flight-seats", args=(flight_id,))
+
+
+def bearer(user):
+    return {"AUTHORIZATION": f"Bearer {AccessToken.for_user(user)}"}
+
+
+class AsyncViewsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.admin = get_user_model().objects.create_user("admin@test.com", "testpass", is_staff=True)
+        sample_airport()
+        self.flight = sample_flight()
+        sample_flight(departure_time="2024-06-03 14:00:00", arrival_time="2024-06-03 18:00:00")
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=2)
+
+    def assertSameAsSync(self, sync_response, async_response):
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(async_response.content), json.loads(json.dumps(sync_response.data)))
+
+    async def test_airport_list(self):
+        sync_response = await self.async_client.get(reverse("airport:airport-list"))
+        async_response = await self.async_client.get(reverse("airport:async-airport-list"))
+
+        self.assertSameAsSync(sync_response, async_response)
+
+    async def test_flight_list(self):
+        params = {"page_size": 1, "route": self.flight.route_id}
+        sync_response = await self.async_client.get(reverse("airport:flight-list"), params)
+        async_response = await self.async_client.get(reverse("airport:async-flight-list"), params)
+
+        sync_data, async_data = sync_response.data, json.loads(async_response.content)
+        self.assertEqual(async_data["results"], json.loads(json.dumps(sync_data["results"])))
+        self.assertEqual(async_data["next"] is None, sync_data["next"] is None)
+
+    async def test_flight_list_invalid_filter(self):
+        for params in ({"source": "abc"}, {"route": "abc"}, {"min_available": "abc"}):
+            with self.subTest(params=params):
+                sync_response = await self.async_client.get(reverse("airport:flight-list"), params)
+                async_response = await self.async_client.get(reverse("airport:async-flight-list"), params)
+
+                self.assertEqual(async_response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertSameAsSync(sync_response, async_response)
+
+    async def test_flight_list_cached(self):
+        url = reverse("airport:async-flight-list")
+        first = await self.async_client.get(url)
+        second = await self.async_client.get(url)
+        not_modified = await self.async_client.get(url, IF_NONE_MATCH=second["ETag"])
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_flight_detail(self):
+        headers = bearer(self.admin)
+        sync_response = await self.async_client.get(flight_detail_url(self.flight.id), **headers)
+        async_response = await self.async_client.get(flight_detail_url(self.flight.id, "async-"), **headers)
+
+        self.assertSameAsSync(sync_response, async_response)
+
+    async def test_flight_detail_permissions(self):
+        url = flight_detail_url(self.flight.id, "async-")
+
+        anonymous = await self.async_client.get(url)
+        user = await self.async_client.get(url, **bearer(self.user))
+        invalid = await self.async_client.get(url, AUTHORIZATION="Bearer invalid")
+
+        self.assertEqual(anonymous.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("WWW-Authenticate", anonymous)
+        self.assertEqual(user.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(invalid.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_flight_detail_not_found(self):
+        res = await self.async_client.get(flight_detail_url(999, "async-"), **bearer(self.admin))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_flight_seats(self):
+        for params in ({}, {"encoding": "rle"}, {"encoding": "json"}, {"encoding": "bogus"}):
+            sync_response = await self.async_client.get(flight_seats_url(self.flight.id), params)
+            async_response = await self.async_client.get(flight_seats_url(self.flight.id, "async-"), params)
+
+            self.assertSameAsSync(sync_response, async_response)
+
+    async def test_flight_seats_not_found(self):
+        res = await self.async_client.get(flight_seats_url(999, "async-"))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_writes_not_allowed(self):
+        res = await self.async_client.post(reverse("airport:async-flight-list"), {})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(res["Allow"], "GET, HEAD")
@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from airport.models import Flight, Order
+
+
+class BenchApiCommandTests(TestCase):
+    def bench(self, **options):
+        out = StringIO()
+        call_command("bench_api", airports=5, flights=20, orders=5, requests=3, warmup=1, stdout=out, **options)
+        return out.getvalue()
+
+    def test_report_saved_and_data_rolled_back(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bench.json")
+
+            output = self.bench(output=path)
+
+            with open(path) as results:
+                report = json.load(results)
+
+        self.assertIn("order create", output)
+        self.assertEqual(
+            set(report["endpoints"]),
+            {"flight list", "flight detail", "airplane list by types", "order create", "order list"},
+        )
+        for result in report["endpoints"].values():
+            self.assertEqual(result["errors"], 0)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        self.assertGreater(report["endpoints"]["order create"]["queries"], 0)
+        self.assertEqual(Flight.objects.count(), 0)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_compare_flags_regressions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bench.json")
+            self.bench(output=path)
+            with open(path) as results:
+                report = json.load(results)
+            for result in report["endpoints"].values():
+                result["max_queries"] = 0
+            with open(path, "w") as results:
+                json.dump(report, results)
+
+            with self.assertRaisesMessage(CommandError, "Performance regressions"):
+                self.bench(compare=path, threshold=10 ** 6)
+
+
+class BenchAsyncCommandTests(TestCase):
+    def test_requires_flights(self):
+        with self.assertRaisesMessage(CommandError, "run the seed_airport command first"):
+            call_command("bench_async", requests=2, stdout=StringIO())
+
+    def test_invalid_concurrency(self):
+        with self.assertRaisesMessage(CommandError, "--concurrency"):
+            call_command("bench_async", concurrency="1,x", stdout=StringIO())
+
+
+class BenchFastListsCommandTests(TestCase):
+    def test_modes_compared_and_data_rolled_back(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bench.json")
+
+            output = StringIO()
+            call_command(
+                "bench_fast_lists",
+                airports=5,
+                airplanes=3,
+                flights=20,
+                requests=2,
+                warmup=0,
+                output=path,
+                stdout=output,
+            )
+
+            with open(path) as results:
+                report = json.load(results)
+
+        self.assertIn("values + orjson", output.getvalue())
+        self.assertEqual(set(report["endpoints"]), {"flight list", "airport list", "airplane list", "route list"})
+        self.assertGreater(report["endpoints"]["flight list"]["serializers"]["throughput_rps"], 0)
+        self.assertEqual(Flight.objects.count(), 0)
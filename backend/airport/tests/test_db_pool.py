@@ -0,0 +1,209 @@
+from io import StringIO
+from unittest import mock
+
+import psycopg2
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_INERROR,
+    TRANSACTION_STATUS_UNKNOWN,
+)
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.backends.postgresql import base
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase
+
+from airport_api_service.postgresql.base import DatabaseWrapper
+from airport_api_service.postgresql.pool import ConnectionPool, close_pools
+
+
+class FakeConnection:
+    """Stands in for a psycopg2 connection"""
+
+    def __init__(self, healthy=True):
+        self.closed = 0
+        self.autocommit = True
+        self.healthy = healthy
+        self.status = TRANSACTION_STATUS_IDLE
+        self.rolled_back = False
+
+    def close(self):
+        self.closed = 1
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rolled_back = True
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        if not self.healthy:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        return mock.MagicMock()
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        connection = FakeConnection()
+        self.opened.append(connection)
+        return connection
+
+    def test_returned_connection_reused(self):
+        pool = ConnectionPool(max_size=2)
+
+        first = pool.checkout(self.connect)
+        pool.checkin(first)
+        second = pool.checkout(self.connect)
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(pool.stats, {"created": 1, "reused": 1, "discarded": 0})
+
+    def test_timeout_when_exhausted(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.checkout(self.connect)
+
+        with self.assertRaisesMessage(psycopg2.OperationalError, "all 1 of the pool are in use"):
+            pool.checkout(self.connect)
+
+    def test_failed_connect_frees_slot(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.checkout(mock.Mock(side_effect=psycopg2.OperationalError))
+
+        self.assertEqual(pool.size, 0)
+        pool.checkout(self.connect)
+
+    def test_transaction_rolled_back_on_checkin(self):
+        pool = ConnectionPool()
+        connection = pool.checkout(self.connect)
+        connection.status = TRANSACTION_STATUS_INERROR
+
+        pool.checkin(connection)
+
+        self.assertTrue(connection.rolled_back)
+        self.assertEqual(pool.idle, 1)
+
+    def test_broken_connection_discarded(self):
+        pool = ConnectionPool()
+        connection = pool.checkout(self.connect)
+        connection.status = TRANSACTION_STATUS_UNKNOWN
+
+        pool.checkin(connection)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual((pool.size, pool.idle), (0, 0))
+
+    def test_health_check_on_checkout(self):
+        pool = ConnectionPool()
+        broken = pool.checkout(self.connect)
+        pool.checkin(broken)
+        broken.healthy = False
+
+        connection = pool.checkout(self.connect)
+
+        self.assertIsNot(connection, broken)
+        self.assertTrue(broken.closed)
+        self.assertEqual(pool.stats["discarded"], 1)
+
+    def test_lifetime_and_idle_timeout(self):
+        pool = ConnectionPool(max_lifetime=100, idle_timeout=10)
+        with mock.patch("airport_api_service.postgresql.pool.time.monotonic", return_value=1000):
+            old = pool.checkout(self.connect)
+            idle = pool.checkout(self.connect)
+        with mock.patch("airport_api_service.postgresql.pool.time.monotonic", return_value=1095):
+            pool.checkin(idle)
+        with mock.patch("airport_api_service.postgresql.pool.time.monotonic", return_value=1101):
+            pool.checkin(old)
+            self.assertTrue(old.closed)
+
+        with mock.patch("airport_api_service.postgresql.pool.time.monotonic", return_value=1106):
+            connection = pool.checkout(self.connect)
+
+        self.assertTrue(idle.closed)
+        self.assertNotIn(connection, (old, idle))
+
+    def test_closed_pool_closes_returned_connections(self):
+        pool = ConnectionPool()
+        idle = pool.checkout(self.connect)
+        in_use = pool.checkout(self.connect)
+        pool.checkin(idle)
+
+        pool.close()
+        pool.checkin(in_use)
+
+        self.assertTrue(idle.closed)
+        self.assertTrue(in_use.closed)
+
+
+class PooledDatabaseWrapperTests(SimpleTestCase):
+    def tearDown(self):
+        close_pools("airport")
+
+    def wrapper(self, options):
+        return DatabaseWrapper(
+            {
+                "ENGINE": "airport_api_service.postgresql",
+                "NAME": "airport",
+                "USER": "",
+                "PASSWORD": "",
+                "HOST": "",
+                "PORT": "",
+                "OPTIONS": options,
+                "CONN_MAX_AGE": 0,
+                "CONN_HEALTH_CHECKS": False,
+                "AUTOCOMMIT": True,
+                "ATOMIC_REQUESTS": False,
+                "TIME_ZONE": None,
+                "TEST": {},
+            }
+        )
+
+    def test_pool_option_not_passed_to_driver(self):
+        params = self.wrapper({"pool": {"max_size": 2}, "sslmode": "prefer"}).get_connection_params()
+
+        self.assertEqual(params, {"database": "airport", "sslmode": "prefer"})
+
+    def test_connections_returned_to_pool(self):
+        wrapper = self.wrapper({"pool": {"max_size": 2}})
+        connection = FakeConnection()
+        connection.isolation_level = None
+        with mock.patch.object(base.DatabaseWrapper, "get_new_connection", return_value=connection):
+            wrapper.connection = wrapper.get_new_connection(wrapper.get_connection_params())
+            wrapper._close()
+
+        self.assertFalse(connection.closed)
+        self.assertEqual(wrapper.pool.idle, 1)
+
+
+class WaitForDbCommandTests(TestCase):
+    @mock.patch("airport.management.commands.wait_for_db.time.sleep")
+    def test_retries_with_backoff(self, sleep):
+        with mock.patch(
+            "django.db.backends.base.base.BaseDatabaseWrapper.ensure_connection",
+            side_effect=[OperationalError, OperationalError, OperationalError, None],
+        ):
+            call_command("wait_for_db", initial_delay=0.5, max_delay=1.5, stdout=StringIO())
+
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0.5, 1.0, 1.5])
+
+    @mock.patch("airport.management.commands.wait_for_db.time.sleep")
+    def test_gives_up_after_timeout(self, sleep):
+        with mock.patch(
+            "django.db.backends.base.base.BaseDatabaseWrapper.ensure_connection", side_effect=OperationalError
+        ):
+            with self.assertRaisesMessage(CommandError, "Database unavailable after 1 attempts"):
+                call_command("wait_for_db", timeout=0, stdout=StringIO())
+
+        sleep.assert_not_called()
+
+
+class BenchDbConnectionsCommandTests(TestCase):
+    def test_requires_postgresql(self):
+        with self.assertRaisesMessage(CommandError, "only implemented for PostgreSQL"):
+            call_command("bench_db_connections", requests=1, stdout=StringIO())
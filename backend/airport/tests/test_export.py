@@ -0,0 +1,155 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order, Ticket
+from airport.tests.test_airport_api import sample_flight
+
+
+def export_url(name):
+    return reverse("airport:export", args=(name,))
+
+
+def content(response):
+    return b"".join(response.streaming_content)
+
+
+class ExportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("admin@test.com", "testpass", is_staff=True)
+        self.client.force_authenticate(self.user)
+        self.june = sample_flight(departure_time="2024-06-02 14:00:00+00:00", arrival_time="2024-06-02 18:00:00+00:00")
+        self.july = sample_flight(departure_time="2024-07-02 14:00:00+00:00", arrival_time="2024-07-02 18:00:00+00:00")
+
+    def order(self, flight, *seats):
+        order = Order.objects.create(user=self.user)
+        for seat in seats:
+            Ticket.objects.create(order=order, flight=flight, row=1, seat=seat)
+        return order
+
+    def test_staff_only(self):
+        self.client.force_authenticate(get_user_model().objects.create_user("user@test.com", "testpass"))
+        self.assertEqual(self.client.get(export_url("flights")).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(export_url("flights")).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_flights_csv(self):
+        res = self.client.get(export_url("flights"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertEqual(res["Content-Disposition"], 'attachment; filename="flights.csv"')
+        rows = list(csv.reader(StringIO(content(res).decode())))
+        self.assertEqual(
+            rows[0],
+            ["id", "route", "source", "destination", "airplane", "departure_time", "arrival_time", "seats_sold"],
+        )
+        self.assertEqual(
+            rows[1],
+            [
+                str(self.june.id),
+                str(self.june.route_id),
+                "Source Airport",
+                "Destination Airport",
+                "Boeing 747",
+                "2024-06-02T14:00:00+00:00",
+                "2024-06-02T18:00:00+00:00",
+                "0",
+            ],
+        )
+        self.assertEqual(len(rows), 3)
+
+    def test_ndjson_matches_csv(self):
+        self.order(self.june, 1, 2)
+
+        csv_rows = list(csv.DictReader(StringIO(content(self.client.get(export_url("tickets"))).decode())))
+        res = self.client.get(export_url("tickets"), {"output": "ndjson"})
+        lines = [json.loads(line) for line in content(res).decode().splitlines()]
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        self.assertEqual(len(lines), 2)
+        self.assertEqual([line["seat"] for line in lines], [1, 2])
+        self.assertEqual(lines[0]["user"], "admin@test.com")
+        self.assertEqual([{key: str(value) for key, value in line.items()} for line in lines], csv_rows)
+
+    def test_gzip(self):
+        plain = content(self.client.get(export_url("flights"), {"output": "ndjson"}))
+
+        res = self.client.get(export_url("flights"), {"output": "ndjson", "gzip": "true"})
+
+        self.assertEqual(res["Content-Type"], "application/gzip")
+        self.assertEqual(res["Content-Disposition"], 'attachment; filename="flights.ndjson.gz"')
+        self.assertEqual(gzip.decompress(content(res)), plain)
+
+    def test_date_range(self):
+        res = self.client.get(export_url("flights"), {"output": "ndjson", "since": "2024-07-01"})
+        self.assertEqual([json.loads(line)["id"] for line in content(res).splitlines()], [self.july.id])
+
+        res = self.client.get(export_url("flights"), {"output": "ndjson", "until": "2024-06-02"})
+        self.assertEqual([json.loads(line)["id"] for line in content(res).splitlines()], [self.june.id])
+
+    def test_orders_filtered_by_creation(self):
+        old = self.order(self.june, 1)
+        Order.objects.filter(pk=old.pk).update(created_at=datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        recent = self.order(self.june, 2, 3)
+
+        res = self.client.get(export_url("orders"), {"output": "ndjson", "since": "2024-02-01T00:00"})
+        lines = [json.loads(line) for line in content(res).splitlines()]
+
+        self.assertEqual([(line["id"], line["tickets"]) for line in lines], [(recent.id, 2)])
+
+    def test_invalid_params(self):
+        res = self.client.get(export_url("flights"), {"since": "yesterday", "output": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(res.data), {"since", "output"})
+        self.assertEqual(self.client.get(export_url("users")).status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(EXPORT_CHUNK_SIZE=1)
+    def test_streamed_in_chunks(self):
+        res = self.client.get(export_url("flights"))
+
+        chunks = list(res.streaming_content)
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(b"".join(chunks).count(b"\n"), 3)
+
+
+class ExportCommandTests(TestCase):
+    def setUp(self):
+        self.flight = sample_flight(
+            departure_time="2024-06-02 14:00:00+00:00", arrival_time="2024-06-02 18:00:00+00:00"
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "flights.csv.gz")
+
+    def test_writes_file(self):
+        out = StringIO()
+
+        call_command("export", "flights", "--gzip", "--since", "2024-06-02", output=self.path, stdout=out)
+
+        with gzip.open(self.path, "rt") as file:
+            rows = list(csv.reader(file))
+        self.assertEqual([row[0] for row in rows], ["id", str(self.flight.id)])
+        self.assertIn("Exported flights", out.getvalue())
+
+    def test_invalid_bound(self):
+        with self.assertRaisesMessage(CommandError, "Expected a date"):
+            call_command("export", "flights", until="soon", output=self.path, stdout=StringIO())
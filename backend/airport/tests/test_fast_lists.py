@@ -0,0 +1,162 @@
+import datetime
+import decimal
+import uuid
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from airport import renderers
+from airport.models import Crew, Flight, Type
+from airport.renderers import FastJSONRenderer
+from airport.serializers import FlightSerializer
+from airport.tests.test_airport_api import sample_airplane, sample_airport, sample_route
+
+FLIGHT_URL = reverse("airport:flight-list")
+AIRPORT_URL = reverse("airport:airport-list")
+AIRPLANE_URL = reverse("airport:airplane-list")
+ROUTE_URL = reverse("airport:route-list")
+
+
+class FastListEquivalenceTests(TestCase):
+    """The fast read path renders the same bytes as the serializers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("admin@test.com", "testpass", is_staff=True)
+        boeing, wide = Type.objects.create(name="Boeing"), Type.objects.create(name="Wide body")
+        lviv = sample_airport(name="Lviv \u2028 Danylo Halytskyi", closest_big_city="Львів")
+        cls.routes = [sample_route(), sample_route(destination=lviv, distance=1200)]
+        cls.airplanes = [
+            sample_airplane(),
+            sample_airplane(
+                name="Airbus A320",
+                rows=25,
+                image="upload/airplanes/a320.jpg",
+                image_variants={
+                    "source": "upload/airplanes/a320.jpg",
+                    "variants": {
+                        "thumbnail": {"width": 320, "height": 200, "webp": "upload/a.webp", "jpeg": "upload/a.jpg"}
+                    },
+                },
+            ),
+            sample_airplane(name="Stale variants", image="upload/airplanes/new.jpg", image_variants={"source": "old"}),
+        ]
+        cls.airplanes[0].types.set([wide, boeing])
+        cls.airplanes[1].types.set([boeing])
+        crew = [Crew.objects.create(first_name=f"Pilot{number}", last_name="Ш") for number in range(3)]
+
+        start = datetime.datetime(2025, 3, 1, 8, 0, 15, 250000, tzinfo=datetime.timezone.utc)
+        for number in range(12):
+            flight = Flight.objects.create(
+                route=cls.routes[number % 2],
+                airplane=cls.airplanes[number % 3],
+                departure_time=start + datetime.timedelta(hours=number * 7),
+                arrival_time=start + datetime.timedelta(hours=number * 7 + 2),
+                seats_sold=number,
+            )
+            flight.crew.set(crew[: number % 4])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, params, fast):
+        cache.clear()
+        with override_settings(FAST_LISTS=fast), CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, len(queries)
+
+    def assert_same_response(self, url, params=None):
+        expected, serializer_queries = self.get(url, params, fast=False)
+        res, fast_queries = self.get(url, params, fast=True)
+
+        self.assertEqual(res.content, expected.content)
+        self.assertLessEqual(fast_queries, serializer_queries)
+        return res
+
+    def test_flights(self):
+        with mock.patch.object(FlightSerializer, "to_representation", side_effect=AssertionError):
+            self.get(FLIGHT_URL, None, fast=True)
+
+        res = self.assert_same_response(FLIGHT_URL)
+
+        self.assertEqual(len(res.data["results"]), 12)
+        self.assertIn(b'"departure_time":"2025-03-01T08:00:15.250000Z"', res.content)
+
+    def test_flight_pages(self):
+        res = self.assert_same_response(FLIGHT_URL, {"page_size": 5, "route": self.routes[1].id})
+
+        self.assertEqual(len(res.data["results"]), 5)
+        self.assert_same_response(res.data["next"])
+
+    def test_flight_searches(self):
+        self.assert_same_response(FLIGHT_URL, {"departure_date": "2025-03-02"})
+        self.assert_same_response(FLIGHT_URL, {"min_available": 175, "source": self.routes[1].source_id})
+        self.assert_same_response(FLIGHT_URL, {"airplane_type": Type.objects.get(name="Boeing").id})
+
+    def test_airports(self):
+        res = self.assert_same_response(AIRPORT_URL)
+
+        self.assertIn(b"\\u2028", res.content)
+
+    def test_airplanes(self):
+        res = self.assert_same_response(AIRPLANE_URL)
+
+        self.assertIsNotNone(res.data[1]["thumbnail"])
+        self.assert_same_response(AIRPLANE_URL, {"types": "Boeing,Wide body"})
+
+    def test_routes(self):
+        self.assert_same_response(ROUTE_URL)
+
+    def test_empty_lists(self):
+        self.assert_same_response(FLIGHT_URL, {"departure_date": "2030-01-01"})
+        self.assert_same_response(AIRPLANE_URL, {"name": "missing"})
+
+    def test_fields_use_serializers(self):
+        res, _ = self.get(FLIGHT_URL, {"fields": "id"}, fast=True)
+
+        self.assertEqual(list(res.data["results"][0]), ["id"])
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    data = {
+        "id": 1,
+        "name": "Kyiv \u2028 Boryspil \u2029 Ї",
+        "departure": datetime.datetime(2025, 3, 1, 8, 0, 0, 123456, tzinfo=datetime.timezone.utc),
+        "date": datetime.date(2025, 3, 1),
+        "time": datetime.time(8, 30),
+        "duration": datetime.timedelta(hours=2),
+        "price": decimal.Decimal("10.50"),
+        "uuid": uuid.UUID(int=1),
+        "lazy": gettext_lazy("This field is required."),
+        "nested": [{"empty": None, "flag": True, "ratio": 0.25}, (1, 2)],
+        2: "non-string key",
+    }
+
+    def test_same_bytes_as_json_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indent_and_missing_orjson(self):
+        for media_type in ("application/json; indent=2", "application/json"):
+            with mock.patch.object(renderers, "orjson", None):
+                self.assertEqual(
+                    FastJSONRenderer().render(self.data, media_type), JSONRenderer().render(self.data, media_type)
+                )
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, "application/json; indent=2"),
+            JSONRenderer().render(self.data, "application/json; indent=2"),
+        )
+
+    def test_none(self):
+        self.assertEqual(FastJSONRenderer().render(None), b"")
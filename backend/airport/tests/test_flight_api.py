@@ -0,0 +1,270 @@
+import base64
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.management.commands.bench_flight_search import uses_sequential_scan
+from airport.models import Flight, Order, Ticket, Type
+from airport.seatmap import SeatMap
+from airport.tests.test_airport_api import sample_flight, sample_airplane
+
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+def seats_url(flight_id):
+    return reverse("airport:flight-seats", args=(flight_id,))
+
+
+class SeatMapTests(TestCase):
+    def test_bitmap_layout(self):
+        seat_map = SeatMap(2, 6, taken=[(1, 1), (2, 6)])
+
+        self.assertEqual(seat_map.taken, 2)
+        self.assertEqual(bytes(seat_map.bits), bytes([0b10000000, 0b00010000]))
+        self.assertEqual(seat_map.to_rle(), [0, 1, 10, 1])
+
+    def test_out_of_bounds_seats_ignored(self):
+        seat_map = SeatMap(2, 2, taken=[(3, 1), (1, 3), (1, 1), (1, 1)])
+
+        self.assertEqual(seat_map.taken, 1)
+
+
+class FlightSeatsApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.flight = sample_flight(airplane=sample_airplane(rows=60, seats_in_row=10))
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=2)
+        Ticket.objects.create(flight=self.flight, order=order, row=60, seat=10)
+
+    def test_seats_public_base64(self):
+        with self.assertNumQueries(3):
+            res = self.client.get(seats_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 60)
+        self.assertEqual(res.data["seats_in_row"], 10)
+        self.assertEqual(res.data["taken"], 2)
+
+        bits = base64.b64decode(res.data["seats"])
+        self.assertEqual(len(bits), 75)
+        self.assertEqual(bits[0], 0b01000000)
+        self.assertEqual(bits[-1], 0b00000001)
+
+    def test_seats_rle_and_json(self):
+        res = self.client.get(seats_url(self.flight.id), {"encoding": "rle"})
+        self.assertEqual(res.data["seats"], [1, 1, 597, 1])
+
+        res = self.client.get(seats_url(self.flight.id), {"encoding": "json"})
+        self.assertTrue(res.data["seats"][0][1])
+        self.assertFalse(res.data["seats"][0][0])
+        self.assertTrue(res.data["seats"][59][9])
+
+    def test_invalid_encoding(self):
+        res = self.client.get(seats_url(self.flight.id), {"encoding": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_flight(self):
+        res = self.client.get(seats_url(self.flight.id + 100))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FlightSeatsSoldTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(airplane=sample_airplane(rows=2, seats_in_row=2))
+
+    def test_order_create_increments_seats_sold(self):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "flight": self.flight.id},
+                {"row": 1, "seat": 2, "flight": self.flight.id},
+            ]
+        }
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 2)
+        self.assertEqual(self.flight.tickets_available, 2)
+
+    def test_deleting_tickets_releases_seats_sold(self):
+        order = Order.objects.create(user=self.user)
+        for seat in (1, 2):
+            Ticket.objects.create(flight=self.flight, order=order, row=1, seat=seat)
+        Flight.objects.filter(pk=self.flight.pk).update(seats_sold=2)
+
+        order.tickets.first().delete()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 1)
+
+        order.delete()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 0)
+        self.assertEqual(self.flight.tickets_available, 4)
+
+    def test_ticket_saves_outside_orders_count_seats_sold(self):
+        other_flight = sample_flight(airplane=self.flight.airplane)
+        order = Order.objects.create(user=self.user)
+        tickets = [Ticket.objects.create(flight=self.flight, order=order, row=1, seat=seat) for seat in (1, 2)]
+
+        tickets[0].flight = other_flight
+        tickets[0].save()
+        tickets[1].save()
+        self.flight.refresh_from_db()
+        other_flight.refresh_from_db()
+        self.assertEqual((self.flight.seats_sold, other_flight.seats_sold), (1, 1))
+
+        tickets[1].delete()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, self.flight.tickets.count())
+
+    def test_sync_seats_sold_command(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=self.flight, order=order, row=2, seat=2)
+        Flight.objects.filter(pk=self.flight.pk).update(seats_sold=3)
+        empty_flight = sample_flight()
+        Flight.objects.filter(pk=empty_flight.pk).update(seats_sold=5)
+
+        call_command("sync_seats_sold", stdout=StringIO())
+
+        self.flight.refresh_from_db()
+        empty_flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 1)
+        self.assertEqual(empty_flight.seats_sold, 0)
+
+    def test_filter_flights_by_min_available(self):
+        Flight.objects.filter(pk=self.flight.pk).update(seats_sold=3)
+        roomy_flight = sample_flight()
+
+        res = self.client.get(FLIGHT_URL, {"min_available": 2})
+
+        ids = [flight["id"] for flight in res.data["results"]]
+        self.assertIn(roomy_flight.id, ids)
+        self.assertNotIn(self.flight.id, ids)
+
+    def test_invalid_min_available(self):
+        res = self.client.get(FLIGHT_URL, {"min_available": "abc"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FlightPaginationTests(TestCase):
+    def test_flights_cursor_paginated_by_departure(self):
+        late = sample_flight(departure_time="2024-06-03 10:00:00+00:00", arrival_time="2024-06-03 12:00:00+00:00")
+        early = sample_flight(departure_time="2024-06-01 10:00:00+00:00", arrival_time="2024-06-01 12:00:00+00:00")
+
+        res = APIClient().get(FLIGHT_URL, {"page_size": 1})
+
+        self.assertEqual([flight["id"] for flight in res.data["results"]], [early.id])
+        res = APIClient().get(res.data["next"])
+        self.assertEqual([flight["id"] for flight in res.data["results"]], [late.id])
+
+
+class FlightSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.morning = sample_flight(
+            departure_time="2024-06-02 08:00:00+00:00", arrival_time="2024-06-02 10:00:00+00:00"
+        )
+        self.late = sample_flight(
+            departure_time="2024-06-02 23:30:00+00:00", arrival_time="2024-06-03 01:00:00+00:00"
+        )
+        self.next_day = sample_flight(
+            departure_time="2024-06-03 08:00:00+00:00", arrival_time="2024-06-03 10:00:00+00:00"
+        )
+
+    def search(self, **params):
+        res = self.client.get(FLIGHT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [flight["id"] for flight in res.data["results"]]
+
+    def test_departure_date(self):
+        self.assertEqual(self.search(departure_date="2024-06-02"), [self.morning.id, self.late.id])
+
+    def test_departure_window(self):
+        self.assertEqual(
+            self.search(departure_from="2024-06-02T09:00:00Z", departure_to="2024-06-03T08:00:00Z"),
+            [self.late.id],
+        )
+        self.assertEqual(self.search(departure_from="2024-06-03"), [self.next_day.id])
+        self.assertEqual(self.search(departure_to="2024-06-02"), [self.morning.id, self.late.id])
+
+    def test_source_and_destination(self):
+        route = self.late.route
+
+        self.assertEqual(self.search(source=route.source_id), [self.late.id])
+        self.assertEqual(
+            self.search(source=route.source_id, destination=route.destination_id), [self.late.id]
+        )
+        self.assertEqual(self.search(source=route.destination_id), [])
+
+    def test_airplane_type(self):
+        airplane_type = Type.objects.create(name="Wide-body")
+        self.next_day.airplane.types.add(airplane_type)
+
+        self.assertEqual(self.search(airplane_type=airplane_type.id), [self.next_day.id])
+
+    def test_invalid_search(self):
+        res = self.client.get(FLIGHT_URL, {"departure_from": "soon", "source": "abc"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_impossible_dates(self):
+        for params in (
+            {"departure_from": "2024-02-30"},
+            {"departure_to": "2024-06-02T25:00:00"},
+            {"departure_date": "2024-02-30"},
+            {"departure_date": "tomorrow"},
+        ):
+            res = self.client.get(FLIGHT_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
+            self.assertIn(next(iter(params)), res.data)
+
+    def test_search_uses_indexes(self):
+        route = self.morning.route
+        searches = (
+            {"source": route.source_id, "destination": route.destination_id},
+            {"source": route.source_id},
+            {},
+        )
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # The tables are tiny, make the planner show which indexes it could use
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for search in searches:
+                plan = (
+                    Flight.objects.search(
+                        departure_from=self.morning.departure_time,
+                        departure_to=self.next_day.departure_time,
+                        **search,
+                    )
+                    .order_by("departure_time", "id")
+                    .explain()
+                )
+                self.assertFalse(uses_sequential_scan(plan), plan)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+
+        call_command("bench_flight_search", flights=500, airports=10, routes=20, searches=2, stdout=out)
+
+        self.assertIn("All searches use indexes", out.getvalue())
+        self.assertEqual(Flight.objects.count(), 3)
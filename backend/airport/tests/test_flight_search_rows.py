@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import search_rows
+from airport.models import Flight, FlightSearchRow, Type
+from airport.schedule_import import ScheduleImporter
+from airport.seeding import AirportSeeder
+from airport.tests.test_airport_api import sample_airplane, sample_airport, sample_route
+
+SEARCH_URL = reverse("airport:flight-search")
+DEPARTURE = datetime(2025, 3, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def add_flight(route, airplane, hours=0):
+    departure = DEPARTURE + timedelta(hours=hours)
+    return Flight.objects.create(
+        route=route, airplane=airplane, departure_time=departure, arrival_time=departure + timedelta(hours=2)
+    )
+
+
+class FlightSearchRowSyncTests(TestCase):
+    def setUp(self):
+        self.route = sample_route()
+        self.airplane = sample_airplane()
+        self.flight = add_flight(self.route, self.airplane)
+
+    def row(self):
+        return FlightSearchRow.objects.get(flight=self.flight)
+
+    def test_flight_create_and_update(self):
+        row = self.row()
+        self.assertEqual(
+            (row.route_id, row.source_name, row.destination_name, row.source_city, row.departure_time),
+            (self.route.id, "Source Airport", "Destination Airport", "Sample City", DEPARTURE),
+        )
+        self.assertEqual((row.airplane_name, row.capacity, row.type_names), ("Boeing 747", 180, []))
+
+        self.flight.departure_time += timedelta(hours=1)
+        self.flight.save()
+
+        self.assertEqual(self.row().departure_time, DEPARTURE + timedelta(hours=1))
+
+    def test_flight_delete(self):
+        self.flight.delete()
+
+        self.assertFalse(FlightSearchRow.objects.exists())
+
+    def test_airport_and_route_changes(self):
+        source = self.route.source
+        source.name, source.closest_big_city = "Boryspil", "Kyiv"
+        source.save()
+        lviv = sample_airport(name="Lviv", closest_big_city="Lviv")
+        self.route.destination = lviv
+        self.route.save()
+
+        row = self.row()
+        self.assertEqual((row.source_name, row.source_city), ("Boryspil", "Kyiv"))
+        self.assertEqual((row.destination_id, row.destination_name), (lviv.id, "Lviv"))
+
+    def test_airplane_and_type_changes(self):
+        wide, boeing = Type.objects.create(name="Wide body"), Type.objects.create(name="Boeing")
+        self.airplane.types.add(wide, boeing)
+        self.assertEqual(self.row().type_names, ["Boeing", "Wide body"])
+
+        self.airplane.rows = 10
+        self.airplane.save()
+        wide.name = "Widebody"
+        wide.save()
+        self.assertEqual((self.row().capacity, self.row().type_names), (60, ["Boeing", "Widebody"]))
+
+        boeing.airplane_set.clear()
+        self.assertEqual(self.row().type_names, ["Widebody"])
+        wide.delete()
+        self.assertEqual(self.row().type_names, [])
+
+    def test_bulk_writers(self):
+        ScheduleImporter().run(
+            [
+                {
+                    "route": self.route.id,
+                    "airplane": self.airplane.id,
+                    "departure_time": "2025-04-01T08:00:00Z",
+                    "arrival_time": "2025-04-01T10:00:00Z",
+                }
+            ]
+        )
+        AirportSeeder().seed(airports=3, airplanes=2, flights=20, crew=3, users=0, orders=0)
+
+        self.assertEqual(FlightSearchRow.objects.count(), Flight.objects.count())
+
+    def test_rebuild_command(self):
+        add_flight(self.route, self.airplane, hours=5)
+        FlightSearchRow.objects.filter(flight=self.flight).update(source_name="Stale")
+        FlightSearchRow.objects.exclude(flight=self.flight).delete()
+        out = StringIO()
+
+        call_command("rebuild_flight_search", batch_size=1, stdout=out)
+
+        self.assertIn("Created 2 rows", out.getvalue())
+        self.assertEqual(self.row().source_name, "Source Airport")
+        self.assertEqual(search_rows.rebuild(), 2)
+
+
+class FlightSearchApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.route = sample_route()
+        self.airplane = sample_airplane()
+        self.other = sample_route(source=self.route.destination, destination=self.route.source)
+        self.flights = [add_flight(self.route, self.airplane, hours) for hours in (30, 0, 5)]
+        self.return_flight = add_flight(self.other, self.airplane, hours=1)
+
+    def search(self, **params):
+        res = self.client.get(SEARCH_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return res.data
+
+    def test_public_search(self):
+        data = self.search(source=self.route.source_id, destination=self.route.destination_id)
+
+        self.assertEqual(
+            [row["flight"] for row in data["results"]], [self.flights[1].id, self.flights[2].id, self.flights[0].id]
+        )
+        self.assertEqual(data["results"][0]["source_name"], "Source Airport")
+        self.assertEqual(data["results"][0]["capacity"], 180)
+
+    def test_departure_filters(self):
+        data = self.search(source=self.route.source_id, departure_date="2025-03-01")
+        self.assertEqual([row["flight"] for row in data["results"]], [self.flights[1].id, self.flights[2].id])
+
+        data = self.search(destination=self.route.source_id, departure_from="2025-03-01T00:30:00Z")
+        self.assertEqual(len(data["results"]), 1)
+
+        data = self.search(departure_from="2025-03-01T08:30:00Z", departure_to="2025-03-01")
+        self.assertEqual([row["flight"] for row in data["results"]], [self.return_flight.id, self.flights[2].id])
+
+    def test_pages(self):
+        data = self.search(page_size=2)
+
+        self.assertEqual(len(data["results"]), 2)
+        self.assertEqual(len(self.client.get(data["next"]).data["results"]), 2)
+
+    def test_invalid_airport(self):
+        for params in ({"source": "Kyiv"}, {"route": "abc"}):
+            res = self.client.get(SEARCH_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
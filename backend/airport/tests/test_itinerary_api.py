@@ -0,0 +1,120 @@
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import Airport, Flight, Route
+from airport.tests.test_airport_api import sample_airplane
+from airport.timetable import timetable
+
+ITINERARY_URL = reverse("airport:itinerary-list")
+
+
+class ItineraryApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.day = timezone.now().date() + timedelta(days=10)
+        self.airplane = sample_airplane()
+        self.kyiv, self.warsaw, self.berlin, self.paris = (
+            Airport.objects.create(name=name, closest_big_city=name)
+            for name in ("Kyiv", "Warsaw", "Berlin", "Paris")
+        )
+        self.direct = self.flight(self.kyiv, self.paris, "09:00", "13:00", distance=2000)
+        self.first_leg = self.flight(self.kyiv, self.warsaw, "06:00", "07:00", distance=700)
+        self.second_leg = self.flight(self.warsaw, self.paris, "08:00", "10:00", distance=1400)
+        self.tight_leg = self.flight(self.warsaw, self.paris, "07:20", "09:00", distance=1400)
+        timetable.build()
+
+    def at(self, hhmm, days=0):
+        return datetime.combine(
+            self.day + timedelta(days=days), time.fromisoformat(hhmm), tzinfo=timezone.get_current_timezone()
+        )
+
+    def flight(self, source, destination, departure, arrival, distance=1000):
+        route, _ = Route.objects.get_or_create(source=source, destination=destination, defaults={"distance": distance})
+        return Flight.objects.create(
+            route=route,
+            airplane=self.airplane,
+            departure_time=self.at(departure),
+            arrival_time=self.at(arrival),
+        )
+
+    def search(self, **params):
+        params = {"from": self.kyiv.id, "to": self.paris.id, "date": self.day.isoformat(), **params}
+        return self.client.get(ITINERARY_URL, params)
+
+    def test_itineraries_ranked_by_duration(self):
+        res = self.search()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [[leg["flight"] for leg in itinerary["legs"]] for itinerary in res.data],
+            [[self.direct.id], [self.first_leg.id, self.second_leg.id]],
+        )
+        self.assertEqual(res.data[0]["duration_minutes"], 240)
+        self.assertEqual(res.data[1]["distance"], 2100)
+        self.assertEqual(res.data[1]["legs"][0]["destination_name"], "Warsaw")
+
+    def test_min_connection_time(self):
+        res = self.search(min_connection=10)
+
+        self.assertIn(
+            [self.first_leg.id, self.tight_leg.id],
+            [[leg["flight"] for leg in itinerary["legs"]] for itinerary in res.data],
+        )
+
+    def test_three_legs(self):
+        self.flight(self.warsaw, self.berlin, "08:00", "09:00")
+        last_leg = self.flight(self.berlin, self.paris, "10:00", "11:00")
+        timetable.build()
+
+        res = self.search(max_legs=3)
+        itineraries = [[leg["flight"] for leg in itinerary["legs"]] for itinerary in res.data]
+        self.assertIn(last_leg.id, itineraries[-1])
+
+        res = self.search(max_legs=2)
+        self.assertEqual(len(res.data), 2)
+
+    def test_no_query_per_search(self):
+        with self.assertNumQueries(0):
+            self.search()
+
+    def test_index_updated_on_flight_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.direct.departure_time = self.at("09:00", days=1)
+            self.direct.arrival_time = self.at("13:00", days=1)
+            self.direct.save()
+            self.second_leg.delete()
+
+        res = self.search(min_connection=10)
+
+        self.assertEqual(
+            [[leg["flight"] for leg in itinerary["legs"]] for itinerary in res.data],
+            [[self.first_leg.id, self.tight_leg.id]],
+        )
+
+    def test_rebuilt_once_too_old(self):
+        # Moved by another worker process, whose version bump a process-local cache doesn't share
+        Flight.objects.filter(pk=self.direct.pk).update(departure_time=self.at("09:00", days=-30))
+        self.assertEqual(self.search().data[0]["legs"][0]["flight"], self.direct.id)
+
+        with self.settings(IN_MEMORY_INDEX_MAX_AGE=0):
+            res = self.search()
+
+        self.assertEqual(
+            [[leg["flight"] for leg in itinerary["legs"]] for itinerary in res.data],
+            [[self.first_leg.id, self.second_leg.id]],
+        )
+
+    def test_invalid_search(self):
+        res = self.client.get(ITINERARY_URL, {"from": self.kyiv.id, "date": "tomorrow"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("to", res.data)
+        self.assertIn("date", res.data)
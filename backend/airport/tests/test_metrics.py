@@ -0,0 +1,139 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.metrics import registry
+from airport.tests.test_airport_api import sample_flight
+
+METRICS_URL = reverse("metrics")
+METRICS_AUTHORIZATION = "Bearer secret"
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+def sample(text, name, view, method="GET", status_code=200):
+    match = re.search(
+        rf'^{name}{{view="{re.escape(view)}",method="{method}",status="{status_code}"}} (\S+)$', text, re.MULTILINE
+    )
+    return float(match.group(1)) if match else None
+
+
+@override_settings(METRICS_DIR=None, METRICS_TOKEN="secret")
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.client = APIClient()
+
+    def scrape(self, **headers):
+        res = self.client.get(METRICS_URL, **{"HTTP_AUTHORIZATION": METRICS_AUTHORIZATION, **headers})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return res.content.decode()
+
+    def test_latency_labeled_by_viewset_action(self):
+        sample_flight()
+        self.client.get(FLIGHT_URL)
+        self.client.get(FLIGHT_URL)
+
+        text = self.scrape()
+
+        self.assertEqual(sample(text, "airport_http_request_duration_seconds_count", "FlightViewSet.list"), 2)
+        self.assertIn(
+            'airport_http_request_duration_seconds_bucket'
+            '{view="FlightViewSet.list",method="GET",status="200",le="+Inf"} 2',
+            text,
+        )
+        self.assertGreater(sample(text, "airport_http_response_size_bytes_sum", "FlightViewSet.list"), 0)
+        self.assertIn('airport_response_cache_requests_total{result="hit"} 1', text)
+
+    def test_queries_recorded(self):
+        flight = sample_flight()
+        user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(user)
+
+        self.client.post(ORDER_URL, {"tickets": [{"row": 1, "seat": 1, "flight": flight.id}]}, format="json")
+        text = self.scrape()
+
+        label = ("OrderViewSet.create", "POST", 201)
+        self.assertGreater(sample(text, "airport_http_request_db_queries_sum", *label), 0)
+        self.assertIsNotNone(sample(text, "airport_http_request_db_duration_seconds_sum", *label))
+
+    async def test_async_view_queries_recorded(self):
+        await self.async_client.get(reverse("airport:async-flight-seats", args=(1,)))
+
+        text = (await self.async_client.get(METRICS_URL, AUTHORIZATION=METRICS_AUTHORIZATION)).content.decode()
+
+        label = ("airport.async_views.flight_seats", "GET", 404)
+        self.assertEqual(sample(text, "airport_http_request_db_queries_sum", *label), 1)
+
+    def test_unmatched_and_error_statuses(self):
+        self.client.get("/no-such-page/")
+        self.client.get(reverse("airport:flight-detail", args=(1,)))
+
+        text = self.scrape()
+
+        self.assertEqual(sample(text, "airport_http_request_duration_seconds_count", "unmatched", status_code=404), 1)
+        self.assertEqual(
+            sample(text, "airport_http_request_duration_seconds_count", "FlightViewSet.retrieve", status_code=401), 1
+        )
+
+    def test_worker_snapshots_merged(self):
+        sample_flight()
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            self.client.get(FLIGHT_URL)
+            registry.flush()
+            with open(os.path.join(directory, f"metrics-{os.getpid()}.json")) as own:
+                snapshot = json.load(own)
+            with open(os.path.join(directory, "metrics-1.json"), "w") as other:
+                json.dump(snapshot, other)
+
+            text = self.scrape()
+
+        self.assertEqual(sample(text, "airport_http_request_duration_seconds_count", "FlightViewSet.list"), 2)
+
+    def test_exited_worker_snapshots_retired(self):
+        sample_flight()
+        exited = subprocess.Popen([sys.executable, "-c", ""])
+        exited.wait()
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            self.client.get(FLIGHT_URL)
+            registry.flush()
+            with open(os.path.join(directory, f"metrics-{os.getpid()}.json")) as own:
+                snapshot = json.load(own)
+            for pid in (exited.pid, "retired"):
+                with open(os.path.join(directory, f"metrics-{pid}.json"), "w") as other:
+                    json.dump(snapshot, other)
+
+            registry.flush()
+            text = self.scrape()
+            files = sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+
+        self.assertEqual(files, [f"metrics-{os.getpid()}.json", "metrics-retired.json"])
+        self.assertEqual(sample(text, "airport_http_request_duration_seconds_count", "FlightViewSet.list"), 3)
+
+    def test_token_required(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(
+            self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer wrong").status_code, status.HTTP_403_FORBIDDEN
+        )
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_staff_only_without_token(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_login(get_user_model().objects.create_user("user@test.com", "testpass"))
+        self.assertEqual(self.client.get(METRICS_URL).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_login(get_user_model().objects.create_user("admin@test.com", "testpass", is_staff=True))
+        self.scrape(HTTP_AUTHORIZATION="")
@@ -0,0 +1,167 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import Order, Ticket
+from airport.tests.test_airport_api import sample_flight
+
+ORDER_URL = reverse("airport:order-list")
+
+
+def tickets_payload(flight, seats):
+    return {"tickets": [{"row": row, "seat": seat, "flight": flight.id} for row, seat in seats]}
+
+
+class OrderCreateApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def test_query_count_does_not_grow_with_tickets(self):
+        with CaptureQueriesContext(connection) as single:
+            res = self.client.post(ORDER_URL, tickets_payload(self.flight, [(1, 1)]), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        group = [(2, seat) for seat in range(1, 7)] + [(3, 1), (3, 2), (3, 3)]
+        with CaptureQueriesContext(connection) as grouped:
+            res = self.client.post(ORDER_URL, tickets_payload(self.flight, group), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(single), len(grouped))
+        self.assertEqual(Ticket.objects.filter(flight=self.flight).count(), 10)
+
+    def test_tickets_for_several_flights(self):
+        other_flight = sample_flight()
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "flight": self.flight.id},
+                {"row": 1, "seat": 1, "flight": other_flight.id},
+            ]
+        }
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 2)
+
+    def test_taken_seat_reported_per_ticket(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=2)
+
+        res = self.client.post(ORDER_URL, tickets_payload(self.flight, [(1, 1), (1, 2)]), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0], {})
+        self.assertIn("non_field_errors", res.data["tickets"][1])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_duplicate_seat_in_one_order(self):
+        res = self.client.post(ORDER_URL, tickets_payload(self.flight, [(1, 1), (1, 1)]), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0], {})
+        self.assertIn("non_field_errors", res.data["tickets"][1])
+
+    def test_seat_out_of_airplane_bounds(self):
+        res = self.client.post(ORDER_URL, tickets_payload(self.flight, [(31, 1)]), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_unknown_flight(self):
+        payload = {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id + 100}]}
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("flight", res.data["tickets"][0])
+
+
+class OrderListApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+
+    def create_orders(self, count):
+        for _ in range(count):
+            order = Order.objects.create(user=self.user)
+            for seat in (1, 2):
+                flight = sample_flight()
+                flight.crew.create(first_name="Jane", last_name="Doe")
+                flight.airplane.types.create(name=f"Type {flight.id}")
+                Ticket.objects.create(flight=flight, order=order, row=1, seat=seat)
+
+    def count_list_queries(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ORDER_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_list_query_count_is_constant(self):
+        self.create_orders(1)
+        few = self.count_list_queries()
+        self.create_orders(9)
+        many = self.count_list_queries()
+
+        self.assertEqual(few, many)
+        self.assertLessEqual(many, 5)
+
+    def test_compact_query_count_is_constant(self):
+        self.create_orders(1)
+        few = self.count_list_queries({"view": "compact"})
+        self.create_orders(9)
+        many = self.count_list_queries({"view": "compact"})
+
+        self.assertEqual(few, many)
+        self.assertLessEqual(many, 3)
+
+    def test_compact_view(self):
+        self.create_orders(1)
+
+        res = self.client.get(ORDER_URL, {"view": "compact"})
+
+        ticket = res.data["results"][0]["tickets"][0]
+        self.assertEqual(
+            set(ticket), {"id", "flight", "source_name", "destination_name", "departure_time", "row", "seat"}
+        )
+        self.assertEqual(ticket["source_name"], "Source Airport")
+
+    def test_only_own_orders_listed(self):
+        self.create_orders(1)
+        other_user = get_user_model().objects.create_user("other@test.com", "testpass")
+        Order.objects.create(user=other_user)
+
+        res = self.client.get(ORDER_URL)
+
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_cursor_pagination(self):
+        orders = [Order.objects.create(user=self.user) for _ in range(3)]
+
+        res = self.client.get(ORDER_URL, {"page_size": 2})
+        self.assertNotIn("count", res.data)
+        self.assertEqual([order["id"] for order in res.data["results"]], [orders[2].id, orders[1].id])
+
+        res = self.client.get(res.data["next"])
+        self.assertEqual([order["id"] for order in res.data["results"]], [orders[0].id])
+        self.assertIsNone(res.data["next"])
+
+    def test_legacy_page_number_pagination(self):
+        for _ in range(11):
+            Order.objects.create(user=self.user)
+
+        res = self.client.get(ORDER_URL, {"page": 2})
+
+        self.assertEqual(res.data["count"], 11)
+        self.assertEqual(len(res.data["results"]), 1)
+
+        res = self.client.get(ORDER_URL, {"pagination": "page"})
+        self.assertEqual(res.data["count"], 11)
@@ -0,0 +1,279 @@
+import itertools
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.models import Airport, Crew, Flight, Order, Ticket, Type
+from airport.response_cache import invalidate
+from airport.tests.test_airport_api import sample_airplane, sample_flight, sample_route
+from airport.timetable import timetable
+from airport.urls import router
+from airport.views import (
+    AirplaneViewSet,
+    AirportViewSet,
+    CrewViewSet,
+    FlightViewSet,
+    ItineraryViewSet,
+    OrderViewSet,
+    RouteViewSet,
+    TypeViewSet,
+)
+
+
+class QueryBudgetTestMixin:
+    """
+    assertQueryBudget runs an endpoint after growing its data to each of `sizes` and fails if the
+    number of queries changes with the data (an N+1) or exceeds the budget declared in the
+    viewset's `query_budget`. Every measured request is preceded by an unmeasured one, so lazily
+    built in-memory indexes are warm, and the response cache is invalidated in between.
+    """
+
+    sizes = (2, 12)
+
+    def authenticate(self, user):
+        """Authenticate with a JWT, so the user lookup is counted like in production"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+    def assertQueryBudget(self, viewset, action, request, grow):
+        budget = viewset.query_budget[action]
+        counts = []
+        for size in self.sizes:
+            grow(size)
+            request()
+            invalidate("airports", "airplanes", "flights")
+            with CaptureQueriesContext(connection) as queries:
+                response = request()
+            self.assertLess(response.status_code, 400, getattr(response, "data", response))
+            counts.append(len(queries))
+
+        label = f"{viewset.__name__}.{action}"
+        sql = "\n".join(query["sql"] for query in queries.captured_queries)
+        self.assertEqual(len(set(counts)), 1, f"{label} queries grow with data {self.sizes}: {counts}\n{sql}")
+        self.assertLessEqual(counts[-1], budget, f"{label} ran {counts[-1]} queries, budget {budget}\n{sql}")
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.admin = get_user_model().objects.create_user("admin@test.com", "testpass", is_staff=True)
+        self.counter = itertools.count()
+        self.departure = timezone.now() + timedelta(days=10)
+
+    def add_airports(self, size):
+        Airport.objects.bulk_create(
+            [Airport(name=f"Airport {next(self.counter)}", closest_big_city="City") for _ in range(size)]
+        )
+
+    def add_flights(self, size):
+        airplane = sample_airplane()
+        route = sample_route()
+        crew = Crew.objects.create(first_name="Ann", last_name="Lee")
+        for _ in range(size):
+            flight = Flight.objects.create(
+                route=route, airplane=airplane, departure_time=self.departure, arrival_time=self.departure
+            )
+            flight.crew.add(crew)
+
+    def test_every_viewset_has_list_budget(self):
+        for _, viewset, _ in router.registry:
+            self.assertIn("list", getattr(viewset, "query_budget", {}), viewset.__name__)
+
+    def test_airports(self):
+        self.assertQueryBudget(
+            AirportViewSet, "list", lambda: self.client.get(reverse("airport:airport-list")), self.add_airports
+        )
+        self.assertQueryBudget(
+            AirportViewSet,
+            "suggest",
+            lambda: self.client.get(reverse("airport:airport-suggest"), {"q": "airport"}),
+            self.add_airports,
+        )
+
+    def test_types(self):
+        self.authenticate(self.user)
+
+        self.assertQueryBudget(
+            TypeViewSet,
+            "list",
+            lambda: self.client.get(reverse("airport:type-list")),
+            lambda size: Type.objects.bulk_create([Type(name=f"Type {next(self.counter)}") for _ in range(size)]),
+        )
+
+    def test_routes(self):
+        self.authenticate(self.admin)
+
+        self.assertQueryBudget(
+            RouteViewSet,
+            "list",
+            lambda: self.client.get(reverse("airport:route-list")),
+            lambda size: [sample_route() for _ in range(size)],
+        )
+
+    def test_crew(self):
+        self.authenticate(self.admin)
+
+        self.assertQueryBudget(
+            CrewViewSet,
+            "list",
+            lambda: self.client.get(reverse("airport:crew-list")),
+            lambda size: Crew.objects.bulk_create([Crew(first_name="Ann", last_name="Lee") for _ in range(size)]),
+        )
+
+    def test_airplanes(self):
+        airplane = sample_airplane()
+
+        def add_types(size):
+            for _ in range(size):
+                sample_airplane().types.add(Type.objects.create(name=f"Type {next(self.counter)}"))
+                airplane.types.add(Type.objects.create(name=f"Type {next(self.counter)}"))
+
+        self.assertQueryBudget(
+            AirplaneViewSet, "list", lambda: self.client.get(reverse("airport:airplane-list")), add_types
+        )
+        self.assertQueryBudget(
+            AirplaneViewSet,
+            "retrieve",
+            lambda: self.client.get(reverse("airport:airplane-detail", args=(airplane.id,))),
+            add_types,
+        )
+
+    def test_flights(self):
+        self.assertQueryBudget(
+            FlightViewSet, "list", lambda: self.client.get(reverse("airport:flight-list")), self.add_flights
+        )
+
+    def test_flight_search(self):
+        self.assertQueryBudget(
+            FlightViewSet, "search", lambda: self.client.get(reverse("airport:flight-search")), self.add_flights
+        )
+
+    def test_flight_detail_and_seats(self):
+        flight = sample_flight()
+        seats = itertools.count()
+
+        def add_crew_and_tickets(size):
+            order = Order.objects.create(user=self.user)
+            for _ in range(size):
+                flight.crew.add(Crew.objects.create(first_name="Ann", last_name="Lee"))
+                row, seat = divmod(next(seats), 6)
+                Ticket.objects.create(flight=flight, order=order, row=row + 1, seat=seat + 1)
+
+        self.authenticate(self.admin)
+        self.assertQueryBudget(
+            FlightViewSet,
+            "retrieve",
+            lambda: self.client.get(reverse("airport:flight-detail", args=(flight.id,))),
+            add_crew_and_tickets,
+        )
+        self.assertQueryBudget(
+            FlightViewSet,
+            "seats",
+            lambda: self.client.get(reverse("airport:flight-seats", args=(flight.id,))),
+            add_crew_and_tickets,
+        )
+
+    def test_seat_holds(self):
+        flight = sample_flight()
+        held = []
+
+        def hold_more(size):
+            held.extend({"row": row, "seat": 1} for row in range(len(held) + 1, len(held) + size + 1))
+
+        self.authenticate(self.user)
+        self.assertQueryBudget(
+            FlightViewSet,
+            "holds",
+            lambda: self.client.post(
+                reverse("airport:flight-holds", args=(flight.id,)), {"seats": held}, format="json"
+            ),
+            hold_more,
+        )
+
+    def test_orders(self):
+        flights = [sample_flight() for _ in range(3)]
+        seats = itertools.count()
+
+        def add_orders(size):
+            for _ in range(size):
+                order = Order.objects.create(user=self.user)
+                for flight in flights:
+                    flight.crew.add(Crew.objects.create(first_name="Ann", last_name="Lee"))
+                    row, seat = divmod(next(seats), 6)
+                    Ticket.objects.create(flight=flight, order=order, row=row + 1, seat=seat + 1)
+
+        self.authenticate(self.user)
+        for params in ({}, {"view": "compact"}, {"page": 1}):
+            self.assertQueryBudget(
+                OrderViewSet, "list", lambda: self.client.get(reverse("airport:order-list"), params), add_orders
+            )
+
+    def test_order_create(self):
+        flights = [sample_flight() for _ in range(3)]
+        seats = itertools.count()
+
+        def new_order():
+            tickets = []
+            for index in range(self.tickets_per_order):
+                row, seat = divmod(next(seats), 6)
+                tickets.append({"row": row + 1, "seat": seat + 1, "flight": flights[index % len(flights)].id})
+            return self.client.post(reverse("airport:order-list"), {"tickets": tickets}, format="json")
+
+        def set_tickets_per_order(size):
+            self.tickets_per_order = size
+
+        self.authenticate(self.user)
+        self.assertQueryBudget(OrderViewSet, "create", new_order, set_tickets_per_order)
+
+    def test_itineraries(self):
+        def search():
+            return self.client.get(
+                reverse("airport:itinerary-list"),
+                {"from": route.source_id, "to": route.destination_id, "date": self.departure.date().isoformat()},
+            )
+
+        route = sample_route()
+        airplane = sample_airplane()
+
+        def add_flights(size):
+            Flight.objects.bulk_create(
+                [
+                    Flight(
+                        route=route,
+                        airplane=airplane,
+                        departure_time=self.departure,
+                        arrival_time=self.departure + timedelta(hours=2),
+                    )
+                    for _ in range(size)
+                ]
+            )
+            timetable.invalidate()
+
+        self.assertQueryBudget(ItineraryViewSet, "list", search, add_flights)
+
+
+@override_settings(QUERY_BUDGET_LOG=True)
+class QueryBudgetLogTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        sample_flight()
+
+    def test_violation_logged(self):
+        with mock.patch.object(FlightViewSet, "query_budget", {"list": 1}):
+            with self.assertLogs("airport.metrics", "WARNING") as logs:
+                self.client.get(reverse("airport:flight-list"))
+
+        self.assertIn("FlightViewSet.list /api/airport/flights/ ran 3 queries, over its budget of 1", logs.output[0])
+
+    def test_within_budget_not_logged(self):
+        with self.assertNoLogs("airport.metrics", "WARNING"):
+            self.client.get(reverse("airport:flight-list"))
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import Airport, Flight, Type
+from airport.response_cache import stats
+from airport.tests.test_airport_api import sample_airplane, sample_airport, sample_flight
+
+AIRPORT_URL = reverse("airport:airport-list")
+AIRPLANE_URL = reverse("airport:airplane-list")
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+CACHE_STATS_URL = reverse("airport:cache-stats")
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_second_request_served_from_cache(self):
+        sample_airport()
+        first = self.client.get(AIRPORT_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(stats(), {"hits": 1, "misses": 1})
+
+    def test_query_parameters_normalized(self):
+        sample_airplane()
+        self.client.get(AIRPLANE_URL, {"name": "Boeing", "types": "Civil"})
+
+        res = self.client.get(f"{AIRPLANE_URL}?types=Civil&name=Boeing")
+
+        self.assertEqual(res["X-Cache"], "HIT")
+
+    def test_conditional_get(self):
+        sample_airport()
+        res = self.client.get(AIRPORT_URL)
+
+        res = self.client.get(AIRPORT_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+    def test_conditional_get_after_change(self):
+        airport = sample_airport()
+        etag = self.client.get(AIRPORT_URL)["ETag"]
+
+        airport.name = "Renamed Airport"
+        airport.save()
+        res = self.client.get(AIRPORT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]["name"], "Renamed Airport")
+
+    def test_invalidated_by_related_models(self):
+        flight = sample_flight()
+        self.client.get(FLIGHT_URL)
+
+        Airport.objects.filter(pk=flight.route.source_id).get().save()
+        self.assertEqual(self.client.get(FLIGHT_URL)["X-Cache"], "MISS")
+
+        flight.airplane.types.add(Type.objects.create(name="Wide-body"))
+        self.assertEqual(self.client.get(FLIGHT_URL)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(FLIGHT_URL)["X-Cache"], "HIT")
+
+    def test_unrelated_namespace_kept(self):
+        sample_airport()
+        self.client.get(AIRPORT_URL)
+
+        sample_airplane()
+
+        self.assertEqual(self.client.get(AIRPORT_URL)["X-Cache"], "HIT")
+
+    def test_order_invalidates_flights(self):
+        flight = sample_flight()
+        self.client.get(FLIGHT_URL)
+        user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(user)
+        self.client.post(ORDER_URL, {"tickets": [{"row": 1, "seat": 1, "flight": flight.id}]}, format="json")
+
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"][0]["seats_sold"], 1)
+        self.assertEqual(Flight.objects.get().seats_sold, 1)
+
+    def test_stats_admin_only(self):
+        user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get(CACHE_STATS_URL).status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        res = self.client.get(CACHE_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data), {"hits", "misses"})
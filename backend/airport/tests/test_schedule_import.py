@@ -0,0 +1,245 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Crew, Flight, Route
+from airport.schedule_import import ScheduleImporter
+from airport.seeding import RowWriter
+from airport.tests.test_airport_api import sample_airplane, sample_airport, sample_route
+
+IMPORT_URL = reverse("airport:flight-import-schedule")
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+class ScheduleImportTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.route = sample_route()
+        self.airplane = sample_airplane()
+        self.lviv = sample_airport(name="Lviv")
+        self.crew = [Crew.objects.create(first_name="Crew", last_name=str(number)) for number in range(3)]
+
+    def flight(self, day=1, **params):
+        row = {
+            "route": self.route.id,
+            "airplane": self.airplane.id,
+            "departure_time": f"2025-03-{day:02d}T08:00:00Z",
+            "arrival_time": f"2025-03-{day:02d}T10:30:00Z",
+        }
+        row.update(params)
+        return row
+
+    def new_route_flight(self, day=1, **params):
+        params = {"source": self.route.source_id, "destination": self.lviv.id, "distance": 700, **params}
+        flight = self.flight(day, **params)
+        del flight["route"]
+        return flight
+
+
+class ScheduleImportApiTests(ScheduleImportTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("admin@test.com", "testpass", is_staff=True)
+        )
+
+    def test_admin_only(self):
+        self.client.force_authenticate(get_user_model().objects.create_user("user@test.com", "testpass"))
+
+        res = self.client.post(IMPORT_URL, [self.flight()], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_json(self):
+        self.assertEqual(self.client.get(FLIGHT_URL).data["results"], [])
+        crew_ids = [member.id for member in self.crew]
+
+        res = self.client.post(
+            IMPORT_URL,
+            [self.flight(1, crew=crew_ids), self.new_route_flight(2, crew=crew_ids[:1]), self.new_route_flight(3)],
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            {key: res.data[key] for key in ("rows", "flights", "routes", "crew", "errors")},
+            {"rows": 3, "flights": 3, "routes": 1, "crew": 4, "errors": []},
+        )
+        new_route = Route.objects.get(destination=self.lviv)
+        self.assertEqual((new_route.source_id, new_route.distance), (self.route.source_id, 700))
+        flights = Flight.objects.order_by("departure_time")
+        self.assertEqual([flight.route_id for flight in flights], [self.route.id, new_route.id, new_route.id])
+        self.assertEqual(sorted(flights[0].crew.values_list("id", flat=True)), crew_ids)
+        # Cached flight lists are invalidated although bulk inserts send no signals
+        self.assertEqual(len(self.client.get(FLIGHT_URL).data["results"]), 3)
+
+    def test_import_csv(self):
+        flight = f"{self.route.id},{self.airplane.id}"
+        body = (
+            "route,airplane,departure_time,arrival_time,crew\n"
+            f"{flight},2025-03-01T08:00:00Z,2025-03-01T10:00:00Z,{self.crew[0].id};{self.crew[1].id}\n"
+            f"{flight},2025-03-02T08:00:00Z,2025-03-02T10:00:00Z,\n"
+        )
+
+        res = self.client.post(IMPORT_URL, body, content_type="text/csv")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((res.data["flights"], res.data["crew"]), (2, 2))
+        self.assertEqual(Flight.crew.through.objects.count(), 2)
+
+    def test_per_row_errors(self):
+        rows = [
+            self.flight(1),
+            self.flight(2, airplane=999),
+            self.flight(3, arrival_time="2025-03-02T08:00:00Z"),
+            self.flight(4, crew=[self.crew[0].id, 999]),
+            self.new_route_flight(5, distance=None),
+            self.flight(6, route=None),
+            "not an object",
+            self.flight(8, departure_time="2027-02-30T10:00"),
+        ]
+
+        res = self.client.post(IMPORT_URL, rows, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            {error["row"]: sorted(error["errors"]) for error in res.data["errors"]},
+            {
+                2: ["airplane"],
+                3: ["arrival_time"],
+                4: ["crew"],
+                5: ["distance"],
+                6: ["destination", "source"],
+                7: ["non_field_errors"],
+                8: ["departure_time"],
+            },
+        )
+        self.assertEqual(res.data["errors"][2]["errors"]["crew"], ["Crew member 999 does not exist."])
+        self.assertEqual(res.data["flights"], 0)
+        self.assertFalse(Flight.objects.exists())
+
+    def test_dry_run(self):
+        res = self.client.post(f"{IMPORT_URL}?dry_run=true", [self.flight(1), self.new_route_flight(2)], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data["dry_run"])
+        self.assertEqual((res.data["flights"], res.data["routes"]), (2, 1))
+        self.assertFalse(Flight.objects.exists())
+        self.assertFalse(Route.objects.filter(destination=self.lviv).exists())
+
+    def test_not_a_list(self):
+        res = self.client.post(IMPORT_URL, self.flight(), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ScheduleImporterTests(ScheduleImportTestMixin, TestCase):
+    def test_queries_independent_of_rows(self):
+        query_counts = []
+        for count in (5, 50):
+            rows = [self.flight(day % 28 + 1, crew=[self.crew[day % 3].id]) for day in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                ScheduleImporter(batch_size=100, use_copy=False).run(rows)
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(Flight.objects.count(), 55)
+
+    def test_routes_created_once_across_batches(self):
+        rows = [self.new_route_flight(day) for day in range(1, 6)]
+
+        report = ScheduleImporter(batch_size=2, use_copy=False).run(rows)
+
+        self.assertEqual((report["flights"], report["routes"]), (5, 1))
+        self.assertEqual(Route.objects.filter(destination=self.lviv).count(), 1)
+
+    def test_created_ids_read_back(self):
+        rows = [self.new_route_flight(day, crew=[self.crew[day % 3].id]) for day in range(1, 5)]
+        # Guessing the next ids is only safe on PostgreSQL, from its sequence
+        reserve_ids = RowWriter.reserve_ids
+        if connection.vendor != "postgresql":
+            reserve_ids = mock.Mock(side_effect=AssertionError)
+
+        with mock.patch.object(RowWriter, "reserve_ids", reserve_ids):
+            ScheduleImporter(batch_size=2, use_copy=False).run(rows)
+
+        for flight in Flight.objects.select_related("route").prefetch_related("crew"):
+            self.assertEqual(flight.route.destination_id, self.lviv.id)
+            self.assertEqual(
+                [member.id for member in flight.crew.all()], [self.crew[flight.departure_time.day % 3].id]
+            )
+
+    def test_dry_run_plans_routes_once_across_batches(self):
+        rows = [self.new_route_flight(day) for day in range(1, 6)]
+
+        report = ScheduleImporter(batch_size=2).run(rows, dry_run=True)
+
+        self.assertEqual(report["routes"], 1)
+
+    def test_error_in_later_batch_rolls_back_earlier_ones(self):
+        rows = [self.flight(day) for day in range(1, 5)] + [self.flight(5, airplane=999)]
+
+        report = ScheduleImporter(batch_size=2, use_copy=False).run(rows)
+
+        self.assertEqual([error["row"] for error in report["errors"]], [5])
+        self.assertFalse(Flight.objects.exists())
+
+
+class ImportScheduleCommandTests(ScheduleImportTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, filename, content):
+        path = os.path.join(self.directory, filename)
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def test_import_json_file(self):
+        path = self.write("schedule.json", json.dumps([self.flight(1), self.new_route_flight(2)]))
+        out = StringIO()
+
+        call_command("import_schedule", path, stdout=out)
+
+        self.assertIn("Created 2 flights, 1 routes", out.getvalue())
+        self.assertEqual(Flight.objects.count(), 2)
+
+    def test_dry_run_csv(self):
+        path = self.write(
+            "schedule.csv",
+            "route,airplane,departure_time,arrival_time\n"
+            f"{self.route.id},{self.airplane.id},2025-03-01T08:00:00,2025-03-01T10:00:00\n",
+        )
+        out = StringIO()
+
+        call_command("import_schedule", path, "--dry-run", stdout=out)
+
+        self.assertIn("All 1 rows are valid", out.getvalue())
+        self.assertFalse(Flight.objects.exists())
+
+    def test_invalid_rows(self):
+        path = self.write("schedule.json", json.dumps([self.flight(1), self.flight(2, airplane=999)]))
+        err = StringIO()
+
+        with self.assertRaisesMessage(CommandError, "1 of 2 rows are invalid"):
+            call_command("import_schedule", path, stdout=StringIO(), stderr=err)
+
+        self.assertIn("Row 2:", err.getvalue())
+        self.assertFalse(Flight.objects.exists())
@@ -0,0 +1,176 @@
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+import time as clock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Crew, Flight, FlightSchedule
+from airport.schedules import HORIZON_CACHE_KEY, ensure_materialized, materialize
+from airport.tests.test_airport_api import sample_airplane, sample_route
+
+FLIGHT_URL = reverse("airport:flight-list")
+# Monday
+TODAY = date(2025, 3, 3)
+
+
+def sample_schedule(**params):
+    defaults = {
+        "route": sample_route(),
+        "airplane": sample_airplane(),
+        "departure_time": time(8, 0),
+        "duration": timedelta(hours=2, minutes=30),
+        "valid_from": TODAY,
+    }
+    defaults.update(params)
+    return FlightSchedule.objects.create(**defaults)
+
+
+class FlightScheduleTests(TestCase):
+    def test_days_follow_weekday_mask_and_validity(self):
+        schedule = sample_schedule(weekdays=0b0010101, valid_until=TODAY + timedelta(days=9))
+
+        days = list(schedule.days(TODAY - timedelta(days=7), TODAY + timedelta(days=30)))
+
+        # Mondays, Wednesdays and Fridays of the validity range
+        self.assertEqual([(day - TODAY).days for day in days], [0, 2, 4, 7, 9])
+
+    def test_departure_in_local_time(self):
+        schedule = sample_schedule(time_zone="Europe/Kyiv")
+
+        winter = schedule.departure_on(date(2025, 1, 6))
+        summer = schedule.departure_on(date(2025, 7, 7))
+
+        self.assertEqual(winter.astimezone(dt_timezone.utc).time(), time(6, 0))
+        self.assertEqual(summer.astimezone(dt_timezone.utc).time(), time(5, 0))
+
+
+class MaterializeTests(TestCase):
+    def setUp(self):
+        cache.delete(HORIZON_CACHE_KEY)
+        self.crew = [Crew.objects.create(first_name="Crew", last_name=str(number)) for number in range(2)]
+        self.schedule = sample_schedule(weekdays=0b0000011)
+        self.schedule.crew.set(self.crew)
+
+    def test_creates_flights_with_crew(self):
+        created = materialize(TODAY + timedelta(days=13), today=TODAY)
+
+        flights = Flight.objects.filter(schedule=self.schedule).order_by("departure_time")
+        self.assertEqual(created, 4)
+        self.assertEqual(
+            [flight.departure_time for flight in flights],
+            [
+                datetime.combine(TODAY + timedelta(days=offset), time(8, 0), tzinfo=dt_timezone.utc)
+                for offset in (0, 1, 7, 8)
+            ],
+        )
+        self.assertEqual(flights[0].arrival_time - flights[0].departure_time, timedelta(hours=2, minutes=30))
+        self.assertEqual(sorted(flights[0].crew.values_list("id", flat=True)), [member.id for member in self.crew])
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.materialized_until, TODAY + timedelta(days=13))
+
+    def test_idempotent_and_incremental(self):
+        materialize(TODAY + timedelta(days=6), today=TODAY)
+
+        self.assertEqual(materialize(TODAY + timedelta(days=6), today=TODAY), 0)
+        self.assertEqual(materialize(TODAY + timedelta(days=13), today=TODAY), 2)
+        self.assertEqual(Flight.objects.filter(schedule=self.schedule).count(), 4)
+
+    def test_existing_flights_not_duplicated(self):
+        materialize(TODAY + timedelta(days=6), today=TODAY)
+        FlightSchedule.objects.update(materialized_until=None)
+
+        self.assertEqual(materialize(TODAY + timedelta(days=6), today=TODAY), 0)
+        self.assertEqual(Flight.objects.count(), 2)
+
+    def test_past_days_and_validity_end(self):
+        FlightSchedule.objects.update(valid_from=TODAY - timedelta(days=14), valid_until=TODAY + timedelta(days=3))
+
+        materialize(TODAY + timedelta(days=30), today=TODAY)
+
+        self.assertEqual(Flight.objects.count(), 2)
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.materialized_until, TODAY + timedelta(days=3))
+        self.assertFalse(FlightSchedule.objects.behind(TODAY + timedelta(days=60)).exists())
+
+    def test_command(self):
+        out = StringIO()
+
+        call_command("materialize_schedules", days=13, stdout=out)
+
+        self.assertIn("Created", out.getvalue())
+        self.assertTrue(Flight.objects.filter(schedule=self.schedule).exists())
+
+
+class ScheduledFlightSearchTests(TestCase):
+    def setUp(self):
+        cache.delete(HORIZON_CACHE_KEY)
+        self.client = APIClient()
+        self.today = timezone.localdate()
+        self.schedule = sample_schedule(valid_from=self.today)
+        materialize(self.today + timedelta(days=7))
+
+    def search(self, day):
+        return self.client.get(FLIGHT_URL, {"departure_date": day.isoformat()})
+
+    def test_search_beyond_horizon_creates_flights(self):
+        day = self.today + timedelta(days=30)
+
+        res = self.search(day)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["departure_time"][:10], day.isoformat())
+        self.assertFalse(Flight.objects.filter(departure_time__date__gt=day + timedelta(days=1)).exists())
+
+    def test_search_within_horizon_runs_no_schedule_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.search(self.today + timedelta(days=3))
+
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertFalse([query for query in queries if "flightschedule" in query["sql"]])
+
+    def test_new_schedule_resets_horizon(self):
+        day = self.today + timedelta(days=3)
+        sample_schedule(valid_from=self.today, departure_time=time(18, 0))
+
+        res = self.search(day)
+
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_horizon_expires_for_other_processes(self):
+        day = self.today + timedelta(days=3)
+        # Created by another worker process, whose reset doesn't reach this process's cache
+        with mock.patch("airport.signals.reset_horizon"):
+            sample_schedule(valid_from=self.today, departure_time=time(18, 0))
+        self.assertEqual(ensure_materialized(day), 0)
+
+        expired = clock.time() + settings.SCHEDULE_HORIZON_CACHE_TIMEOUT + 1
+        with mock.patch("django.core.cache.backends.locmem.time.time", return_value=expired):
+            res = self.search(day)
+
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_search_limited_to_max_days(self):
+        with self.settings(SCHEDULE_MAX_DAYS=10):
+            self.search(self.today + timedelta(days=400))
+
+        self.assertFalse(Flight.objects.filter(departure_time__date__gt=self.today + timedelta(days=10)).exists())
+
+    def test_async_search(self):
+        day = self.today + timedelta(days=20)
+
+        res = self.client.get(reverse("airport:async-flight-list"), {"departure_date": day.isoformat()})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()["results"]), 1)
@@ -0,0 +1,190 @@
+import threading
+import unittest
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import Order, SeatHold, Ticket
+from airport.tests.test_airport_api import sample_flight
+
+ORDER_URL = reverse("airport:order-list")
+
+
+def holds_url(flight_id):
+    return reverse("airport:flight-holds", args=(flight_id,))
+
+
+def seats_url(flight_id):
+    return reverse("airport:flight-seats", args=(flight_id,))
+
+
+class SeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.other_user = get_user_model().objects.create_user("other@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def hold_for_other_user(self, row, seat, minutes=10):
+        return SeatHold.objects.create(
+            flight=self.flight,
+            user=self.other_user,
+            row=row,
+            seat=seat,
+            expires_at=timezone.now() + timedelta(minutes=minutes),
+        )
+
+    def test_auth_required(self):
+        res = APIClient().post(holds_url(self.flight.id), {"seats": [{"row": 1, "seat": 1}]}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_hold_seats(self):
+        payload = {"seats": [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}], "minutes": 5}
+
+        res = self.client.post(holds_url(self.flight.id), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(SeatHold.objects.filter(user=self.user).count(), 2)
+
+        res = self.client.get(seats_url(self.flight.id), {"encoding": "rle"})
+        self.assertEqual(res.data["seats"][:2], [0, 2])
+
+    def test_hold_renewed_by_holder(self):
+        payload = {"seats": [{"row": 1, "seat": 1}]}
+        self.client.post(holds_url(self.flight.id), payload, format="json")
+
+        res = self.client.post(holds_url(self.flight.id), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.count(), 1)
+
+    def test_seat_held_by_other_user(self):
+        self.hold_for_other_user(1, 1)
+
+        res = self.client.post(holds_url(self.flight.id), {"seats": [{"row": 1, "seat": 1}]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            ORDER_URL, {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("held", str(res.data["tickets"][0]))
+
+    def test_expired_hold_does_not_block(self):
+        self.hold_for_other_user(1, 1, minutes=-1)
+
+        res = self.client.post(holds_url(self.flight.id), {"seats": [{"row": 1, "seat": 1}]}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(SeatHold.objects.filter(user=self.other_user).exists())
+
+    def test_hold_sold_seat(self):
+        order = Order.objects.create(user=self.other_user)
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=1)
+
+        res = self.client.post(holds_url(self.flight.id), {"seats": [{"row": 1, "seat": 1}]}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hold_out_of_airplane_bounds(self):
+        res = self.client.post(holds_url(self.flight.id), {"seats": [{"row": 31, "seat": 1}]}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_order_converts_holds_into_tickets(self):
+        self.client.post(holds_url(self.flight.id), {"seats": [{"row": 2, "seat": 3}]}, format="json")
+
+        res = self.client.post(
+            ORDER_URL, {"tickets": [{"row": 2, "seat": 3, "flight": self.flight.id}]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertTrue(Ticket.objects.filter(flight=self.flight, row=2, seat=3).exists())
+
+    def test_release_holds(self):
+        self.client.post(holds_url(self.flight.id), {"seats": [{"row": 1, "seat": 1}]}, format="json")
+        self.hold_for_other_user(1, 2)
+
+        res = self.client.delete(holds_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(SeatHold.objects.values_list("user", flat=True)), [self.other_user.id])
+
+    def test_invalid_flight_id(self):
+        url = holds_url("abc")
+
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.post(url, {"seats": []}, format="json").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_expire_seat_holds_command(self):
+        self.hold_for_other_user(1, 1, minutes=-1)
+        self.hold_for_other_user(1, 2)
+
+        call_command("expire_seat_holds", stdout=StringIO())
+
+        self.assertEqual(list(SeatHold.objects.values_list("seat", flat=True)), [2])
+
+
+@unittest.skipUnless(connection.features.has_select_for_update, "Requires row-level locking")
+class SeatContentionTests(TransactionTestCase):
+    """Many customers racing for the same seats must get 201 or 400, never a server error"""
+
+    clients_count = 16
+
+    def setUp(self):
+        self.flight = sample_flight()
+        self.clients = []
+        for i in range(self.clients_count):
+            client = APIClient()
+            client.force_authenticate(get_user_model().objects.create_user(f"user{i}@test.com", "testpass"))
+            self.clients.append(client)
+
+    def race(self, url, payload_for):
+        barrier = threading.Barrier(len(self.clients))
+        statuses = []
+
+        def run(index, client):
+            try:
+                barrier.wait()
+                res = client.post(url, payload_for(index), format="json")
+                statuses.append(res.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(i, client)) for i, client in enumerate(self.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return statuses
+
+    def test_orders_for_same_seat(self):
+        statuses = self.race(
+            ORDER_URL, lambda i: {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]}
+        )
+
+        self.assertEqual(statuses.count(status.HTTP_201_CREATED), 1)
+        self.assertEqual(statuses.count(status.HTTP_400_BAD_REQUEST), self.clients_count - 1)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_overlapping_holds(self):
+        statuses = self.race(
+            holds_url(self.flight.id),
+            lambda i: {"seats": [{"row": 1, "seat": i % 4 + 1}, {"row": 2, "seat": 1}]},
+        )
+
+        self.assertEqual(statuses.count(status.HTTP_201_CREATED), 1)
+        self.assertEqual(SeatHold.objects.count(), 2)
@@ -0,0 +1,107 @@
+from datetime import datetime
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count, F, Max
+from django.test import TestCase
+from django.utils import timezone
+
+from airport.models import Airplane, Airport, Flight, Order, Route, Ticket
+from airport.seeding import AirportSeeder, RowWriter
+
+START = timezone.make_aware(datetime(2030, 1, 1))
+
+
+class AirportSeederTests(TestCase):
+    def seed(self, **options):
+        defaults = dict(airports=10, airplanes=5, crew=20, flights=30, users=5, orders=40, start=START)
+        return AirportSeeder(seed=7, batch_size=16).seed(**{**defaults, **options})
+
+    def test_created_counts(self):
+        created = self.seed()
+
+        self.assertEqual(created["flights"], Flight.objects.count())
+        self.assertEqual(created["orders"], Order.objects.count())
+        self.assertEqual(created["tickets"], Ticket.objects.count())
+        self.assertEqual((created["airports"], created["routes"], created["flights"]), (10, 90, 30))
+        self.assertEqual(Flight.crew.through.objects.count(), 90)
+        self.assertFalse(Airplane.objects.filter(types=None).exists())
+        self.assertFalse(Route.objects.filter(source=F("destination")).exists())
+
+    def test_writes_every_not_null_column(self):
+        # COPY leaves unlisted columns to their database defaults, and Django only has model defaults
+        with mock.patch.object(RowWriter, "write", autospec=True, side_effect=RowWriter.write) as write:
+            self.seed()
+
+        for call in write.call_args_list:
+            _, model, columns, _ = call.args
+            with self.subTest(model=model.__name__):
+                required = {
+                    field.attname for field in model._meta.concrete_fields if not field.null and not field.primary_key
+                }
+                self.assertLessEqual(required, set(columns))
+        self.assertEqual(list(Airplane.objects.values_list("image_variants", flat=True)), [{}] * 5)
+
+    def test_tickets_valid_and_seats_sold_synced(self):
+        self.seed()
+
+        tickets = Ticket.objects.select_related("flight__airplane")
+        for ticket in tickets:
+            ticket.clean()
+        self.assertFalse(
+            Ticket.objects.values("flight", "row", "seat").annotate(count=Count("id")).filter(count__gt=1).exists()
+        )
+        for flight in Flight.objects.annotate(tickets_count=Count("tickets")):
+            self.assertEqual(flight.seats_sold, flight.tickets_count)
+
+    def test_stops_when_sold_out(self):
+        created = self.seed(airplanes=1, flights=1, orders=10000, tickets_per_order=1)
+
+        flight = Flight.objects.select_related("airplane").get()
+        self.assertEqual(created["tickets"], flight.airplane.capacity)
+        self.assertEqual(flight.seats_sold, flight.airplane.capacity)
+
+    def test_reproducible(self):
+        def snapshot():
+            with transaction.atomic():
+                self.seed()
+                flights = list(
+                    Flight.objects.order_by("id").values_list("departure_time", "arrival_time", "route__distance")
+                )
+                names = list(Airport.objects.order_by("id").values_list("name", flat=True))
+                transaction.set_rollback(True)
+            return flights, names
+
+        self.assertEqual(snapshot(), snapshot())
+
+    def test_appends_to_existing_data(self):
+        self.seed()
+        last_flight = Flight.objects.aggregate(last=Max("id"))["last"]
+
+        self.seed(users=5)
+
+        self.assertEqual(Flight.objects.count(), 60)
+        self.assertEqual(Flight.objects.filter(id__gt=last_flight).count(), 30)
+
+    def test_command(self):
+        out = StringIO()
+
+        call_command("seed_airport", airports=5, flights=10, orders=10, users=2, crew=5, airplanes=2, stdout=out)
+
+        self.assertIn("Created 5 airports", out.getvalue())
+        self.assertEqual(Flight.objects.count(), 10)
+
+    @skipUnless(connection.vendor == "postgresql", "COPY is PostgreSQL only")
+    def test_copy_matches_bulk_create(self):
+        def snapshot(use_copy):
+            with transaction.atomic():
+                AirportSeeder(seed=7, use_copy=use_copy).seed(
+                    airports=10, airplanes=5, crew=20, flights=30, users=5, orders=40, start=START
+                )
+                tickets = list(Ticket.objects.order_by("id").values_list("row", "seat", "flight__departure_time"))
+                transaction.set_rollback(True)
+            return tickets
+
+        self.assertEqual(snapshot(True), snapshot(False))
@@ -0,0 +1,122 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.fieldsets import parse
+from airport.models import Crew, Order, Ticket, Type
+from airport.tests.test_airport_api import sample_airplane, sample_flight
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+AIRPLANE_URL = reverse("airport:airplane-list")
+
+
+class ParseTests(TestCase):
+    def test_dotted_names(self):
+        self.assertEqual(
+            parse("id, route_details.source_name,route_details.distance,,"),
+            {"id": {}, "route_details": {"source_name": {}, "distance": {}}},
+        )
+
+
+class SparseFieldsApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("admin@test.com", "testpass", is_staff=True)
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+        self.flight.crew.add(Crew.objects.create(first_name="Jane", last_name="Doe"))
+        self.flight.airplane.types.add(Type.objects.create(name="Boeing"))
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, [query["sql"] for query in queries]
+
+    def test_default_shape_unchanged(self):
+        res, _ = self.get(FLIGHT_URL)
+
+        flight = res.data["results"][0]
+        self.assertEqual(flight["route"], self.flight.route_id)
+        self.assertEqual(flight["route_details"]["source_name"], "Source Airport")
+        self.assertEqual(flight["crew_members"][0]["full_name"], "Jane Doe")
+
+    def test_fields_skip_unrequested_relations(self):
+        _, full = self.get(FLIGHT_URL)
+        res, sparse = self.get(FLIGHT_URL, fields="id,departure_time,route")
+
+        self.assertEqual(list(res.data["results"][0]), ["id", "route", "departure_time"])
+        self.assertEqual(len(sparse), len(full) - 2)
+        self.assertFalse([sql for sql in sparse if "airport_crew" in sql or "JOIN" in sql])
+
+    def test_nested_fields(self):
+        res, queries = self.get(FLIGHT_URL, fields="id,route_details.source_name,tickets_available")
+
+        flight = res.data["results"][0]
+        self.assertEqual(flight["route_details"], {"source_name": "Source Airport"})
+        self.assertEqual(flight["tickets_available"], 180)
+        self.assertEqual(len(queries), 1)
+
+    def test_expand(self):
+        res, _ = self.get(FLIGHT_URL, fields="id", expand="route.source,airplane.types")
+
+        flight = res.data["results"][0]
+        self.assertEqual(flight["route"]["source"]["name"], "Source Airport")
+        self.assertEqual(flight["route"]["destination"], self.flight.route.destination_id)
+        self.assertEqual(flight["airplane"]["types"], [{"id": self.flight.airplane.types.get().id, "name": "Boeing"}])
+
+    def test_unknown_names_ignored(self):
+        res, _ = self.get(FLIGHT_URL, fields="id,missing", expand="id,missing")
+
+        self.assertEqual(list(res.data["results"][0]), ["id"])
+
+    def test_airplane_fields(self):
+        sample_airplane(name="Airbus A320")
+
+        res, queries = self.get(AIRPLANE_URL, fields="id,name")
+
+        self.assertEqual(sorted(airplane["name"] for airplane in res.data), ["Airbus A320", "Boeing 747"])
+        self.assertEqual(list(res.data[0]), ["id", "name"])
+        self.assertFalse([sql for sql in queries if "airport_type" in sql])
+
+    def test_order_tickets_fields(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=self.flight, row=1, seat=1)
+        _, full = self.get(ORDER_URL)
+
+        res, sparse = self.get(ORDER_URL, fields="id,tickets.row,tickets.seat")
+
+        self.assertEqual(res.data["results"][0]["tickets"], [{"row": 1, "seat": 1}])
+        self.assertEqual(len(sparse), len(full) - 2)
+
+    def test_compact_order_expand_flight(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=self.flight, row=1, seat=1)
+
+        res, _ = self.get(ORDER_URL, view="compact", expand="tickets.flight", fields="tickets.flight.id")
+
+        self.assertEqual(res.data["results"][0]["tickets"], [{"flight": {"id": self.flight.id}}])
+
+    def test_writes_ignore_fields(self):
+        res = self.client.post(
+            f"{ORDER_URL}?fields=id&expand=tickets.flight",
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["tickets"][0]["flight"], self.flight.id)
+
+    def test_async_flight_list(self):
+        res = self.client.get(reverse("airport:async-flight-list"), {"fields": "id,route_details.destination_name"})
+
+        self.assertEqual(
+            res.json()["results"],
+            [{"id": self.flight.id, "route_details": {"destination_name": "Destination Airport"}}],
+        )
@@ -0,0 +1,116 @@
+import os
+import tempfile
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.tests.test_airport_api import sample_flight
+from airport.throttling import SlidingWindowStore, store
+
+ORDER_URL = reverse("airport:order-list")
+AIRPORT_URL = reverse("airport:airport-list")
+
+
+def hit_in_subprocess(path, key, count):
+    with override_settings(THROTTLE_DB_PATH=path):
+        return [SlidingWindowStore().hit(key, 5, 60)[0] for _ in range(count)]
+
+
+class TemporaryStoreMixin:
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "throttle.sqlite3")
+        override = override_settings(THROTTLE_DB_PATH=self.path)
+        override.enable()
+        self.addCleanup(override.disable)
+        super().setUp()
+
+
+class SlidingWindowStoreTests(TemporaryStoreMixin, SimpleTestCase):
+    def test_limit_within_window(self):
+        results = [store.hit("key", 3, 60, now=600 + second) for second in range(4)]
+
+        self.assertEqual([allowed for allowed, _ in results], [True, True, True, False])
+        self.assertGreater(results[-1][1], 0)
+
+    def test_previous_window_slides_out(self):
+        for _ in range(4):
+            store.hit("key", 4, 60, now=600)
+
+        # 5 seconds into the next window, 11/12 of the previous 4 requests still count, until a quarter
+        allowed, wait = store.hit("key", 4, 60, now=665)
+
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 10)
+        self.assertTrue(store.hit("key", 4, 60, now=675)[0])
+
+    def test_counters_expire_after_two_windows(self):
+        for _ in range(3):
+            store.hit("key", 3, 60, now=600)
+
+        self.assertTrue(store.hit("key", 3, 60, now=720)[0])
+
+    def test_keys_independent(self):
+        store.hit("first", 1, 60, now=600)
+
+        self.assertFalse(store.hit("first", 1, 60, now=601)[0])
+        self.assertTrue(store.hit("second", 1, 60, now=601)[0])
+
+    def test_shared_between_processes(self):
+        with get_context("fork").Pool(2) as pool:
+            results = pool.starmap(
+                hit_in_subprocess,
+                [(self.path, "shared", 4), (self.path, "shared", 4)],
+            )
+
+        self.assertEqual(sum(allowed for process in results for allowed in process), 5)
+
+
+class OrderThrottleTests(TemporaryStoreMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def order(self, seat):
+        return self.client.post(
+            ORDER_URL, {"tickets": [{"row": 1, "seat": seat, "flight": self.flight.id}]}, format="json"
+        )
+
+    @override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {"anon": "100/minute", "user": "100/minute", "order_create": "2/minute"},
+        }
+    )
+    def test_order_creation_scope(self):
+        responses = [self.order(seat) for seat in (1, 2, 3)]
+
+        self.assertEqual(
+            [res.status_code for res in responses],
+            [status.HTTP_201_CREATED, status.HTTP_201_CREATED, status.HTTP_429_TOO_MANY_REQUESTS],
+        )
+        self.assertGreater(int(responses[-1]["Retry-After"]), 0)
+        self.assertEqual(self.client.get(ORDER_URL).status_code, status.HTTP_200_OK)
+
+    @override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {"anon": "2/minute", "user": "100/minute", "order_create": "100/minute"},
+        }
+    )
+    def test_anonymous_rate(self):
+        self.client.force_authenticate(None)
+
+        codes = [self.client.get(AIRPORT_URL).status_code for _ in range(3)]
+
+        self.assertEqual(codes, [status.HTTP_200_OK, status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS])
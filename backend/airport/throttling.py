@@ -0,0 +1,152 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import AnonRateThrottle, ScopedRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+# Seconds between two deletions of expired counters by a process
+PRUNE_SECONDS = 60
+
+
+class SlidingWindowStore:
+    """
+    Request counters shared by every process of the host, in the SQLite file settings.THROTTLE_DB_PATH.
+
+    Each key holds one row: the number of requests in the current fixed window and in the previous one.
+    The requests of the sliding window ending now are estimated as all of the current window plus the
+    share of the previous one it still overlaps, so a check is one read and one write of a fixed-size
+    row, instead of a list of timestamps growing with the rate. Rows expire two windows after their
+    last request.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._pruned_at = 0.0
+
+    def _connection(self):
+        path = str(settings.THROTTLE_DB_PATH)
+        local = self._local
+        if getattr(local, "path", None) != path or local.pid != os.getpid():
+            # Autocommit mode, transactions are explicit
+            connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                "key TEXT PRIMARY KEY, window INTEGER, current INTEGER, previous INTEGER, expires_at REAL)"
+            )
+            local.connection, local.path, local.pid = connection, path, os.getpid()
+        return local.connection
+
+    def hit(self, key: str, limit: int, duration: int, now: float = None) -> tuple[bool, float]:
+        """
+        Count a request for `key` if fewer than `limit` were made in the last `duration` seconds.
+        Returns whether it was allowed, and if not, the seconds to wait before the next one would be.
+        """
+        now = time.time() if now is None else now
+        window, elapsed = divmod(now / duration, 1)
+        window = int(window)
+        connection = self._connection()
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT window, current, previous FROM counters WHERE key = ?", (key,)
+            ).fetchone()
+            current = previous = 0
+            if row is not None and row[0] == window:
+                current, previous = row[1], row[2]
+            elif row is not None and row[0] == window - 1:
+                previous = row[1]
+
+            if previous * (1 - elapsed) + current + 1 > limit:
+                connection.execute("COMMIT")
+                return False, self._wait(limit, duration, elapsed, current, previous)
+
+            connection.execute(
+                "INSERT OR REPLACE INTO counters (key, window, current, previous, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, window, current + 1, previous, (window + 2) * duration),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        if now - self._pruned_at > PRUNE_SECONDS:
+            self._pruned_at = now
+            connection.execute("DELETE FROM counters WHERE expires_at < ?", (now,))
+        return True, 0.0
+
+    @staticmethod
+    def _wait(limit, duration, elapsed, current, previous) -> float:
+        """Seconds until the estimate drops to limit - 1, the previous window's share decaying linearly"""
+        if limit <= 0:
+            return float(duration)
+        if current <= limit - 1:
+            # Within this window, once enough of the previous one has slid out
+            needed = 1 - (limit - 1 - current) / previous
+            return max(needed - elapsed, 0) * duration
+        # In the next window, once enough of this one has slid out
+        return (1 - elapsed + 1 - (limit - 1) / current) * duration
+
+    def clear(self):
+        self._connection().execute("DELETE FROM counters")
+
+
+store = SlidingWindowStore()
+
+
+class SharedRateThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle counting requests in the shared SlidingWindowStore instead of the cache,
+    so a limit holds for all worker processes together.
+    """
+
+    @property
+    def THROTTLE_RATES(self):
+        return api_settings.DEFAULT_THROTTLE_RATES
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self._wait = store.hit(self.key, self.num_requests, self.duration)
+        return allowed
+
+    def wait(self):
+        return math.ceil(self._wait)
+
+
+class SharedAnonRateThrottle(SharedRateThrottle, AnonRateThrottle):
+    pass
+
+
+class SharedUserRateThrottle(SharedRateThrottle, UserRateThrottle):
+    pass
+
+
+class SharedScopedRateThrottle(SharedRateThrottle, ScopedRateThrottle):
+    """
+    Limits the views that declare a `throttle_scope`, or a scope per action in `throttle_scopes`
+    (ex. {"create": "order_create"}), at the rate of DEFAULT_THROTTLE_RATES for the scope.
+    """
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, "throttle_scopes", {}).get(getattr(view, "action", None)) or getattr(
+            view, self.scope_attr, None
+        )
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -0,0 +1,235 @@
+import bisect
+import threading
+from datetime import date, datetime, time, timedelta
+from time import monotonic
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from airport.models import Airport, Flight
+
+VERSION_CACHE_KEY = "airport:timetable:version"
+
+
+class Connection(NamedTuple):
+    departure: float
+    arrival: float
+    flight_id: int
+    route_id: int
+    source_id: int
+    destination_id: int
+    distance: int
+    departure_time: datetime
+    arrival_time: datetime
+
+
+class Itinerary(NamedTuple):
+    legs: tuple[Connection, ...]
+
+    @property
+    def departure_time(self) -> datetime:
+        return self.legs[0].departure_time
+
+    @property
+    def arrival_time(self) -> datetime:
+        return self.legs[-1].arrival_time
+
+    @property
+    def duration(self) -> float:
+        return self.legs[-1].arrival - self.legs[0].departure
+
+    @property
+    def distance(self) -> int:
+        return sum(leg.distance for leg in self.legs)
+
+
+class TimetableIndex:
+    """
+    In-memory timetable of upcoming flights for connection search.
+
+    Connections are grouped by source airport and sorted by departure, with a parallel array of
+    departure timestamps, so the flights leaving an airport within a time window are found by
+    bisection instead of a query per hop. The index is built lazily from one query and kept up
+    to date incrementally by model signals (see airport.signals). Other processes sharing the cache
+    notice changes through a version counter in it and rebuild; every process also rebuilds once the
+    index is IN_MEMORY_INDEX_MAX_AGE seconds old, the only way changes reach it with a process-local cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._version = None
+        self._built_at = 0.0
+        self._connections: dict[int, list[Connection]] = {}
+        self._departures: dict[int, list[float]] = {}
+        self._flights: dict[int, Connection] = {}
+        self.airport_names: dict[int, str] = {}
+
+    @staticmethod
+    def _flights_queryset():
+        since = timezone.now() - timedelta(days=1)
+        return Flight.objects.filter(departure_time__gte=since).values_list(
+            "id",
+            "route_id",
+            "route__source_id",
+            "route__destination_id",
+            "route__distance",
+            "departure_time",
+            "arrival_time",
+        )
+
+    @staticmethod
+    def _connection(flight_id, route_id, source_id, destination_id, distance, departure_time, arrival_time):
+        return Connection(
+            departure_time.timestamp(),
+            arrival_time.timestamp(),
+            flight_id,
+            route_id,
+            source_id,
+            destination_id,
+            distance,
+            departure_time,
+            arrival_time,
+        )
+
+    def build(self):
+        connections = {}
+        flights = {}
+        for row in self._flights_queryset().iterator(chunk_size=10000):
+            connection = self._connection(*row)
+            connections.setdefault(connection.source_id, []).append(connection)
+            flights[connection.flight_id] = connection
+
+        for source_connections in connections.values():
+            source_connections.sort()
+
+        with self._lock:
+            self._connections = connections
+            self._departures = {
+                source_id: [connection.departure for connection in source_connections]
+                for source_id, source_connections in connections.items()
+            }
+            self._flights = flights
+            self.airport_names = dict(Airport.objects.values_list("id", "name"))
+            self._version = cache.get(VERSION_CACHE_KEY, 0)
+            self._built_at = monotonic()
+            self._built = True
+
+    def ensure_fresh(self):
+        if (
+            not self._built
+            or cache.get(VERSION_CACHE_KEY, 0) != self._version
+            or monotonic() - self._built_at > settings.IN_MEMORY_INDEX_MAX_AGE
+        ):
+            self.build()
+
+    def _bump_version(self):
+        try:
+            version = cache.incr(VERSION_CACHE_KEY)
+        except ValueError:
+            cache.set(VERSION_CACHE_KEY, 1, None)
+            version = 1
+        if self._version is not None and version == self._version + 1:
+            self._version = version
+
+    def _remove(self, flight_id):
+        connection = self._flights.pop(flight_id, None)
+        if connection is None:
+            return
+        source_connections = self._connections[connection.source_id]
+        index = bisect.bisect_left(source_connections, connection)
+        del source_connections[index]
+        del self._departures[connection.source_id][index]
+
+    def _insert(self, connection):
+        source_connections = self._connections.setdefault(connection.source_id, [])
+        index = bisect.bisect_left(source_connections, connection)
+        source_connections.insert(index, connection)
+        self._departures.setdefault(connection.source_id, []).insert(index, connection.departure)
+        self._flights[connection.flight_id] = connection
+
+    def flights_changed(self, flight_ids):
+        """Re-read the given flights (saved or deleted) from the database into the index"""
+        with self._lock:
+            if self._built:
+                rows = self._flights_queryset().filter(id__in=flight_ids)
+                for flight_id in flight_ids:
+                    self._remove(flight_id)
+                for row in rows:
+                    self._insert(self._connection(*row))
+            self._bump_version()
+
+    def route_changed(self, route_id):
+        with self._lock:
+            if not self._built:
+                self._bump_version()
+                return
+            flight_ids = [
+                connection.flight_id for connection in self._flights.values() if connection.route_id == route_id
+            ]
+            flight_ids += Flight.objects.filter(route_id=route_id).values_list("id", flat=True)
+            self.flights_changed(set(flight_ids))
+
+    def invalidate(self):
+        """Rebuild on next use in every process, for bulk changes that send no model signals"""
+        with self._lock:
+            self._built = False
+            self._bump_version()
+
+    def airport_changed(self, airport_id, name=None):
+        with self._lock:
+            if name is None:
+                self.airport_names.pop(airport_id, None)
+            else:
+                self.airport_names[airport_id] = name
+            self._bump_version()
+
+    def departures(self, source_id, earliest, latest):
+        """Connections leaving `source_id` with departure timestamps in [earliest, latest]"""
+        departures = self._departures.get(source_id, [])
+        start = bisect.bisect_left(departures, earliest)
+        end = bisect.bisect_right(departures, latest)
+        return self._connections[source_id][start:end] if start < end else []
+
+    def search(
+        self,
+        source_id: int,
+        destination_id: int,
+        day: date,
+        min_connection: timedelta,
+        max_connection: timedelta,
+        max_legs: int = 3,
+        limit: int = 10,
+    ) -> list[Itinerary]:
+        """
+        Journeys of up to `max_legs` flights from `source_id` to `destination_id` whose first flight
+        departs on `day`, ranked by total duration and then by distance.
+        """
+        self.ensure_fresh()
+        start = datetime.combine(day, time.min, tzinfo=timezone.get_current_timezone()).timestamp()
+        min_gap = min_connection.total_seconds()
+        max_gap = max_connection.total_seconds()
+        found = []
+
+        def extend(legs, visited):
+            last = legs[-1]
+            if last.destination_id == destination_id:
+                found.append(Itinerary(tuple(legs)))
+                return
+            if len(legs) == max_legs:
+                return
+            for connection in self.departures(last.destination_id, last.arrival + min_gap, last.arrival + max_gap):
+                if connection.destination_id not in visited:
+                    extend(legs + [connection], visited | {connection.destination_id})
+
+        with self._lock:
+            for connection in self.departures(source_id, start, start + timedelta(days=1).total_seconds() - 1):
+                extend([connection], {source_id, connection.destination_id})
+
+        found.sort(key=lambda itinerary: (itinerary.duration, itinerary.distance, len(itinerary.legs)))
+        return found[:limit]
+
+
+timetable = TimetableIndex()
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from airport import async_views
 from airport.views import (
     AirportViewSet,
     RouteViewSet,
@@ -9,6 +10,9 @@ from airport.views import (
     CrewViewSet,
     FlightViewSet,
     OrderViewSet,
+    ItineraryViewSet,
+    ResponseCacheStatsView,
+    ExportView,
 )
 
 router = routers.DefaultRouter()
@@ -19,9 +23,16 @@ router.register("airplanes", AirplaneViewSet)
 router.register("crew", CrewViewSet)
 router.register("flights", FlightViewSet)
 router.register("orders", OrderViewSet)
+router.register("itineraries", ItineraryViewSet, basename="itinerary")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("cache-stats/", ResponseCacheStatsView.as_view(), name="cache-stats"),
+    path("exports/<str:name>/", ExportView.as_view(), name="export"),
+    path("async/airports/", async_views.airport_list, name="async-airport-list"),
+    path("async/flights/", async_views.flight_list, name="async-flight-list"),
+    path("async/flights/<int:pk>/", async_views.flight_detail, name="async-flight-detail"),
+    path("async/flights/<int:pk>/seats/", async_views.flight_seats, name="async-flight-seats"),
 ]
 
 app_name = "airport"
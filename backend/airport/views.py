@@ -1,40 +1,151 @@
-from datetime import datetime
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.static import serve
 
 from rest_framework import viewsets, mixins, status
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from rest_framework.response import Response
 
-from airport.models import Airport, Route, Type, Airplane, Crew, Flight, Order
+from airport import export, fast_lists
+from airport.fieldsets import SparseFieldsViewMixin
+from airport.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render as render_metrics
+from airport.models import Airport, Route, Type, Airplane, Crew, Flight, FlightSearchRow, Order, Ticket, SeatHold
+from airport.parsers import CSVParser
+from airport.pagination import (
+    FlightCursorPagination,
+    FlightSearchCursorPagination,
+    LegacyPaginationMixin,
+    OrderCursorPagination,
+    OrderPagination,
+)
 from airport.permissions import IsAdminALLORIsAuthenticatedOReadOnly
+from airport.response_cache import cache_response, stats as response_cache_stats
+from airport.schedule_import import ScheduleImporter
+from airport.schedules import ensure_materialized
+from airport.seatmap import SeatMap, ENCODINGS
+from airport.suggest import suggestions
+from airport.timetable import timetable
 from airport.serializers import (
     AirportSerializer,
+    AirportSuggestionSerializer,
     RouteSerializer,
     TypeSerializer,
     AirplaneSerializer,
     CrewSerializer,
     FlightSerializer,
+    FlightSearchRowSerializer,
     OrderSerializer,
     OrderListSerializer, TicketListSerializer, AirplaneImageSerializer, AirplaneListSerializer,
     AirplaneDetailSerializer,
+    SeatHoldSerializer,
+    SeatHoldCreateSerializer,
+    OrderCompactSerializer,
+    ItinerarySearchSerializer,
+    ItinerarySerializer,
+    ExportSerializer,
 )
 
-
-class AirportViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        type=OpenApiTypes.STR,
+        description="Only these fields, dotted names for nested ones (ex. ?fields=id,route_details.source_name)",
+    ),
+    OpenApiParameter(
+        "expand",
+        type=OpenApiTypes.STR,
+        description="Related objects rendered in place of their ids (ex. ?expand=route,airplane.types)",
+    ),
+]
+
+# Query parameters of the flight list searching by departure, shared with the flattened search
+FLIGHT_SEARCH_PARAMETERS = [
+    OpenApiParameter(
+        "route",
+        type=OpenApiTypes.INT,
+        description="Filter by route id (e.g., ?route=2)",
+    ),
+    OpenApiParameter(
+        "departure_date",
+        type=OpenApiTypes.DATE,
+        description="Filter by departure date (e.g., ?departure_date=2024-12-25)",
+    ),
+    OpenApiParameter(
+        "departure_from",
+        type=OpenApiTypes.STR,
+        description="Departing at or after a date or datetime (e.g., ?departure_from=2024-12-25T08:00)",
+    ),
+    OpenApiParameter(
+        "departure_to",
+        type=OpenApiTypes.STR,
+        description="Departing before a datetime, or on or before a date (e.g., ?departure_to=2024-12-31)",
+    ),
+    OpenApiParameter(
+        "source",
+        type=OpenApiTypes.INT,
+        description="Filter by source airport id (e.g., ?source=1)",
+    ),
+    OpenApiParameter(
+        "destination",
+        type=OpenApiTypes.INT,
+        description="Filter by destination airport id (e.g., ?destination=3)",
+    ),
+]
+
+
+class AirportViewSet(
+    fast_lists.FastListMixin, mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet
+):
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
+    fast_list = fast_lists.AIRPORTS
     permission_classes = (IsAdminALLORIsAuthenticatedOReadOnly,)
+    query_budget = {"list": 1, "suggest": 0}
     
     def get_permissions(self):
-        if self.action == 'list':
-            return []  # Allow public access to list airports
+        if self.action in ['list', 'suggest']:
+            return []  # Allow public access to list and suggest airports
         return super().get_permissions()
 
+    @cache_response("airports")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                type=OpenApiTypes.STR,
+                description="Beginning of the airport name or city, or of any of their words (ex. ?q=new y)",
+            ),
+            OpenApiParameter("limit", type=OpenApiTypes.INT, description="Maximum number of airports, up to 50"),
+        ],
+        responses=AirportSuggestionSerializer(many=True),
+    )
+    @action(methods=["GET"], detail=False, url_path="suggest")
+    def suggest(self, request):
+        """Type-ahead airport search served from the in-memory prefix index"""
+        query = request.query_params.get("q", "")
+        limit = request.query_params.get("limit", "10")
+        limit = min(int(limit), 50) if limit.isdigit() else 10
+
+        serializer = AirportSuggestionSerializer(suggestions.lookup(query, limit), many=True)
+        return Response(serializer.data)
+
 
 class TypeViewSet(
     mixins.CreateModelMixin,
@@ -44,15 +155,26 @@ class TypeViewSet(
     queryset = Type.objects.all()
     serializer_class = TypeSerializer
     permission_classes = (IsAdminALLORIsAuthenticatedOReadOnly,)
+    query_budget = {"list": 1}
 
 
-class RouteViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
-    queryset = Route.objects.all()
+class RouteViewSet(
+    SparseFieldsViewMixin,
+    fast_lists.FastListMixin,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = Route.objects.select_related("source", "destination")
     serializer_class = RouteSerializer
+    fast_list = fast_lists.ROUTES
     permission_classes = (IsAdminUser,)
+    query_budget = {"list": 1}
 
 
 class AirplaneViewSet(
+    SparseFieldsViewMixin,
+    fast_lists.FastListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -60,7 +182,9 @@ class AirplaneViewSet(
 ):
     queryset = Airplane.objects.prefetch_related("types")
     serializer_class = AirplaneSerializer
+    fast_list = fast_lists.AIRPLANES
     permission_classes = (IsAdminALLORIsAuthenticatedOReadOnly,)
+    query_budget = {"list": 2, "retrieve": 2}
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -123,86 +247,441 @@ class AirplaneViewSet(
                 type={"type": "string"},
                 description="Filter by airplane type name (ex. ?types=Boeing,Airbus)",
             ),
+            *FIELDSET_PARAMETERS,
         ]
     )
+    @cache_response("airplanes")
     def list(self, request, *args, **kwargs):
         """Get list of airplanes"""
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(parameters=FIELDSET_PARAMETERS)
+    @cache_response("airplanes")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class CrewViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
     permission_classes = (IsAdminUser,)
+    query_budget = {"list": 1}
 
 
-class FlightViewSet(viewsets.ModelViewSet):
+class FlightViewSet(SparseFieldsViewMixin, fast_lists.FastListMixin, viewsets.ModelViewSet):
     queryset = (
         Flight.objects.all()
-        .select_related("route", "airplane")
-        .prefetch_related("crew")
+        .select_related("route__source", "route__destination", "airplane")
+        .prefetch_related("crew", "airplane__types")
     )
     serializer_class = FlightSerializer
+    pagination_class = FlightCursorPagination
+    fast_list = fast_lists.FLIGHTS
     permission_classes = (IsAdminUser,)
-    
+    query_budget = {"list": 3, "search": 1, "retrieve": 3, "seats": 4, "holds": 9}
+
     def get_permissions(self):
-        if self.action == 'list':
-            return []  # Allow public access to list flights
+        if self.action in ['list', 'search', 'seats']:
+            return []  # Allow public access to list and search flights and their seat maps
         return super().get_permissions()
 
-    def get_queryset(self):
-        departure_date = self.request.query_params.get("departure_date")
-        route_id = self.request.query_params.get("route")
+    @staticmethod
+    def _departure_bound(value, param, end=False):
+        """
+        Aware datetime from an ISO datetime. A plain date means the start of that day,
+        or the start of the next one for an `end` bound, so the whole day is included.
+        """
+        try:
+            day = parse_date(value)
+            moment = parse_datetime(value) if day is None else None
+        except ValueError:
+            # Well formed but impossible, ex. 2024-02-30
+            day = moment = None
+        if day is not None:
+            moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+        elif moment is None:
+            raise ValidationError({param: "Expected a date (YYYY-MM-DD) or an ISO 8601 datetime."})
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
 
-        queryset = self.queryset
+    @staticmethod
+    def _departure_date(value):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValidationError({"departure_date": "Expected a date (YYYY-MM-DD)."})
+
+    @staticmethod
+    def _int_param(value, param):
+        if not value.isdigit():
+            raise ValidationError({param: "Expected a non-negative integer."})
+        return int(value)
+
+    @classmethod
+    def filter_departures(cls, queryset, params, ids=("source", "destination", "airplane_type")):
+        """
+        `queryset` filtered by the departure date and window, route and `ids` query parameters,
+        the latter passed on to its search() method
+        """
+        departure_date = params.get("departure_date")
+        route_id = params.get("route")
 
         if departure_date:
-            departure_date = datetime.strptime(departure_date, "%Y-%m-%d").date()
-            queryset = queryset.filter(departure_time__date=departure_date)
+            departure_date = cls._departure_date(departure_date)
+            day_start = timezone.make_aware(datetime.combine(departure_date, time.min))
+            queryset = queryset.search(departure_from=day_start, departure_to=day_start + timedelta(days=1))
 
         if route_id:
-            queryset = queryset.filter(route_id=int(route_id))
+            queryset = queryset.filter(route_id=cls._int_param(route_id, "route"))
+
+        search = {}
+        for param in ids:
+            if params.get(param):
+                search[param] = cls._int_param(params[param], param)
+        if params.get("departure_from"):
+            search["departure_from"] = cls._departure_bound(params["departure_from"], "departure_from")
+        if params.get("departure_to"):
+            search["departure_to"] = cls._departure_bound(params["departure_to"], "departure_to", end=True)
+        if search:
+            queryset = queryset.search(**search)
+        return queryset
 
+    @classmethod
+    def search_queryset(cls, queryset, params):
+        """Flights of `queryset` matching the list query parameters"""
+        queryset = cls.filter_departures(queryset, params)
+        min_available = params.get("min_available")
+        if min_available:
+            queryset = queryset.with_min_available(cls._int_param(min_available, "min_available"))
         return queryset
 
+    @classmethod
+    def search_until(cls, params):
+        """
+        Last day the list query parameters search flights on, None without dates. It is one day later
+        than asked, so the flights of schedules in time zones ahead of the server's are included too.
+        """
+        days = []
+        if params.get("departure_date"):
+            days.append(cls._departure_date(params["departure_date"]))
+        for param in ("departure_from", "departure_to"):
+            if params.get(param):
+                days.append(cls._departure_bound(params[param], param).date())
+        return max(days) + timedelta(days=1) if days else None
+
+    def get_queryset(self):
+        if self.action == "list":
+            until = self.search_until(self.request.query_params)
+            if until is not None:
+                # Searches beyond the materialized horizon create the flights of recurring schedules first
+                ensure_materialized(until)
+        return self.search_queryset(self.queryset, self.request.query_params)
+
     @extend_schema(
         parameters=[
+            *FLIGHT_SEARCH_PARAMETERS,
             OpenApiParameter(
-                "route",
+                "airplane_type",
                 type=OpenApiTypes.INT,
-                description="Filter by route id (e.g., ?route=2)",
+                description="Filter by airplane type id (e.g., ?airplane_type=2)",
             ),
             OpenApiParameter(
-                "departure_date",
-                type=OpenApiTypes.DATE,
-                description="Filter by departure date (e.g., ?departure_date=2024-12-25)",
+                "min_available",
+                type=OpenApiTypes.INT,
+                description="Only flights with at least N unsold seats (e.g., ?min_available=2)",
             ),
+            *FIELDSET_PARAMETERS,
         ]
     )
+    @cache_response("flights")
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(parameters=FLIGHT_SEARCH_PARAMETERS, responses=FlightSearchRowSerializer(many=True))
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="search",
+        serializer_class=FlightSearchRowSerializer,
+        pagination_class=FlightSearchCursorPagination,
+    )
+    @cache_response("flights")
+    def search(self, request):
+        """
+        Flights with their airports' names and cities, airplane name, capacity and type names, read from
+        the flattened FlightSearchRow table with a single indexed scan
+        """
+        until = self.search_until(request.query_params)
+        if until is not None:
+            ensure_materialized(until)
+        rows = self.filter_departures(
+            FlightSearchRow.objects.all(), request.query_params, ids=("source", "destination")
+        )
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "encoding",
+                type=OpenApiTypes.STR,
+                enum=ENCODINGS,
+                description="Seat map encoding: base64 bitmap (default), run-length list or expanded JSON grid",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=True, url_path="seats")
+    def seats(self, request, pk=None):
+        """Occupancy map of the flight's airplane (sold and held seats), built from three narrow queries"""
+        encoding = request.query_params.get("encoding", "base64")
+        if encoding not in ENCODINGS:
+            return Response(
+                {"encoding": f"Must be one of: {', '.join(ENCODINGS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not str(pk).isdigit():
+            raise NotFound()
+
+        cabin = (
+            Flight.objects.filter(pk=pk)
+            .values_list("airplane__rows", "airplane__seats_in_row")
+            .first()
+        )
+        if cabin is None:
+            raise NotFound()
+
+        seat_map = SeatMap(*cabin, taken=Ticket.objects.filter(flight_id=pk).values_list("row", "seat"))
+        for row, seat in SeatHold.objects.active().filter(flight_id=pk).values_list("row", "seat"):
+            seat_map.mark(row, seat)
+        return Response(seat_map.payload(int(pk), encoding))
+
+    @extend_schema(request=SeatHoldCreateSerializer, responses=SeatHoldSerializer(many=True))
+    @action(
+        methods=["POST", "DELETE"],
+        detail=True,
+        url_path="holds",
+        permission_classes=[IsAuthenticated],
+    )
+    def holds(self, request, pk=None):
+        """Hold seats on the flight for a few minutes, or release all of your holds on it"""
+        if not str(pk).isdigit():
+            raise NotFound()
 
-class OrderPagination(PageNumberPagination):
-    page_size = 10
-    max_page_size = 100
+        if request.method == "DELETE":
+            SeatHold.objects.filter(flight_id=pk, user=request.user).delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
 
+        flight = get_object_or_404(Flight.objects.select_related("airplane"), pk=pk)
+        serializer = SeatHoldCreateSerializer(data=request.data, context={"flight": flight, "request": request})
+        serializer.is_valid(raise_exception=True)
+        holds = serializer.save(user=request.user)
+        return Response(SeatHoldSerializer(holds, many=True).data, status=status.HTTP_201_CREATED)
 
-class OrderViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
-    queryset = Order.objects.prefetch_related(
-        "tickets__flight__route", "tickets__flight__airplane"
+    @extend_schema(
+        request={"application/json": OpenApiTypes.OBJECT, "text/csv": OpenApiTypes.BINARY},
+        parameters=[
+            OpenApiParameter(
+                "dry_run",
+                type=OpenApiTypes.BOOL,
+                description="Only validate the rows and report what would be created (ex. ?dry_run=true)",
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
     )
+    @action(methods=["POST"], detail=False, url_path="import", parser_classes=[JSONParser, CSVParser])
+    def import_schedule(self, request):
+        """
+        Create flights in bulk from a JSON list or a CSV file with a header row. Columns: route, or source,
+        destination and distance to create a missing route; airplane, departure_time, arrival_time and
+        crew (ids separated by ";" in CSV). Nothing is created if any row is invalid.
+        """
+        if not isinstance(request.data, list):
+            raise ValidationError({"non_field_errors": ["Expected a list of flights."]})
+        dry_run = request.query_params.get("dry_run", "").lower() in ("1", "true")
+
+        report = ScheduleImporter().run(request.data, dry_run=dry_run)
+        if report["errors"]:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
+
+class OrderViewSet(
+    SparseFieldsViewMixin,
+    LegacyPaginationMixin,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    viewsets.GenericViewSet,
+):
+    # Related objects are fetched for the serializer's fields by SparseFieldsViewMixin
+    queryset = Order.objects.all()
     serializer_class = OrderSerializer
-    pagination_class = OrderPagination
+    pagination_class = OrderCursorPagination
+    legacy_pagination_class = OrderPagination
     permission_classes = (IsAuthenticated,)
+    throttle_scopes = {"create": "order_create"}
+    query_budget = {"list": 5, "create": 13}
+
+    def is_compact(self):
+        return self.action == "list" and self.request.query_params.get("view") == "compact"
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return self.queryset.filter(user=self.request.user).order_by("-created_at", "-id")
 
     def get_serializer_class(self):
+        if self.is_compact():
+            return OrderCompactSerializer
+
         if self.action == "list":
             return OrderListSerializer
         return OrderSerializer
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "view",
+                type=OpenApiTypes.STR,
+                enum=("compact",),
+                description="Flattened tickets with route names, departure time and seat only (ex. ?view=compact)",
+            ),
+            OpenApiParameter(
+                "pagination",
+                type=OpenApiTypes.STR,
+                enum=("page",),
+                description="Legacy page-number pagination instead of cursors (also enabled by ?page=N)",
+            ),
+            *FIELDSET_PARAMETERS,
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+
+class ItineraryViewSet(viewsets.ViewSet):
+    """Journeys of one to three flights between two airports, served from the in-memory timetable"""
+
+    permission_classes = ()
+    query_budget = {"list": 0}
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("from", type=OpenApiTypes.INT, required=True, description="Source airport id"),
+            OpenApiParameter("to", type=OpenApiTypes.INT, required=True, description="Destination airport id"),
+            OpenApiParameter(
+                "date", type=OpenApiTypes.DATE, required=True, description="Departure date of the first flight"
+            ),
+            OpenApiParameter(
+                "min_connection",
+                type=OpenApiTypes.INT,
+                description="Minimum connection time in minutes (ex. ?min_connection=60)",
+            ),
+            OpenApiParameter("max_legs", type=OpenApiTypes.INT, description="Maximum number of flights, 1 to 3"),
+            OpenApiParameter("limit", type=OpenApiTypes.INT, description="Maximum number of itineraries"),
+        ],
+        responses=ItinerarySerializer(many=True),
+    )
+    def list(self, request):
+        search = ItinerarySearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        data = search.validated_data
+
+        itineraries = timetable.search(
+            data["from"],
+            data["to"],
+            data["date"],
+            min_connection=timedelta(minutes=data["min_connection"]),
+            max_connection=timedelta(minutes=settings.ITINERARY_MAX_CONNECTION_MINUTES),
+            max_legs=data["max_legs"],
+            limit=data["limit"],
+        )
+        serializer = ItinerarySerializer(
+            itineraries, many=True, context={"airport_names": timetable.airport_names}
+        )
+        return Response(serializer.data)
+
+
+class ResponseCacheStatsView(APIView):
+    """Hit and miss counters of the public catalog response cache"""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(response_cache_stats())
+
+
+class ExportView(APIView):
+    """Full dump of flights, tickets or orders, streamed as CSV or NDJSON"""
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "output",
+                type=OpenApiTypes.STR,
+                enum=tuple(export.FORMATS),
+                description="Output format, csv by default (ex. ?output=ndjson)",
+            ),
+            OpenApiParameter("gzip", type=OpenApiTypes.BOOL, description="Gzip-compress the file (ex. ?gzip=true)"),
+            OpenApiParameter(
+                "since",
+                type=OpenApiTypes.STR,
+                description="Rows dated at or after a date or datetime: departure time of flights, "
+                "order time of tickets and orders (ex. ?since=2024-12-01)",
+            ),
+            OpenApiParameter(
+                "until",
+                type=OpenApiTypes.STR,
+                description="Rows dated before a datetime, or on or before a date (ex. ?until=2024-12-31)",
+            ),
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.BINARY, (200, "application/x-ndjson"): OpenApiTypes.BINARY},
+    )
+    def get(self, request, name):
+        if name not in export.EXPORTS:
+            raise NotFound(f"Unknown export, expected one of: {', '.join(export.EXPORTS)}.")
+        params = ExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        output, compress = params.validated_data["output"], params.validated_data["gzip"]
+
+        response = StreamingHttpResponse(
+            export.stream(
+                name,
+                output,
+                compress,
+                since=params.validated_data.get("since"),
+                until=params.validated_data.get("until"),
+            ),
+            content_type="application/gzip" if compress else export.FORMATS[output][0],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{export.filename(name, output, compress)}"'
+        return response
+
+
+def metrics(request):
+    """
+    Per-view request metrics of all worker processes in the Prometheus text format, for scrapers
+    sending the METRICS_TOKEN, or only for staff logged in to the admin when it isn't set
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")
+    else:
+        allowed = request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
+def media(request, path):
+    """
+    Uploaded files with far-future cache headers. Their names are never reused for other content:
+    uploads get a random suffix and image variants the hash of their content.
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    response["Cache-Control"] = f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable"
+    return response
@@ -0,0 +1,43 @@
+"""
+PostgreSQL backend reusing connections through a per-process pool (see pool.ConnectionPool).
+
+Enabled with OPTIONS["pool"], a dict of ConnectionPool arguments, the option Django 5.1 later
+added to its own backend. Without it, this backend behaves exactly like Django's.
+"""
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+
+from airport_api_service.postgresql.creation import DatabaseCreation
+from airport_api_service.postgresql.pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict["OPTIONS"].get("pool")
+        # Connections to the maintenance database, for creating and dropping test databases, are not pooled
+        if not options or self.settings_dict["NAME"] is None:
+            self.pool = None
+            return super().get_new_connection(conn_params)
+
+        self.pool = get_pool(conn_params, options)
+        connection = self.pool.checkout(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        self.isolation_level = self.settings_dict["OPTIONS"].get("isolation_level", connection.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            self.pool.checkin(self.connection)
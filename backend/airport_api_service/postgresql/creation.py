@@ -0,0 +1,15 @@
+from django.db.backends.postgresql import creation
+
+from airport_api_service.postgresql.pool import close_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Closes pooled connections to a test database before it is dropped or used as a template"""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        close_pools(self.connection.settings_dict["NAME"])
+        super()._clone_test_db(suffix, verbosity, keepdb)
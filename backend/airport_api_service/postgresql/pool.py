@@ -0,0 +1,188 @@
+import os
+import threading
+import time
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+
+
+class ConnectionPool:
+    """
+    Open connections of one worker process to one database, handed to whichever thread needs one.
+
+    Django closes its connection at the end of each request (with CONN_MAX_AGE=0) and opens a new
+    one per thread, so a threaded or ASGI server pays for a TCP connection, authentication and
+    backend startup on most requests. Through the pool, closing returns the connection instead,
+    and the next request of any thread reuses it.
+
+    At most `max_size` connections are open, idle or in use; checking one out waits up to `timeout`
+    seconds for another to be returned. Idle connections are reused most recently returned first,
+    and closed once older than `max_lifetime` or idle longer than `idle_timeout` seconds. With
+    `health_check`, a reused connection first runs `SELECT 1`, so one broken while idle (database
+    restart, network failure) is replaced instead of failing the request.
+    """
+
+    def __init__(self, max_size=10, max_lifetime=1800, idle_timeout=300, timeout=10, health_check=True):
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.health_check = health_check
+        self.pid = os.getpid()
+        self.stats = {"created": 0, "reused": 0, "discarded": 0}
+        self._condition = threading.Condition()
+        self._idle = []  # (connection, returned at), most recently returned last
+        self._created_at = {}  # Every open connection, idle or checked out
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return len(self._created_at)
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def checkout(self, connect):
+        """A connection from the pool, or a new one from `connect()` while under max_size"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._condition:
+                while not self._idle and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise psycopg2.OperationalError(
+                            f"No database connection available after {self.timeout}s, "
+                            f"all {self.max_size} of the pool are in use"
+                        )
+                    self._condition.wait(remaining)
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                else:
+                    connection = returned_at = None
+                    # Hold the slot while connecting
+                    placeholder = object()
+                    self._created_at[placeholder] = time.monotonic()
+
+            if connection is None:
+                try:
+                    connection = connect()
+                finally:
+                    with self._condition:
+                        del self._created_at[placeholder]
+                        if connection is not None:
+                            self._created_at[connection] = time.monotonic()
+                            self.stats["created"] += 1
+                        else:
+                            self._condition.notify()
+                return connection
+
+            if self._usable(connection, returned_at):
+                self.stats["reused"] += 1
+                return connection
+            self._discard(connection)
+
+    def checkin(self, connection):
+        """Return a connection, rolled back if left in a transaction"""
+        if connection not in self._created_at:
+            connection.close()
+            return
+        if self._closed or connection.closed or self._expired(connection):
+            self._discard(connection)
+            return
+
+        status = connection.get_transaction_status()
+        if status == TRANSACTION_STATUS_UNKNOWN:
+            self._discard(connection)
+            return
+        if status != TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                self._discard(connection)
+                return
+
+        with self._condition:
+            self._idle.append((connection, time.monotonic()))
+            stale = self._take_stale()
+            self._condition.notify()
+        for connection in stale:
+            self._discard(connection)
+
+    def close(self):
+        """Close idle connections, and the checked out ones as they are returned"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def _expired(self, connection, returned_at=None) -> bool:
+        now = time.monotonic()
+        if now - self._created_at.get(connection, now) > self.max_lifetime:
+            return True
+        return returned_at is not None and now - returned_at > self.idle_timeout
+
+    def _take_stale(self) -> list:
+        """Remove and return idle connections past their lifetime or idle timeout (lock held)"""
+        fresh, stale = [], []
+        for connection, returned_at in self._idle:
+            if self._expired(connection, returned_at):
+                stale.append(connection)
+            else:
+                fresh.append((connection, returned_at))
+        self._idle = fresh
+        return stale
+
+    def _usable(self, connection, returned_at) -> bool:
+        if connection.closed or self._expired(connection, returned_at):
+            return False
+        if not self.health_check:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not connection.autocommit:
+                connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+        with self._condition:
+            if self._created_at.pop(connection, None) is not None:
+                self.stats["discarded"] += 1
+            self._condition.notify()
+
+
+_pools: dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+# Pools inherited from the parent process through fork(). Their sockets are shared with the parent,
+# so they are neither used nor closed here, and kept referenced so garbage collection never closes them.
+_inherited: list[ConnectionPool] = []
+
+
+def get_pool(conn_params: dict, options: dict) -> ConnectionPool:
+    """Pool of this process for the connection parameters, created with `options` on first use"""
+    key = tuple(sorted((name, str(value)) for name, value in conn_params.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None and pool.pid != os.getpid():
+            _inherited.append(pool)
+            pool = None
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(**options)
+        return pool
+
+
+def close_pools(database=None):
+    """Close the pools of this process, or those connecting to `database`"""
+    with _pools_lock:
+        for key, pool in list(_pools.items()):
+            if pool.pid == os.getpid() and (database is None or ("database", database) in key):
+                pool.close()
+                del _pools[key]
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -23,7 +24,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = "django-insecure-(&vr2h)uogavpdn6%qf-_^d73%qe+k+k@)*ce0-k%=hsyb&%iy"
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv("DEBUG", "True") == "True"
 
 ALLOWED_HOSTS = []
 
@@ -38,14 +39,13 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "rest_framework",
     "rest_framework.authtoken",
-    "debug_toolbar",
     "airport",
     "user",
 ]
 
 MIDDLEWARE = [
+    "airport.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -54,6 +54,11 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if DEBUG:
+    # The toolbar middleware is sync only, so it would also make every async view run in a thread
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(2, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "airport_api_service.urls"
 
 TEMPLATES = [
@@ -78,17 +83,84 @@ WSGI_APPLICATION = "airport_api_service.wsgi.application"
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
 
+# Connections each worker process keeps open and reuses across requests and threads, 0 to disable the pool.
+# Lifetime, idle timeout and checkout wait are in seconds.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "airport_api_service.postgresql",
         "NAME": os.getenv("POSTGRES_DB", "default_db_name"),
         "USER": os.getenv("POSTGRES_USER", "default_user"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "default_password"),
         "HOST": os.getenv("POSTGRES_HOST", "localhost"),
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        # With the pool, closing a connection at the end of a request returns it to the pool,
+        # otherwise each thread keeps its own for CONN_MAX_AGE seconds
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 0 if DB_POOL_SIZE else 60)),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True",
+        "OPTIONS": {
+            "pool": {
+                "max_size": DB_POOL_SIZE,
+                "max_lifetime": int(os.getenv("DB_POOL_MAX_LIFETIME", 1800)),
+                "idle_timeout": int(os.getenv("DB_POOL_IDLE_TIMEOUT", 300)),
+                "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+                "health_check": os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True",
+            },
+        }
+        if DB_POOL_SIZE
+        else {},
+    }
+}
+
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "airport"),
     }
 }
 
+# Seconds users stay cached for JWT authentication when the cache is private to each worker process
+# (LocMemCache, DummyCache). Deactivations and password changes are only seen at once by the process
+# making them, other workers notice when their entry expires; share the cache (Redis, Memcached) to
+# revoke tokens immediately everywhere.
+AUTH_LOCAL_CACHE_TIMEOUT = int(os.getenv("AUTH_LOCAL_CACHE_TIMEOUT", 30))
+
+# Public catalog responses (airports, airplanes, flights), in seconds
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 300))
+
+# Seconds the in-memory connection timetable and airport suggestions are served before being rebuilt.
+# Changes bump their version in the cache, which rebuilds them at once wherever the cache is shared,
+# but only in the process making them with a process-local one.
+IN_MEMORY_INDEX_MAX_AGE = int(os.getenv("IN_MEMORY_INDEX_MAX_AGE", 60))
+
+# Per-view metrics served at /metrics. Worker processes sharing METRICS_DIR write snapshots
+# there every METRICS_FLUSH_SECONDS and each of them reports the sum; unset it for a single process.
+# Scrapers must send "Authorization: Bearer <METRICS_TOKEN>"; without a token only staff logged
+# in to the admin can read them.
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 5))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Log requests exceeding the query_budget of their viewset action (queries per request,
+# counting the JWT user lookup), e.g. in staging
+QUERY_BUDGET_LOG = os.getenv("QUERY_BUDGET_LOG", "False") == "True"
+
+# Rows fetched per round trip of the export cursors, and encoded per chunk of the exported file
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 2000))
+
+# Rows validated with one query per referenced model, then written together, by schedule imports
+SCHEDULE_IMPORT_BATCH_SIZE = int(os.getenv("SCHEDULE_IMPORT_BATCH_SIZE", 2000))
+
+# Days ahead the flights of recurring schedules are created for by materialize_schedules, and the most
+# a flight search may create them for on demand
+SCHEDULE_HORIZON_DAYS = int(os.getenv("SCHEDULE_HORIZON_DAYS", 60))
+SCHEDULE_MAX_DAYS = int(os.getenv("SCHEDULE_MAX_DAYS", 366))
+# Seconds searches trust the cached day up to which every schedule's flights exist. Schedule changes
+# clear it at once in a shared cache, but only in their own process with a process-local one.
+SCHEDULE_HORIZON_CACHE_TIMEOUT = int(os.getenv("SCHEDULE_HORIZON_CACHE_TIMEOUT", 60))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -132,6 +204,12 @@ STATIC_URL = "static/"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = "/files/media"
+# Serve MEDIA_ROOT from Django, with Cache-Control for MEDIA_CACHE_MAX_AGE seconds, when no web server does
+SERVE_MEDIA = os.getenv("SERVE_MEDIA", str(DEBUG)) == "True"
+MEDIA_CACHE_MAX_AGE = int(os.getenv("MEDIA_CACHE_MAX_AGE", 365 * 24 * 60 * 60))
+
+# Threads resizing uploaded airplane images, 0 to resize them on the request thread
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -140,16 +218,31 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": (
+        "airport.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "airport.throttling.SharedAnonRateThrottle",
+        "airport.throttling.SharedUserRateThrottle",
+        "airport.throttling.SharedScopedRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "100000/day", "user": "300000/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "100000/day",
+        "user": "300000/day",
+        "order_create": os.getenv("THROTTLE_ORDER_CREATE_RATE", "60/minute"),
+    },
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
 }
 
+# List flights, airports, airplanes and routes from .values() rows instead of serializer instances
+FAST_LISTS = os.getenv("FAST_LISTS", "True") == "True"
+
+# SQLite file of the throttling counters, shared by the worker processes of a host
+THROTTLE_DB_PATH = os.getenv("THROTTLE_DB_PATH", os.path.join(tempfile.gettempdir(), "airport-throttle.sqlite3"))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Airport Service API",
     "DESCRIPTION": "Order tickets for flights",
@@ -163,6 +256,14 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# Seat holds placed through /api/airport/flights/{id}/holds/, in minutes
+SEAT_HOLD_MINUTES = int(os.getenv("SEAT_HOLD_MINUTES", 10))
+SEAT_HOLD_MAX_MINUTES = int(os.getenv("SEAT_HOLD_MAX_MINUTES", 30))
+
+# Itinerary search over /api/airport/itineraries/, in minutes
+ITINERARY_MIN_CONNECTION_MINUTES = int(os.getenv("ITINERARY_MIN_CONNECTION_MINUTES", 45))
+ITINERARY_MAX_CONNECTION_MINUTES = int(os.getenv("ITINERARY_MAX_CONNECTION_MINUTES", 24 * 60))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
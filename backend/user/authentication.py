@@ -0,0 +1,122 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+KEY_PREFIX = "user:auth"
+# Fields of the users cached for authentication, the others are loaded from the database on first access
+CACHED_FIELDS = ("id", "is_staff", "is_active")
+
+
+def _version_key(user_id):
+    return f"{KEY_PREFIX}:version:{user_id}"
+
+
+def _user_key(user_id):
+    return f"{KEY_PREFIX}:user:{user_id}"
+
+
+def _process_local_cache() -> bool:
+    """Whether the cache is private to this process, so other workers never see its version bumps"""
+    return isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def bump_version(user_id):
+    """
+    Drop the cached authentication data of a user, now and once the current transaction commits.
+    Versions are nanosecond timestamps, so one evicted from the cache is never reused.
+    """
+    def bump():
+        cache.set(_version_key(user_id), time.time_ns(), None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication resolving the token's user from the cache instead of a query per request.
+
+    The user's id, is_staff and is_active are cached for the rest of the token's lifetime, tagged with
+    a per-user version that is bumped whenever the user is saved or deleted (see user.signals), so
+    deactivation, password and permission changes take effect on the next request. That needs a cache
+    shared by the worker processes (Redis, Memcached): with a process-local one, the other workers only
+    notice once their entry expires, so entries are kept AUTH_LOCAL_CACHE_TIMEOUT seconds at most.
+
+    request.user is a User instance with only those fields loaded: permission checks and foreign keys
+    to it need no query, other fields are loaded from the database when first accessed.
+    """
+
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def _cached_user(self, values, user_id):
+        """User from the cache values of _user_key and _version_key, or None if missing or outdated"""
+        version = values.get(_version_key(user_id))
+        entry = values.get(_user_key(user_id))
+        if version is None or entry is None or entry["version"] != version:
+            return None
+        user = self.user_model.from_db(None, CACHED_FIELDS, [entry[field] for field in CACHED_FIELDS])
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+    @staticmethod
+    def _entry(user, version, validated_token):
+        entry = {field: getattr(user, field) for field in CACHED_FIELDS}
+        entry["version"] = version
+        timeout = max(int(validated_token.get("exp", 0) - time.time()), 1)
+        if _process_local_cache():
+            timeout = min(timeout, settings.AUTH_LOCAL_CACHE_TIMEOUT)
+        return entry, timeout
+
+    def get_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        keys = [_user_key(user_id), _version_key(user_id)]
+        values = cache.get_many(keys)
+        user = self._cached_user(values, user_id)
+        if user is not None:
+            return user
+
+        version = values.get(_version_key(user_id))
+        if version is None:
+            cache.add(_version_key(user_id), time.time_ns(), None)
+            version = cache.get(_version_key(user_id))
+        user = super().get_user(validated_token)
+        entry, timeout = self._entry(user, version, validated_token)
+        cache.set(_user_key(user_id), entry, timeout)
+        return user
+
+    async def aget_user(self, validated_token):
+        """get_user for async views"""
+        user_id = self._user_id(validated_token)
+        keys = [_user_key(user_id), _version_key(user_id)]
+        values = await cache.aget_many(keys)
+        user = self._cached_user(values, user_id)
+        if user is not None:
+            return user
+
+        version = values.get(_version_key(user_id))
+        if version is None:
+            await cache.aadd(_version_key(user_id), time.time_ns(), None)
+            version = await cache.aget(_version_key(user_id))
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        entry, timeout = self._entry(user, version, validated_token)
+        await cache.aset(_user_key(user_id), entry, timeout)
+        return user
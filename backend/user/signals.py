@@ -0,0 +1,10 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from user.authentication import bump_version
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def invalidate_cached_authentication(sender, instance, **kwargs):
+    bump_version(instance.pk)
@@ -0,0 +1,110 @@
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.authentication import CachedJWTAuthentication, _version_key
+
+CREW_URL = reverse("airport:crew-list")
+ME_URL = reverse("user:manage")
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass", is_staff=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+        table = get_user_model()._meta.db_table
+        return res, [query["sql"] for query in queries.captured_queries if table in query["sql"]]
+
+    def test_user_cached_after_first_request(self):
+        _, first = self.user_queries(CREW_URL)
+        res, second = self.user_queries(CREW_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, [])
+
+    def test_deactivation_takes_effect(self):
+        self.client.get(CREW_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(CREW_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.data["code"], "user_inactive")
+
+    def test_permission_change_takes_effect(self):
+        self.client.get(CREW_URL)
+
+        self.user.is_staff = False
+        self.user.save()
+        res = self.client.get(CREW_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_password_change_bumps_version(self):
+        self.client.get(CREW_URL)
+        version = cache.get(_version_key(self.user.id))
+
+        self.user.set_password("newpass")
+        self.user.save()
+        _, queries = self.user_queries(CREW_URL)
+
+        self.assertNotEqual(cache.get(_version_key(self.user.id)), version)
+        self.assertEqual(len(queries), 1)
+
+    def test_deleted_user_rejected(self):
+        self.client.get(CREW_URL)
+
+        self.user.delete()
+        res = self.client.get(CREW_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.data["code"], "user_not_found")
+
+    def test_evicted_version_reloads_user(self):
+        self.client.get(CREW_URL)
+
+        cache.delete(_version_key(self.user.id))
+        res, queries = self.user_queries(CREW_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+
+    def test_other_fields_loaded_on_access(self):
+        self.client.get(CREW_URL)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], "test@test.com")
+
+    @override_settings(AUTH_LOCAL_CACHE_TIMEOUT=30)
+    def test_process_local_cache_entries_expire_soon(self):
+        token = AccessToken.for_user(self.user)
+        authentication = CachedJWTAuthentication()
+
+        _, timeout = authentication._entry(self.user, 1, token)
+        self.assertEqual(timeout, 30)
+
+        shared = "django.core.cache.backends.filebased.FileBasedCache"
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            CACHES={"default": {"BACKEND": shared, "LOCATION": directory}}
+        ):
+            _, timeout = authentication._entry(self.user, 1, token)
+        self.assertGreater(timeout, 30)
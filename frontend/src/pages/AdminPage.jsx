@@ -53,17 +53,31 @@ const AdminPage = () => {
     fetchData()
   }, [])
 
+  // Flights are paginated by cursor, follow `next` so the admin sees all of them
+  const fetchAllFlights = async () => {
+    const results = []
+    let cursor = null
+    do {
+      const response = await api.get('/airport/flights/', {
+        params: { page_size: 500, ...(cursor && { cursor }) },
+      })
+      results.push(...response.data.results)
+      cursor = response.data.next && new URL(response.data.next, window.location.origin).searchParams.get('cursor')
+    } while (cursor)
+    return results
+  }
+
   const fetchData = async () => {
     setLoading(true)
     try {
-      const [flightsRes, airportsRes, airplanesRes, routesRes] = await Promise.all([
-        api.get('/airport/flights/'),
+      const [allFlights, airportsRes, airplanesRes, routesRes] = await Promise.all([
+        fetchAllFlights(),
         api.get('/airport/airports/'),
         api.get('/airport/airplanes/'),
         api.get('/airport/routes/'),
       ])
       
-      setFlights(flightsRes.data)
+      setFlights(allFlights)
       setAirports(airportsRes.data)
       setAirplanes(airplanesRes.data)
       setRoutes(routesRes.data)
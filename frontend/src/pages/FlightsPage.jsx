@@ -23,6 +23,8 @@ const FlightsPage = () => {
   const [flights, setFlights] = useState([])
   const [airports, setAirports] = useState([])
   const [loading, setLoading] = useState(false)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [nextCursor, setNextCursor] = useState(null)
   const [error, setError] = useState('')
   const [filters, setFilters] = useState({
     departure_date: '',
@@ -43,12 +45,16 @@ const FlightsPage = () => {
     }
   }
 
-  const fetchFlights = async () => {
-    setLoading(true)
+  const fetchFlights = async (cursor = null) => {
+    const setBusy = cursor ? setLoadingMore : setLoading
+    setBusy(true)
     setError('')
     
     try {
       const params = new URLSearchParams()
+      if (cursor) {
+        params.append('cursor', cursor)
+      }
       if (filters.departure_date) {
         params.append('departure_date', filters.departure_date)
       }
@@ -57,12 +63,14 @@ const FlightsPage = () => {
       }
 
       const response = await api.get(`/airport/flights/?${params.toString()}`)
-      setFlights(response.data)
+      const { results, next } = response.data
+      setFlights(prev => (cursor ? [...prev, ...results] : results))
+      setNextCursor(next && new URL(next, window.location.origin).searchParams.get('cursor'))
     } catch (error) {
       setError('Failed to fetch flights')
       console.error('Error fetching flights:', error)
     } finally {
-      setLoading(false)
+      setBusy(false)
     }
   }
 
@@ -171,6 +179,14 @@ const FlightsPage = () => {
         </Grid>
       )}
 
+      {!loading && nextCursor && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 3 }}>
+          <Button variant="outlined" onClick={() => fetchFlights(nextCursor)} disabled={loadingMore}>
+            {loadingMore ? <CircularProgress size={24} /> : 'Load More'}
+          </Button>
+        </Box>
+      )}
+
       {!loading && flights.length === 0 && (
         <Typography variant="h6" align="center" color="text.secondary" sx={{ mt: 4 }}>
           No flights found